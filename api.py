@@ -0,0 +1,337 @@
+# api.py
+# Headless HTTP/JSON API over the catalogue, pantry and shopping list, for
+# kitchen displays and ordering systems that need answers without a
+# Streamlit rerun. Run with `python api.py` or `uvicorn api:app`.
+import argparse
+import math
+import threading
+from contextlib import asynccontextmanager
+
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.exceptions import HTTPException
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+from catalogue import use_catalogue
+from pantry import RANKINGS, get_recipe_matrix, pantry_key, session_pantry
+from shopping import session_shopping_list
+from storage import save_pantry, save_shopping_list
+from utils import canonical_unit, parse_ingredient
+
+# Pantry and shopping list for the API, laid out like st.session_state so the
+# session helpers (session_pantry, get_recipe_matrix, ...) work unchanged. The
+# catalogue, pantry and shopping list are the process-wide shared ones; the
+# Pantry and ShoppingList lock their own writes and the catalogue is read-only.
+STATE = {}
+
+# rapidfuzz already spreads one search over every core, so cache misses are
+# scored one at a time; cache hits never wait for them
+_search_slot = threading.Lock()
+
+DEFAULT_LIMIT = 20
+
+
+def load_state(state):
+    """Load the shared catalogue and its index once, plus the saved pantry and shopping list."""
+    state.clear()
+    catalogue = use_catalogue(state)
+    # Build the shared index and parsed lines now rather than on the first request
+    catalogue.index
+    catalogue.lines
+    session_pantry(state)
+    session_shopping_list(state)
+    return state
+
+
+def _catalogue():
+    """The current shared snapshot (a new one is published when recipes change)."""
+    return use_catalogue(STATE)
+
+
+# --- Request helpers ---
+async def _json_body(request):
+    try:
+        body = await request.json()
+    except ValueError:
+        raise HTTPException(400, "Request body must be JSON")
+    if not isinstance(body, dict):
+        raise HTTPException(400, "Request body must be a JSON object")
+    return body
+
+
+def _recipe_id(value):
+    try:
+        recipe_id = int(value)
+    except (TypeError, ValueError):
+        raise HTTPException(400, "recipe_id must be an integer")
+    if not 0 <= recipe_id < len(_catalogue()):
+        raise HTTPException(404, f"No recipe {recipe_id}")
+    return recipe_id
+
+
+def _number(body, key, default, low, high):
+    value = body.get(key, default)
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or not low <= value <= high:
+        raise HTTPException(400, f'"{key}" must be a number from {low} to {high}')
+    return value
+
+
+def _limit(value):
+    if isinstance(value, bool) or not isinstance(value, int) or value < 0:
+        raise HTTPException(400, "limit must be a non-negative integer")
+    return value
+
+
+def _search_options(body):
+    """(threshold, min_percentage, limit) of a search request, range-checked."""
+    return (
+        _number(body, "threshold", 85, 0, 100),
+        _number(body, "min_percentage", 0.5, 0, 1),
+        _limit(body.get("limit", DEFAULT_LIMIT)),
+    )
+
+
+def _quantity(value):
+    """A pantry quantity: a finite number, zero or more."""
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise HTTPException(400, "Could not understand that ingredient")
+    if not math.isfinite(value) or value < 0:
+        raise HTTPException(400, "quantity must be a finite number, zero or more")
+    return value
+
+
+def _stock_entry(body):
+    """
+    (qty, unit, item) of a structured pantry entry, canonicalized as
+    parse_ingredient() would the same text: the unit mapped through UNIT_MAP
+    (quantity scaled to it) and the item singularized.
+    """
+    item, unit = body.get("item"), body.get("unit")
+    if not isinstance(item, str) or not (unit is None or isinstance(unit, str)):
+        raise HTTPException(400, '"item" must be a string and "unit" a string or null')
+    qty = _quantity(body.get("quantity"))
+    known = canonical_unit(unit) if unit and unit.strip() else (None, 1)
+    if known:
+        unit, multiplier = known
+        qty *= multiplier
+    item, unit = pantry_key(item, unit)
+    return qty, unit, item
+
+
+def _parsed_lines(body):
+    """A recipe's parsed lines, from "recipe_id" or free-text "ingredients"."""
+    if "recipe_id" in body:
+        return _catalogue().lines.get(_recipe_id(body["recipe_id"]), [])
+    ingredients = body.get("ingredients")
+    if not isinstance(ingredients, list) or not all(isinstance(i, str) for i in ingredients):
+        raise HTTPException(400, 'Pass "recipe_id" or an "ingredients" list of strings')
+    return [(raw, *parse_ingredient(raw)) for raw in ingredients]
+
+
+def _recipe_name(recipe_id):
+    return str(_catalogue().recipes.iloc[recipe_id].get("Recipe Name", f"Recipe {recipe_id}"))
+
+
+def _amounts_json(entries):
+    return [{"item": item, "unit": unit, "amount": amount} for item, unit, amount in entries]
+
+
+def _shortfall_json(missing, short, matched):
+    return {
+        "can_make": not missing and not short,
+        "matched": matched,
+        "missing": _amounts_json(missing),
+        "short": _amounts_json(short),
+    }
+
+
+def _pantry_json(pantry):
+    return [{"item": item, "unit": unit, "quantity": qty} for (item, unit), qty in pantry.copy().items() if qty]
+
+
+def _shopping_json(shopping):
+    return {
+        "items": [{"item": item, "unit": unit, "amount": amount} for item, unit, amount in shopping.consolidated()],
+        "entries": list(shopping),
+    }
+
+
+# --- Endpoints ---
+async def health(request):
+    return JSONResponse({"recipes": len(_catalogue()), "pantry_items": len(STATE["pantry"])})
+
+
+async def recipe(request):
+    recipe_id = _recipe_id(request.path_params["recipe_id"])
+    return JSONResponse({
+        "recipe_id": recipe_id,
+        "name": _recipe_name(recipe_id),
+        "ingredients": [raw for raw, _, _, _ in _catalogue().lines.get(recipe_id, [])],
+    })
+
+
+async def search(request):
+    """POST {"terms": [...], "threshold": 85, "min_percentage": 0.5, "limit": 20}"""
+    body = await _json_body(request)
+    terms = body.get("terms")
+    if isinstance(terms, str):
+        terms = terms.split(",")
+    if not isinstance(terms, list) or not terms:
+        raise HTTPException(400, '"terms" must be a non-empty list or comma separated string')
+    threshold, min_percentage, limit = _search_options(body)
+
+    catalogue = _catalogue()
+    cache = catalogue.search_cache
+    args = (catalogue.index, [str(t) for t in terms], threshold, min_percentage)
+    results = cache.cached(*args)
+    if results is None:
+        def run():
+            with _search_slot:
+                return cache.search(*args)
+        results = await run_in_threadpool(run)
+    return JSONResponse({"total": len(results), "results": results[:limit]})
+
+
+async def check(request):
+    """POST {"recipe_id": 3} or {"ingredients": ["2 eggs", ...]} -> what the pantry is missing."""
+    lines = _parsed_lines(await _json_body(request))
+
+    return JSONResponse(_shortfall_json(*await run_in_threadpool(STATE["pantry"].shortfall, lines)))
+
+
+async def cookable(request):
+    """GET ?limit=20&rank=match|missing|shortfall -> best recipes for the current pantry."""
+    by = request.query_params.get("rank", "match")
+    if by not in RANKINGS.values():
+        raise HTTPException(400, f"rank must be one of {sorted(RANKINGS.values())}")
+    try:
+        limit = _limit(int(request.query_params.get("limit", DEFAULT_LIMIT)))
+    except ValueError:
+        raise HTTPException(400, "limit must be a non-negative integer")
+
+    def run():
+        return get_recipe_matrix(STATE).rank(STATE["pantry"].totals(), by, limit)
+
+    ranked, matched, pct = await run_in_threadpool(run)
+    return JSONResponse({"results": [
+        {"recipe_id": rid, "name": _recipe_name(rid), "matched": m, "match_pct": p}
+        for rid, m, p in zip(ranked.tolist(), matched.tolist(), pct.tolist())
+    ]})
+
+
+async def pantry(request):
+    """GET the pantry; POST {"text": "2 cups milk"} or {"item", "unit", "quantity"} to add stock."""
+    if request.method == "GET":
+        return JSONResponse({"pantry": _pantry_json(STATE["pantry"])})
+
+    body = await _json_body(request)
+    if "text" in body:
+        qty, unit, item = parse_ingredient(str(body["text"]))
+    else:
+        qty, unit, item = _stock_entry(body)
+    if not item:
+        raise HTTPException(400, "Could not understand that ingredient")
+    qty = _quantity(qty)
+
+    def run():
+        stock = STATE["pantry"]
+        stock.add((item, unit), qty)
+        save_pantry(stock)
+        return _pantry_json(stock)
+
+    return JSONResponse({"pantry": await run_in_threadpool(run)})
+
+
+async def cook(request):
+    """
+    POST {"recipe_id": 3} -> deduct the recipe from the pantry, all or nothing.
+    When the pantry doesn't cover it nothing changes and the response is a
+    409 listing what is missing.
+    """
+    lines = _parsed_lines(await _json_body(request))
+
+    def run():
+        stock = STATE["pantry"]
+        cooked, missing, short = stock.cook(lines)
+        if cooked:
+            save_pantry(stock)
+        return cooked, missing, short, _pantry_json(stock)
+
+    cooked, missing, short, stock = await run_in_threadpool(run)
+    return JSONResponse(
+        {"cooked": cooked, "missing": _amounts_json(missing), "short": _amounts_json(short), "pantry": stock},
+        status_code=200 if cooked else 409,
+    )
+
+
+async def shopping_list(request):
+    """
+    GET the consolidated list; DELETE clears it; POST {"recipe_id": 3} adds a
+    recipe ("missing_only": true adds only what the pantry lacks), or
+    {"ingredients": [...]} adds free-text lines.
+    """
+    if request.method == "GET":
+        return JSONResponse(_shopping_json(STATE["shopping_list"]))
+
+    if request.method == "DELETE":
+        def clear():
+            STATE["shopping_list"].clear()
+            save_shopping_list(STATE["shopping_list"])
+        await run_in_threadpool(clear)
+        return JSONResponse(_shopping_json(STATE["shopping_list"]))
+
+    body = await _json_body(request)
+    lines = _parsed_lines(body)
+
+    def run():
+        shopping = STATE["shopping_list"]
+        if body.get("missing_only"):
+            missing, short, _ = STATE["pantry"].shortfall(lines)
+            shopping.add_shortfall(missing + short)
+        else:
+            shopping.add_lines(lines)
+        save_shopping_list(shopping)
+        return _shopping_json(shopping)
+
+    return JSONResponse(await run_in_threadpool(run))
+
+
+async def http_error(request, exc):
+    return JSONResponse({"error": exc.detail}, status_code=exc.status_code)
+
+
+@asynccontextmanager
+async def lifespan(app):
+    await run_in_threadpool(load_state, STATE)
+    yield
+
+
+app = Starlette(
+    routes=[
+        Route("/health", health),
+        Route("/recipes/{recipe_id:int}", recipe),
+        Route("/search", search, methods=["POST"]),
+        Route("/pantry", pantry, methods=["GET", "POST"]),
+        Route("/pantry/check", check, methods=["POST"]),
+        Route("/cookable", cookable),
+        Route("/cook", cook, methods=["POST"]),
+        Route("/shopping-list", shopping_list, methods=["GET", "POST", "DELETE"]),
+    ],
+    exception_handlers={HTTPException: http_error},
+    lifespan=lifespan,
+)
+
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Recipe Finder HTTP/JSON API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    args = parser.parse_args()
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+# benchmarks/bench_cookable.py
+"""
+"What can I cook" ranking over the sparse recipe x ingredient matrix.
+
+Usage: python benchmarks/bench_cookable.py [--sizes 10000 100000 1000000] [--skus 5000] [--loop-max 100000]
+
+For each catalogue size, builds a synthetic parsed store, compiles it into a
+RecipeMatrix against a synthetic pantry and times ranking every recipe by
+match %, fewest missing and smallest shortfall, in full and for the top
+20 a page shows. Sizes up to --loop-max are
+also timed with the per-recipe compare loop the pages used before, and the
+matched counts are checked against it.
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from catalogue import lines_by_recipe
+from pantry import RANKINGS, Pantry, _compare, _requirements, matrix_from_store, pantry_totals
+from synthetic import synthetic_pantry, synthetic_store
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--skus", type=int, default=5_000)
+    parser.add_argument("--loop-max", type=int, default=100_000)
+    args = parser.parse_args()
+
+    plain = synthetic_pantry(args.skus)
+    pantry = Pantry(plain)
+    print(f"pantry: {len(pantry):,} entries")
+
+    for n in args.sizes:
+        store = synthetic_store(n)
+        compile_time, matrix = timed(lambda: matrix_from_store(pantry, store, n))
+        print(f"\n{n:,} recipes, {len(store):,} lines: compile {compile_time:.3f}s")
+
+        totals = pantry.totals()
+        for label, by in RANKINGS.items():
+            rank_time, (order, matched, _) = timed(lambda: matrix.rank(totals, by))
+            top_time, _ = timed(lambda: matrix.rank(totals, by, 20))
+            print(f"  rank by {label:<20} {rank_time * 1000:9.1f} ms   top 20 {top_time * 1000:9.1f} ms")
+
+        if n <= args.loop_max:
+            requirements = {rid: _requirements(lines) for rid, lines in lines_by_recipe(store).items()}
+
+            def per_recipe():
+                current = pantry_totals(plain)
+                return {rid: _compare(reqs, current) for rid, reqs in requirements.items()}
+
+            loop_time, reference = timed(per_recipe)
+            matched_by_id = dict(zip(order.tolist(), matched.tolist()))
+            assert all(reference[rid][2] == matched_by_id[rid] for rid in reference)
+            print(f"  per-recipe loop             {loop_time * 1000:9.1f} ms  (matched counts agree)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+# benchmarks/bench_fulltext.py
+"""
+Full-text search latency (search.TextIndex) over names and ingredients.
+
+Usage: python benchmarks/bench_fulltext.py [--recipes 100000] [--repeat 20]
+
+Indexes a synthetic catalogue with descriptive recipe names, then times
+search.full_text_search for exact, prefix, multi-word and misspelled
+queries and prints the median latency of each.
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from search import TextIndex, full_text_search
+from synthetic import ITEMS, synthetic_catalogue
+
+DISHES = ["pancakes", "salad", "curry", "stir fry", "soup", "tacos", "bowl", "pasta bake",
+          "smoothie", "traybake", "risotto", "skewers", "wraps", "muffins", "noodles"]
+
+QUERIES = ["chicken", "chick", "chiken", "honey sesame", "banana pancakes", "panckes",
+           "olive oil pasta", "strawbery smoothie", "risotto"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--recipes", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    recipes = synthetic_catalogue(args.recipes)
+    recipes["Recipe Name"] = [
+        f"{rng.choice(ITEMS).title()} and {rng.choice(ITEMS)} {rng.choice(DISHES)}" for _ in range(len(recipes))
+    ]
+    start = time.perf_counter()
+    index = TextIndex(recipes)
+    print(f"{len(recipes):,} recipes, {len(index.words):,} words indexed in {time.perf_counter() - start:.1f}s")
+
+    for query in QUERIES:
+        times = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            hits = full_text_search(index, query, limit=20)
+            times.append(time.perf_counter() - start)
+        top = hits[0]["Recipe"] if hits else "-"
+        print(f"{query!r:<22} {statistics.median(times) * 1000:7.2f} ms  {len(hits):>2} hits  top: {top}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+# benchmarks/bench_live.py
+"""
+Live search: per-keystroke latency of search.LiveSearch vs search_recipes.
+
+Usage: python benchmarks/bench_live.py [--recipes 20000] [--k 20] [--threshold 85]
+
+Replays a query being typed one term at a time (then one term removed)
+and prints, per step, the time to re-rank from scratch with
+search_recipes, the time LiveSearch takes for the top k, and how many
+lines LiveSearch had to score for that step.
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from catalogue import build_ingredient_store
+from search import IngredientIndex, LiveSearch, search_recipes
+from synthetic import synthetic_catalogue
+
+TYPED = ["flour", "sugar", "butter", "eggs", "milk", "honey"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--recipes", type=int, default=20_000)
+    parser.add_argument("--k", type=int, default=20)
+    parser.add_argument("--threshold", type=int, default=85)
+    parser.add_argument("--min-percentage", type=float, default=0.5)
+    args = parser.parse_args()
+
+    recipes = synthetic_catalogue(args.recipes)
+    store = build_ingredient_store(recipes)
+    recipes["Ingredients"] = [lines for lines in store.groupby("recipe_id")["raw"].agg(list)]
+    index = IngredientIndex(recipes)
+    live = LiveSearch(index, args.threshold)
+    print(f"{len(index):,} recipes, {len(index.lines):,} lines, top {args.k}")
+
+    steps = [TYPED[:i] for i in range(1, len(TYPED) + 1)] + [TYPED[:2] + TYPED[3:]]
+    for terms in steps:
+        start = time.perf_counter()
+        full = search_recipes(None, terms, args.threshold, args.min_percentage, index=index)
+        full_time = time.perf_counter() - start
+
+        scored = live.scored_lines
+        start = time.perf_counter()
+        top, _ = live.search(terms, args.min_percentage, k=args.k)
+        live_time = time.perf_counter() - start
+        assert top == full[:args.k]
+        print(f"{', '.join(terms):<42} full {full_time * 1000:7.1f} ms   "
+              f"live {live_time * 1000:7.1f} ms   {live.scored_lines - scored:>8,} lines scored")
+
+
+if __name__ == "__main__":
+    main()
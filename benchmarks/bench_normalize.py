@@ -0,0 +1,44 @@
+# benchmarks/bench_normalize.py
+"""
+Bulk ingredient normalization throughput by worker count.
+
+Usage: python benchmarks/bench_normalize.py [--recipes 100000] [--workers 1 2 4 N] [--chunk-size 5000]
+
+Normalizes (clean -> normalize -> parse) a synthetic catalogue with
+catalogue.normalize_bulk for each worker count and prints recipes/second.
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from catalogue import IMPORT_BATCH_SIZE, normalize_bulk
+from synthetic import synthetic_catalogue
+import utils
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--recipes", type=int, default=100_000)
+    parser.add_argument("--workers", type=int, nargs="+", default=sorted({1, 2, 4, os.cpu_count() or 1}))
+    parser.add_argument("--chunk-size", type=int, default=IMPORT_BATCH_SIZE)
+    args = parser.parse_args()
+
+    cells = synthetic_catalogue(args.recipes)["Ingredients"].tolist()
+    print(f"{len(cells):,} recipes, chunk size {args.chunk_size:,}, {os.cpu_count()} CPUs")
+
+    baseline = None
+    for workers in args.workers:
+        # Cold parse cache for every run so workers=1 is not flattered
+        utils.clear_parse_cache()
+        start = time.perf_counter()
+        normalize_bulk(cells, workers=workers, chunk_size=args.chunk_size)
+        elapsed = time.perf_counter() - start
+        baseline = baseline or elapsed
+        print(f"workers={workers:<3} {elapsed:7.2f}s  {len(cells) / elapsed:10,.0f} recipes/s  x{baseline / elapsed:.2f}")
+
+
+if __name__ == "__main__":
+    main()
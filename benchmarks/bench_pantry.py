@@ -0,0 +1,65 @@
+# benchmarks/bench_pantry.py
+"""
+Whole-catalogue "what can I make" check: per-recipe dict lookups vs Pantry.can_make_many.
+
+Usage: python benchmarks/bench_pantry.py [--recipes 100000] [--skus 5000] [--repeat 5]
+
+Builds a synthetic catalogue and a pantry with --skus entries, then times
+evaluating every recipe with compare_recipe_to_pantry against a plain dict
+and with one Pantry.can_make_many call, and checks both agree.
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from catalogue import build_ingredient_store, lines_by_recipe
+from pantry import Pantry, _compare, _requirements, pantry_totals
+from synthetic import synthetic_catalogue, synthetic_pantry
+
+
+def best_of(repeat, fn):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - start)
+    return min(times), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--recipes", type=int, default=100_000)
+    parser.add_argument("--skus", type=int, default=5_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    lines = lines_by_recipe(build_ingredient_store(synthetic_catalogue(args.recipes)))
+    plain = synthetic_pantry(args.skus)
+    pantry = Pantry(plain)
+    requirements = {rid: _requirements(recipe) for rid, recipe in lines.items()}
+    print(f"{len(lines):,} recipes, {len(plain):,} pantry entries")
+
+    def per_recipe():
+        totals = pantry_totals(plain)
+        return {rid: _compare(reqs, totals) for rid, reqs in requirements.items()}
+
+    start = time.perf_counter()
+    matrix = pantry.needs_matrix(lines)
+    print(f"compile matrix        {time.perf_counter() - start:8.3f}s  ({len(matrix.indices):,} lines, once per catalogue)")
+
+    loop_time, reference = best_of(args.repeat, per_recipe)
+    print(f"per-recipe dict loop  {loop_time:8.3f}s")
+    array_time, (can_make, matched) = best_of(args.repeat, lambda: pantry.can_make_many(matrix))
+    print(f"can_make_many         {array_time:8.3f}s  x{loop_time / array_time:.1f}")
+
+    for rid, ok, count in zip(matrix.recipe_ids.tolist(), can_make.tolist(), matched.tolist()):
+        missing, short, expected = reference[rid]
+        assert count == expected and ok == (not missing and not short), rid
+    print(f"{int(can_make.sum()):,} recipes can be made; results match")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+# benchmarks/bench_parse.py
+"""
+Micro-benchmark for utils.parse_ingredient on the bundled workbook.
+
+Usage: python benchmarks/bench_parse.py [path/to/workbook.xlsx] [--repeat N]
+
+Reports lines/second with the cache cleared before every pass (only lines
+repeated within the workbook hit) and with a warm cache.
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import pandas as pd
+
+import utils
+
+DEFAULT_WORKBOOK = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Copy of cooking.xlsx")
+
+
+def load_lines(path):
+    df = pd.read_excel(path)
+    lines = []
+    for cell in df["Ingredients"]:
+        lines.extend(utils.normalized_raw_lines(cell))
+    return lines
+
+
+def lines_per_second(lines, repeat, clear_cache):
+    clear = getattr(utils, "clear_parse_cache", None)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        if clear_cache and clear:
+            clear()
+        for line in lines:
+            utils.parse_ingredient(line)
+    elapsed = time.perf_counter() - start
+    return len(lines) * repeat / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("workbook", nargs="?", default=DEFAULT_WORKBOOK)
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+
+    lines = load_lines(args.workbook)
+    print(f"{len(lines)} ingredient lines ({len(set(lines))} distinct), {args.repeat} passes")
+    print(f"cold cache: {lines_per_second(lines, args.repeat, clear_cache=True):,.0f} lines/s")
+    print(f"warm cache: {lines_per_second(lines, args.repeat, clear_cache=False):,.0f} lines/s")
+    if hasattr(utils, "parse_cache_stats"):
+        print("cache stats:", utils.parse_cache_stats())
+
+
+if __name__ == "__main__":
+    main()
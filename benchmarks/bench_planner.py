@@ -0,0 +1,94 @@
+# benchmarks/bench_planner.py
+"""
+Benchmark the batch meal planner (planner.plan_meals).
+
+Usage: python benchmarks/bench_planner.py [--recipes 10000] [--skus 200] [--plan 5,10,20]
+                                          [--budget 1.0] [--repeat 5]
+
+Plans are made for a synthetic catalogue and pantry and checked against an
+eager greedy that re-scores every recipe after each pick; both must choose
+the same recipes. Reports the planning time, how many recipe scores the
+lazy evaluation needed and whether the plan fit in --budget seconds.
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import numpy as np
+
+from catalogue import build_ingredient_store, lines_by_recipe
+from pantry import Pantry, matrix_from_store
+from planner import SHOPPING_PENALTY, _Scorer, plan_meals
+from synthetic import ITEMS, synthetic_catalogue, synthetic_pantry
+
+
+def eager_plan(pantry, matrix, lines, n, weights):
+    """Reference greedy: re-score every recipe against the depleted stock before each pick."""
+    keys = [None] * len(pantry.columns)
+    for key, col in pantry.columns.items():
+        keys[col] = key
+    scratch = Pantry(pantry.copy())
+    remap = np.array([scratch.column(*key) for key in keys], dtype=np.intp)
+    totals = scratch.totals()[remap]
+    scorer = _Scorer(keys, totals, weights, SHOPPING_PENALTY)
+    rows = np.repeat(np.arange(len(matrix)), matrix.lengths)
+    used, _ = scorer.lines(totals, matrix.indices, matrix.data)
+    eligible = np.bincount(rows, weights=used, minlength=len(matrix)) > 0
+
+    picks = []
+    for _ in range(n):
+        _, score = scorer.lines(totals, matrix.indices, matrix.data)
+        scores = np.bincount(rows, weights=score, minlength=len(matrix))
+        scores[~eligible] = -np.inf
+        scores[picks] = -np.inf
+        row = int(np.argmax(scores))
+        if scores[row] == -np.inf:
+            break
+        picks.append(row)
+        scratch.deduct(lines.get(int(matrix.recipe_ids[row]), []))
+        totals = scratch.totals()[remap]
+    return [int(matrix.recipe_ids[row]) for row in picks]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--recipes", type=int, default=10_000)
+    parser.add_argument("--skus", type=int, default=200)
+    parser.add_argument("--plan", default="5,10,20")
+    parser.add_argument("--budget", type=float, default=1.0)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    recipes = synthetic_catalogue(args.recipes)
+    store = build_ingredient_store(recipes)
+    lines = lines_by_recipe(store)
+    pantry = Pantry(synthetic_pantry(args.skus))
+    start = time.perf_counter()
+    matrix = matrix_from_store(pantry, store, len(recipes))
+    print(f"{args.recipes:,} recipes, {len(pantry)} pantry entries; "
+          f"matrix compiled in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    weights = {item: 3.0 for item in ITEMS[:5]}
+    for n in (int(s) for s in args.plan.split(",")):
+        times = []
+        for _ in range(args.repeat):
+            plan = plan_meals(pantry, matrix, lines, n, weights, time_budget=args.budget)
+            times.append(plan.elapsed)
+        start = time.perf_counter()
+        reference = eager_plan(pantry, matrix, lines, n, weights)
+        eager = time.perf_counter() - start
+        same = plan.recipe_ids() == reference
+        print(f"plan {n:>3}: {statistics.median(times) * 1000:8.2f} ms "
+              f"({plan.evaluated:,} scores, {'within' if plan.complete else 'OVER'} {args.budget:g}s budget)  "
+              f"eager {eager * 1000:8.2f} ms  {'same picks' if same else 'DIFFERENT picks'}")
+        if not same:
+            print("  lazy: ", plan.recipe_ids())
+            print("  eager:", reference)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+# benchmarks/bench_startup.py
+"""
+Cold-start time per page.
+
+Usage: python benchmarks/bench_startup.py [--runs 5]
+
+Each run starts a fresh interpreter with streamlit already imported (as
+in a running server), then times the page's first execution through
+streamlit's AppTest harness.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+PAGES = [
+    "recipe_app_v4_2.py",
+    "pages/Smart_Pantry_v1.py",
+    "pages/Use_Up_Ingredients.py",
+    "pages/Use_Up_Ingredients2.py",
+]
+
+PROBE = """
+import sys, time
+sys.path.insert(0, {root!r})
+from streamlit.testing.v1 import AppTest
+app = AppTest.from_file({page!r}, default_timeout=120)
+start = time.perf_counter()
+app.run()
+print(time.perf_counter() - start)
+"""
+
+
+def cold_start(page):
+    probe = PROBE.format(root=os.path.abspath(ROOT), page=os.path.abspath(os.path.join(ROOT, page)))
+    out = subprocess.run([sys.executable, "-c", probe], capture_output=True, text=True, check=True, cwd=ROOT)
+    return float(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    for page in PAGES:
+        times = [cold_start(page) for _ in range(args.runs)]
+        print(f"{page:<32} median {statistics.median(times) * 1000:7.1f} ms  (min {min(times) * 1000:.1f} ms)")
+
+
+if __name__ == "__main__":
+    main()
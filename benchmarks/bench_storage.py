@@ -0,0 +1,51 @@
+# benchmarks/bench_storage.py
+"""
+SQLite backend: bulk import, reload and pantry save.
+
+Usage: python benchmarks/bench_storage.py [--recipes 100000] [--skus 500] [--db /tmp/bench_recipes.db]
+
+Writes a synthetic catalogue with storage.replace_catalogue, reloads it,
+then saves a synthetic pantry.
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import storage
+from synthetic import synthetic_pantry, synthetic_store
+
+
+def timed(label, fn):
+    start = time.perf_counter()
+    result = fn()
+    print(f"{label:<32} {time.perf_counter() - start:8.3f}s")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--recipes", type=int, default=100_000)
+    parser.add_argument("--skus", type=int, default=500)
+    parser.add_argument("--db", default="/tmp/bench_recipes.db")
+    args = parser.parse_args()
+
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(args.db + suffix):
+            os.remove(args.db + suffix)
+    conn = storage.connect(args.db)
+
+    store = synthetic_store(args.recipes)
+    recipes = store.groupby("recipe_id")["raw"].agg(list).reset_index(drop=True).to_frame("Ingredients")
+    recipes.insert(0, "Recipe Name", [f"Recipe {i}" for i in range(len(recipes))])
+    print(f"{len(recipes):,} recipes, {len(store):,} lines")
+
+    timed("replace_catalogue (executemany)", lambda: storage.replace_catalogue(recipes, store, conn=conn))
+    timed("load_catalogue_db", lambda: storage.load_catalogue_db(conn))
+    timed("save_pantry", lambda: storage.save_pantry(synthetic_pantry(args.skus), conn=conn))
+
+
+if __name__ == "__main__":
+    main()
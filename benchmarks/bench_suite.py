@@ -0,0 +1,177 @@
+# benchmarks/bench_suite.py
+"""
+Benchmark suite over the ingestion, search, shopping-list and pantry hot paths.
+
+Usage: python benchmarks/bench_suite.py [--scales 1000,10000] [--repeat 5]
+                                         [--output results.json] [--baseline old.json]
+
+For each scale a noisy synthetic catalogue is generated (unicode fractions,
+mixed numbers, plurals, notes, mixed separators) and every benchmark is run
+`repeat` times. Results are printed and, with --output, written as JSON.
+With --baseline, each benchmark's fastest run is compared to a previous
+results file (the minimum is far less noisy than the median) and the
+script exits with status 1 when any got slower than --tolerance.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import numpy as np
+import pandas as pd
+import rapidfuzz
+
+import utils
+from catalogue import build_ingredient_store, lines_by_recipe
+from pantry import Pantry, compare_recipe_to_pantry
+from search import IngredientIndex, search_recipes
+from shopping import ShoppingList
+from synthetic import synthetic_catalogue, synthetic_pantry
+
+QUERIES = [["eggs"], ["flour", "sugar", "butter"], ["chicken breast", "soy sauce", "rice", "garlic"]]
+PANTRY_SKUS = 200
+# Recipes added to one shopping list per pass
+SHOPPING_RECIPES = 500
+
+
+def _time(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_scale(n_recipes):
+    """Yield (name, items_per_call, fn) for one catalogue size."""
+    recipes = synthetic_catalogue(n_recipes, noisy=True)
+    cells = recipes["Ingredients"].tolist()
+    cleaned = [utils.clean_ingredient_text(cell) for cell in cells]
+    lines = [line for text in cleaned for line in text.split("\n")]
+    normalized = [utils.normalize_ingredient_line(line) for line in lines]
+    recipes["Ingredients"] = [
+        [utils.normalize_ingredient_line(line) for line in text.split("\n")] for text in cleaned
+    ]
+
+    def parse_cold():
+        utils.clear_parse_cache()
+        for line in normalized:
+            utils.parse_ingredient(line)
+
+    yield "clean_ingredient_text", len(cells), lambda: [utils.clean_ingredient_text(c) for c in cells]
+    yield "normalize_ingredient_line", len(lines), lambda: [utils.normalize_ingredient_line(l) for l in lines]
+    yield "parse_ingredient (cold cache)", len(normalized), parse_cold
+    yield "parse_ingredient (warm cache)", len(normalized), lambda: [utils.parse_ingredient(l) for l in normalized]
+
+    store = build_ingredient_store(recipes)
+    parsed = list(lines_by_recipe(store).values())
+    index = IngredientIndex(recipes)
+    yield "IngredientIndex build", n_recipes, lambda: IngredientIndex(recipes)
+    for terms in QUERIES:
+        yield (
+            f"search_recipes [{', '.join(terms)}]", n_recipes,
+            lambda terms=terms: search_recipes(None, terms, threshold=85, min_percentage=0.5, index=index),
+        )
+
+    def shopping():
+        shopping_list = ShoppingList()
+        for recipe_lines in parsed[:SHOPPING_RECIPES]:
+            shopping_list.add_lines(recipe_lines)
+        shopping_list.consolidated()
+
+    yield "ShoppingList add + consolidate", min(SHOPPING_RECIPES, len(parsed)), shopping
+
+    pantry = synthetic_pantry(PANTRY_SKUS)
+    vector_pantry = Pantry(pantry)
+    yield "compare_recipe_to_pantry (dict)", len(parsed), lambda: [compare_recipe_to_pantry(p, pantry) for p in parsed]
+    yield "compare_recipe_to_pantry (Pantry)", len(parsed), lambda: [vector_pantry.shortfall(p) for p in parsed]
+
+
+def compare(results, baseline, tolerance):
+    """Print min-time ratios against a baseline; return the regressed benchmark keys."""
+    before = {(r["name"], r["scale"]): r for r in baseline["results"]}
+    regressed = []
+    for r in results:
+        old = before.get((r["name"], r["scale"]))
+        if old is None:
+            continue
+        ratio = r["min_s"] / old["min_s"] if old["min_s"] else float("inf")
+        flag = "REGRESSION" if ratio > 1 + tolerance else ""
+        print(f"{r['name']:<42} {r['scale']:>8,}  x{ratio:5.2f}  {flag}")
+        if flag:
+            regressed.append((r["name"], r["scale"]))
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--scales", default="1000,10000")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output")
+    parser.add_argument("--baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="allowed slowdown of the fastest run before it counts as a regression")
+    args = parser.parse_args()
+
+    results = []
+    for scale in (int(s) for s in args.scales.split(",")):
+        print(f"--- {scale:,} recipes ---")
+        for name, items, fn in run_scale(scale):
+            times = _time(fn, args.repeat)
+            median = statistics.median(times)
+            results.append({
+                "name": name,
+                "scale": scale,
+                "items": items,
+                "repeat": args.repeat,
+                "median_s": median,
+                "min_s": min(times),
+                "max_s": max(times),
+                "items_per_s": items / median if median else None,
+            })
+            print(f"{name:<42} {median * 1000:10.2f} ms  {items / median if median else 0:>14,.0f} /s")
+
+    report = {
+        "meta": {
+            "commit": _git_commit(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "rapidfuzz": rapidfuzz.__version__,
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"wrote {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        print(f"--- against {args.baseline} ({baseline['meta'].get('commit')}) ---")
+        if compare(results, baseline, args.tolerance):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+# benchmarks/load_api.py
+"""
+Load test for the HTTP/JSON API (api.py).
+
+Usage: python benchmarks/load_api.py [--url http://127.0.0.1:8000] [--recipes 10000]
+                                     [--concurrency 16] [--duration 10]
+
+Without --url a synthetic catalogue is written to a temporary database and
+api.py is started against it on a free port. Client threads keep one
+connection each and send a mix of search, pantry check, cookable and
+shopping-list requests for --duration seconds; requests/second and
+latency percentiles are reported per endpoint and overall.
+"""
+import argparse
+import http.client
+import json
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from urllib.parse import urlsplit
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+from synthetic import ITEMS, synthetic_catalogue
+
+# (weight, name) of the request mix
+MIX = [(40, "search"), (30, "check"), (20, "cookable"), (10, "shopping")]
+
+
+def _percentile(ordered, pct):
+    return ordered[min(len(ordered) - 1, int(pct / 100 * len(ordered)))]
+
+
+def build_database(path, n_recipes):
+    from catalogue import build_ingredient_store
+    from storage import connect, replace_catalogue
+
+    recipes = synthetic_catalogue(n_recipes)
+    store = build_ingredient_store(recipes)
+    grouped = store.groupby("recipe_id")["raw"].agg(list)
+    recipes["Ingredients"] = [grouped.get(i, []) for i in range(len(recipes))]
+    conn = connect(path)
+    replace_catalogue(recipes, store, conn=conn)
+    with conn:
+        conn.executemany(
+            "INSERT INTO pantry (item, unit, quantity) VALUES (?, ?, ?)",
+            [("egg", "", 12), ("flour", "g", 1000), ("sugar", "g", 500), ("milk", "ml", 1000)],
+        )
+    conn.close()
+
+
+def start_server(db_path):
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    env = dict(os.environ, RECIPE_DB=db_path, RECIPE_CATALOGUE=db_path + ".arrow")
+    proc = subprocess.Popen([sys.executable, os.path.join(ROOT, "api.py"), "--port", str(port)], env=env, cwd=ROOT)
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.time() + 120
+    while time.time() < deadline:
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+            conn.request("GET", "/health")
+            if conn.getresponse().status == 200:
+                return proc, url
+        except OSError:
+            time.sleep(0.2)
+    proc.kill()
+    raise RuntimeError("API server did not start")
+
+
+def make_request(rng, n_recipes):
+    kind = rng.choices([name for _, name in MIX], weights=[w for w, _ in MIX])[0]
+    if kind == "search":
+        terms = rng.sample(ITEMS, rng.randint(1, 3))
+        return kind, "POST", "/search", {"terms": terms, "threshold": 85, "min_percentage": 0.5}
+    if kind == "check":
+        return kind, "POST", "/pantry/check", {"recipe_id": rng.randrange(n_recipes)}
+    if kind == "cookable":
+        return kind, "GET", "/cookable?limit=20", None
+    return kind, "GET", "/shopping-list", None
+
+
+def client(url, n_recipes, stop_at, seed, latencies, errors):
+    parts = urlsplit(url)
+    conn = http.client.HTTPConnection(parts.hostname, parts.port, timeout=30)
+    rng = random.Random(seed)
+    while time.perf_counter() < stop_at:
+        kind, method, path, body = make_request(rng, n_recipes)
+        payload = json.dumps(body) if body is not None else None
+        headers = {"Content-Type": "application/json"} if body is not None else {}
+        start = time.perf_counter()
+        try:
+            conn.request(method, path, payload, headers)
+            response = conn.getresponse()
+            response.read()
+            ok = response.status == 200
+        except (OSError, http.client.HTTPException):
+            ok = False
+            conn.close()
+            conn = http.client.HTTPConnection(parts.hostname, parts.port, timeout=30)
+        elapsed = time.perf_counter() - start
+        if ok:
+            latencies[kind].append(elapsed)
+        else:
+            errors[kind] += 1
+
+
+def report(name, samples, duration):
+    ordered = sorted(samples)
+    print(f"{name:<10} {len(ordered):>8,} req {len(ordered) / duration:9.1f} req/s   "
+          f"p50 {_percentile(ordered, 50) * 1000:7.2f} ms  p90 {_percentile(ordered, 90) * 1000:7.2f} ms  "
+          f"p99 {_percentile(ordered, 99) * 1000:7.2f} ms  mean {statistics.mean(ordered) * 1000:7.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--url")
+    parser.add_argument("--recipes", type=int, default=10_000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=10.0)
+    args = parser.parse_args()
+
+    proc = None
+    tmp = None
+    url = args.url
+    if url is None:
+        tmp = tempfile.TemporaryDirectory()
+        db_path = os.path.join(tmp.name, "load.db")
+        build_database(db_path, args.recipes)
+        proc, url = start_server(db_path)
+
+    try:
+        parts = urlsplit(url)
+        conn = http.client.HTTPConnection(parts.hostname, parts.port, timeout=30)
+        conn.request("GET", "/health")
+        n_recipes = json.loads(conn.getresponse().read())["recipes"]
+        print(f"{url}: {n_recipes:,} recipes, {args.concurrency} clients, {args.duration:.0f}s")
+
+        latencies = defaultdict(list)
+        errors = defaultdict(int)
+        stop_at = time.perf_counter() + args.duration
+        threads = [
+            threading.Thread(target=client, args=(url, n_recipes, stop_at, seed, latencies, errors))
+            for seed in range(args.concurrency)
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        for _, name in MIX:
+            if latencies[name]:
+                report(name, latencies[name], args.duration)
+        report("all", [s for samples in latencies.values() for s in samples], args.duration)
+        if errors:
+            print("errors:", dict(errors))
+    finally:
+        if proc:
+            proc.terminate()
+            proc.wait()
+        if tmp:
+            tmp.cleanup()
+
+
+if __name__ == "__main__":
+    main()
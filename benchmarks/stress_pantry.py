@@ -0,0 +1,101 @@
+# benchmarks/stress_pantry.py
+"""
+Stress test for concurrent Pantry.cook() transactions.
+
+Usage: python benchmarks/stress_pantry.py [--items 50] [--stock 40000] [--cooks 20000]
+                                          [--workers 16] [--lines 4] [--unsafe]
+
+A pantry of --items ingredients (--stock g each) is shared by a thread pool
+that cooks --cooks random recipes of --lines ingredients. The thread switch
+interval is made tiny so transactions interleave as much as possible.
+Afterwards every item's stock must equal the starting stock minus what the
+successful cooks used, and never be negative; the script exits with status
+1 when it doesn't. --unsafe runs the old check-then-deduct sequence instead,
+which over-deducts once two cooks race for the last of an item.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from pantry import Pantry, pantry_key
+
+UNIT = "g"
+
+
+def make_recipes(n, items, lines, seed=0):
+    """n recipes as [(raw, qty, unit, item)], each using `lines` distinct items."""
+    rng = random.Random(seed)
+    recipes = []
+    for _ in range(n):
+        picked = rng.sample(items, lines)
+        recipes.append([(f"{qty} {UNIT} {item}", qty, UNIT, item) for item, qty in
+                        ((item, rng.randint(1, 50)) for item in picked)])
+    return recipes
+
+
+def unsafe_cook(pantry, parsed_lines):
+    """The check-then-deduct sequence cook() replaces."""
+    missing, short, _ = pantry.shortfall(parsed_lines)
+    if missing or short:
+        return False, missing, short
+    pantry.deduct(parsed_lines)
+    return True, [], []
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--items", type=int, default=50)
+    parser.add_argument("--stock", type=float, default=40_000.0)
+    parser.add_argument("--cooks", type=int, default=20_000)
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--lines", type=int, default=4)
+    parser.add_argument("--unsafe", action="store_true", help="check-then-deduct instead of cook()")
+    args = parser.parse_args()
+
+    items = [f"ingredient {i}" for i in range(args.items)]
+    keys = {item: pantry_key(item, UNIT) for item in items}
+    pantry = Pantry({key: args.stock for key in keys.values()})
+    recipes = make_recipes(args.cooks, items, min(args.lines, args.items))
+    cook = (lambda lines: unsafe_cook(pantry, lines)) if args.unsafe else pantry.cook
+
+    sys.setswitchinterval(1e-6)
+    start = time.perf_counter()
+    with ThreadPoolExecutor(args.workers) as pool:
+        outcomes = list(pool.map(cook, recipes))
+    elapsed = time.perf_counter() - start
+    sys.setswitchinterval(0.005)
+
+    used = defaultdict(float)
+    cooked = 0
+    for lines, (ok, _, _) in zip(recipes, outcomes):
+        if ok:
+            cooked += 1
+            for _, qty, _, item in lines:
+                used[item] += qty
+
+    errors = 0
+    for item, key in keys.items():
+        expected = args.stock - used[item]
+        have = pantry[key]
+        if have < 0 or abs(have - expected) > 1e-6 * args.stock:
+            errors += 1
+            if errors <= 10:
+                print(f"  {item}: stock {have:g}, expected {expected:g}")
+
+    print(f"{'unsafe' if args.unsafe else 'cook()'}: {args.cooks:,} cooks on {args.workers} threads "
+          f"in {elapsed:.2f}s ({args.cooks / elapsed:,.0f}/s), {cooked:,} cooked, "
+          f"{pantry.conflicts:,} retried")
+    if errors:
+        print(f"FAIL: {errors} of {args.items} items don't add up")
+        sys.exit(1)
+    print("OK: every item's stock matches the cooks that succeeded")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+# benchmarks/synthetic.py
+"""Synthetic recipe catalogues for benchmarks."""
+import random
+
+import numpy as np
+import pandas as pd
+
+AMOUNTS = ["1", "2", "3", "4", "10", "250", "500", "1/2", "1/4", "3/4", "1 1/2", "2 1/4",
+           "½", "¼", "¾", "⅓", "1½", "2 ¾", "0.5", "1.25", "500-600"]
+UNITS = ["g", "kg", "grams", "ml", "l", "tsp", "tbsp", "teaspoons", "tablespoons",
+         "cup", "cups", "x", ""]
+ITEMS = ["eggs", "banana", "bananas", "tomatoes", "potatoes", "berries", "cloves garlic",
+         "flour", "sugar", "brown sugar", "salt", "black pepper", "olive oil", "butter",
+         "milk", "greek yogurt", "honey", "oats", "rice", "chicken breast", "chicken thighs",
+         "onions", "carrots", "peppers", "cheeses", "soy sauce", "rice vinegar", "leaves basil",
+         "chili flakes", "sesame seeds", "spring onions", "peanut butter", "blueberries",
+         "strawberries", "lemons", "limes", "avocados", "spinach", "pasta", "panko"]
+UNQUANTIFIED = ["salt", "pepper", "vanilla", "spray oil", "parsley", "garlic powder"]
+
+
+def ingredient_line(rng):
+    if rng.random() < 0.15:
+        return rng.choice(UNQUANTIFIED)
+    unit = rng.choice(UNITS)
+    parts = [rng.choice(AMOUNTS), unit, rng.choice(ITEMS)]
+    return " ".join(p for p in parts if p)
+
+
+# Notes and noise seen in hand-typed workbook cells
+NOTES = ["", "", "", " (optional)", " to taste", " chopped", " finely sliced", " (room temperature)"]
+SEPARATORS = [", ", ", ", "\n", "\r\n", ",\n", " ,", ",\xa0"]
+INVISIBLE = ["", "", "", "\u200b", "\xa0", "\u2028"]
+
+
+def noisy_line(rng):
+    """ingredient_line with notes, odd casing and stray punctuation or spacing."""
+    line = ingredient_line(rng) + rng.choice(NOTES)
+    if rng.random() < 0.2:
+        line = line.capitalize()
+    elif rng.random() < 0.05:
+        line = line.upper()
+    if rng.random() < 0.1:
+        line += rng.choice([".", " .", "  "])
+    return rng.choice(INVISIBLE) + line
+
+
+def ingredients_cell(rng, n_lines, noisy=False):
+    """Raw "Ingredients" cell text with n_lines lines."""
+    if not noisy:
+        return ", ".join(ingredient_line(rng) for _ in range(n_lines))
+    return "".join(
+        (rng.choice(SEPARATORS) if i else "") + noisy_line(rng) for i in range(n_lines)
+    )
+
+
+def synthetic_catalogue(n_recipes, seed=0, min_lines=3, max_lines=14, noisy=False):
+    """
+    DataFrame shaped like an uploaded workbook: "Recipe Name", raw
+    comma-separated "Ingredients" text and "Servings". With noisy=True the
+    cells mix separators and carry notes, odd casing and invisible
+    characters, like hand-typed spreadsheets.
+    """
+    rng = random.Random(seed)
+    return pd.DataFrame({
+        "Recipe Name": [f"Recipe {i}" for i in range(n_recipes)],
+        "Ingredients": [
+            ingredients_cell(rng, rng.randint(min_lines, max_lines), noisy) for _ in range(n_recipes)
+        ],
+        "Servings": [rng.randint(1, 6) for _ in range(n_recipes)],
+    })
+
+
+
+def synthetic_store(n_recipes, seed=0, min_lines=3, max_lines=14, pool_size=5000):
+    """
+    Parsed long-format ingredient store (catalogue.STORE_COLUMNS) for
+    n_recipes, sampled from a pool of parsed lines so millions of recipes
+    can be generated without parsing every line.
+    """
+    from catalogue import STORE_COLUMNS
+    from utils import parse_ingredient
+
+    rng = random.Random(seed)
+    pool = []
+    for _ in range(pool_size):
+        raw = ingredient_line(rng)
+        pool.append((raw, *parse_ingredient(raw)))
+    raws, qtys, units, items = (np.array(col, dtype=object) for col in zip(*pool))
+
+    np_rng = np.random.default_rng(seed)
+    lengths = np_rng.integers(min_lines, max_lines + 1, size=n_recipes)
+    picks = np_rng.integers(0, pool_size, size=int(lengths.sum()))
+    return pd.DataFrame({
+        "recipe_id": np.repeat(np.arange(n_recipes), lengths),
+        "raw": raws[picks],
+        "quantity": pd.array(qtys[picks], dtype="Float64").to_numpy(dtype=float, na_value=np.nan),
+        "unit": units[picks],
+        "item": items[picks],
+    }, columns=STORE_COLUMNS)
+
+
+
+def synthetic_pantry(n_skus, seed=0):
+    """{(item, unit): qty} covering the synthetic ITEMS plus filler SKUs."""
+    from pantry import pantry_key
+    from utils import UNIT_MAP
+
+    rng = random.Random(seed)
+    units = sorted({UNIT_MAP.get(u, (None, 1))[0] or "" for u in UNITS}) + [""]
+    pantry = {}
+    for i in range(n_skus):
+        item = ITEMS[i] if i < len(ITEMS) else f"sku {i}"
+        pantry[pantry_key(item, rng.choice(units))] = rng.choice([1, 2, 5, 250, 1000])
+    return pantry
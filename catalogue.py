@@ -0,0 +1,489 @@
+# catalogue.py
+import csv
+import io
+import itertools
+import json
+import os
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from profiling import instrumented
+from utils import clean_ingredient_text, normalize_ingredient_line, normalized_raw_lines, parse_ingredient
+
+# Long-format store: one row per ingredient line, parsed once at upload time
+STORE_COLUMNS = ["recipe_id", "raw", "quantity", "unit", "item"]
+
+
+@instrumented()
+def build_ingredient_store(recipes, first_id=0):
+    """
+    Parse every ingredient line of `recipes` once.
+    recipe_id is the recipe's row position in the catalogue (offset by first_id).
+    """
+    rows = []
+    if recipes is not None and "Ingredients" in recipes:
+        for recipe_id, cell in enumerate(recipes["Ingredients"], start=first_id):
+            for raw in normalized_raw_lines(cell):
+                qty, unit, item = parse_ingredient(raw)
+                rows.append((recipe_id, raw, qty, unit, item))
+    return pd.DataFrame(rows, columns=STORE_COLUMNS)
+
+
+def append_to_store(store, recipes, first_id):
+    """Parse only the newly added recipes and append them to the store."""
+    added = build_ingredient_store(recipes, first_id=first_id)
+    if store is None or store.empty:
+        return added
+    return pd.concat([store, added], ignore_index=True)
+
+
+def lines_by_recipe(store):
+    """
+    Group the store into {recipe_id: [(raw, quantity, unit, item), ...]}.
+    Quantities are plain floats, or None when the line had no amount.
+    """
+    grouped = {}
+    if store is None or store.empty:
+        return grouped
+    quantities = store["quantity"].astype(object).where(store["quantity"].notna(), None)
+    units = store["unit"].astype(object).where(store["unit"].notna(), None)
+    for recipe_id, raw, qty, unit, item in zip(
+        store["recipe_id"].tolist(), store["raw"].tolist(), quantities.tolist(),
+        units.tolist(), store["item"].tolist()
+    ):
+        grouped.setdefault(recipe_id, []).append((raw, qty, unit, item))
+    return grouped
+
+
+# --- Binary catalogue file (Arrow IPC, memory-mapped on load) ---
+# One row per recipe: the recipe's own columns, its Ingredients list, and
+# its pre-parsed lines so loading never has to clean or parse again.
+CATALOGUE_PATH = os.environ.get("RECIPE_CATALOGUE", "recipes.arrow")
+
+
+def _line_type():
+    import pyarrow as pa
+
+    return pa.list_(pa.struct([
+        ("raw", pa.string()),
+        ("quantity", pa.float64()),
+        ("unit", pa.string()),
+        ("item", pa.string()),
+    ]))
+
+
+def catalogue_table(recipes, store):
+    """Build the Arrow table written by save_catalogue."""
+    import pyarrow as pa
+
+    grouped = lines_by_recipe(store)
+    other = recipes.drop(columns=["Ingredients"])
+    # Spreadsheet columns can mix numbers and text ("2 or 3" servings); keep those as text
+    for col in other.columns[other.dtypes == object]:
+        other[col] = other[col].map(lambda v: None if pd.isna(v) else str(v))
+    table = pa.Table.from_pandas(other, preserve_index=False)
+    ingredients = pa.array(
+        [list(cell) if isinstance(cell, list) else normalized_raw_lines(cell) for cell in recipes["Ingredients"]],
+        type=pa.list_(pa.string()),
+    )
+    lines = pa.array(
+        [
+            [{"raw": raw, "quantity": qty, "unit": unit, "item": item}
+             for raw, qty, unit, item in grouped.get(recipe_id, [])]
+            for recipe_id in range(len(recipes))
+        ],
+        type=_line_type(),
+    )
+    position = list(recipes.columns).index("Ingredients")
+    table = table.add_column(position, "Ingredients", ingredients)
+    return table.append_column("Lines", lines)
+
+
+@instrumented()
+def save_catalogue(recipes, store, path=CATALOGUE_PATH, revision=None):
+    """
+    Write the normalized, pre-parsed catalogue to an Arrow IPC file. `revision`
+    is the database catalogue revision it matches (see saved_revision()).
+    """
+    import pyarrow as pa
+
+    table = catalogue_table(recipes, store)
+    if revision is not None:
+        table = table.replace_schema_metadata({**(table.schema.metadata or {}), b"revision": revision.encode()})
+    tmp_path = f"{path}.tmp"
+    with pa.OSFile(tmp_path, "wb") as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    os.replace(tmp_path, path)
+
+
+def saved_revision(path=CATALOGUE_PATH):
+    """The database revision an Arrow catalogue was saved at, read from its schema only."""
+    import pyarrow as pa
+
+    with pa.memory_map(path, "r") as stream:
+        metadata = pa.ipc.open_file(stream).schema.metadata or {}
+    revision = metadata.get(b"revision")
+    return revision.decode() if revision else None
+
+
+@instrumented()
+def load_catalogue(source=CATALOGUE_PATH):
+    """
+    Load (recipes, ingredient_store) from an Arrow IPC catalogue.
+    `source` is a file path (memory-mapped) or the file's bytes.
+    """
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    if isinstance(source, (bytes, bytearray)):
+        stream = pa.BufferReader(source)
+    else:
+        stream = pa.memory_map(source, "r")
+
+    with stream:
+        table = pa.ipc.open_file(stream).read_all()
+
+        lines = table.column("Lines").combine_chunks()
+        flat = lines.flatten()
+        store = pd.DataFrame({
+            "recipe_id": pc.list_parent_indices(lines).to_numpy(),
+            "raw": flat.field("raw").to_pylist(),
+            "quantity": flat.field("quantity").to_numpy(zero_copy_only=False),
+            "unit": flat.field("unit").to_pylist(),
+            "item": flat.field("item").to_pylist(),
+        }, columns=STORE_COLUMNS)
+
+        recipes = table.drop_columns(["Lines"]).to_pandas()
+        recipes["Ingredients"] = table.column("Ingredients").to_pylist()
+
+    return recipes, store
+
+
+# --- Streaming importer for large workbooks, CSV and JSONL ---
+# Rows are cleaned, normalized and parsed as they are read and appended to
+# the catalogue in batches of this many recipes.
+IMPORT_BATCH_SIZE = 5000
+
+# Worker processes used to normalize/parse batches (1 = in-process)
+IMPORT_WORKERS = int(os.environ.get("RECIPE_IMPORT_WORKERS", "1"))
+
+IMPORT_TYPES = ["xlsx", "csv", "jsonl"]
+
+
+def normalize_ingredients_cell(cell):
+    """
+    Raw spreadsheet cell -> list of cleaned, normalized ingredient lines.
+    A list cell (the usual JSONL shape) is cleaned element by element.
+    """
+    parts = cell if isinstance(cell, (list, tuple)) else [cell]
+    lines = []
+    for part in parts:
+        text = "" if part is None else str(part)
+        lines.extend(normalize_ingredient_line(line) for line in clean_ingredient_text(text).split("\n") if line)
+    return lines
+
+
+def _iter_xlsx(stream):
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(stream, read_only=True, data_only=True)
+    try:
+        sheet = workbook.active
+        rows = sheet.iter_rows(values_only=True)
+        header = [str(h) if h is not None else f"Column {i}" for i, h in enumerate(next(rows, ()))]
+        total = (sheet.max_row - 1) if sheet.max_row else None
+        for done, values in enumerate(rows, start=1):
+            if any(v is not None for v in values):
+                yield dict(zip(header, values)), (done / total if total else None)
+    finally:
+        workbook.close()
+
+
+def _iter_text(stream, parse_rows):
+    raw = stream if hasattr(stream, "seek") else io.BytesIO(stream.read())
+    size = raw.seek(0, io.SEEK_END)
+    raw.seek(0)
+    text = io.TextIOWrapper(raw, encoding="utf-8-sig", newline="")
+    try:
+        for row in parse_rows(text):
+            yield row, (raw.tell() / size if size else None)
+    finally:
+        text.detach()
+
+
+def _csv_rows(text):
+    return csv.DictReader(text)
+
+
+def _jsonl_rows(text):
+    for line in text:
+        if line.strip():
+            yield json.loads(line)
+
+
+def iter_recipe_rows(stream, name):
+    """Yield (row_dict, fraction_done) from an .xlsx, .csv or .jsonl file object."""
+    ext = os.path.splitext(name)[1].lower()
+    if ext == ".xlsx":
+        return _iter_xlsx(stream)
+    if ext == ".csv":
+        return _iter_text(stream, _csv_rows)
+    if ext in (".jsonl", ".ndjson"):
+        return _iter_text(stream, _jsonl_rows)
+    raise ValueError(f"Unsupported recipe file type: {name}")
+
+
+def normalize_chunk(cells):
+    """
+    Clean, normalize and parse a shard of Ingredients cells.
+    Returns [(lines, [(raw, qty, unit, item), ...]), ...] in input order.
+    Runs in worker processes, so it only touches its arguments.
+    """
+    out = []
+    for cell in cells:
+        lines = normalize_ingredients_cell(cell)
+        parsed = [(raw, *parse_ingredient(raw)) for raw in normalized_raw_lines(lines)]
+        out.append((lines, parsed))
+    return out
+
+
+def normalize_bulk(cells, workers=IMPORT_WORKERS, chunk_size=IMPORT_BATCH_SIZE):
+    """normalize_chunk over many cells, sharded across `workers` processes."""
+    cells = list(cells)
+    if workers <= 1 or len(cells) <= chunk_size:
+        return normalize_chunk(cells)
+    shards = [cells[i:i + chunk_size] for i in range(0, len(cells), chunk_size)]
+    out = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for part in pool.map(normalize_chunk, shards):
+            out.extend(part)
+    return out
+
+
+def _store_rows(normalized, first_id):
+    return [
+        (recipe_id, raw, qty, unit, item)
+        for recipe_id, (_, parsed) in enumerate(normalized, start=first_id)
+        for raw, qty, unit, item in parsed
+    ]
+
+
+@instrumented()
+def stream_import(stream, name, batch_size=IMPORT_BATCH_SIZE, progress=None, workers=IMPORT_WORKERS):
+    """
+    Import recipes row by row without loading the whole file into a DataFrame.
+    With workers > 1 each batch is normalized in a process pool while the
+    next one is read; batches are merged back in file order.
+    progress(recipes_done, fraction_done_or_None) is called after every batch.
+    Returns (recipes, ingredient_store).
+    """
+    recipe_batches = []
+    store_batches = []
+    pending = deque()
+    batch = []
+    done = 0
+    fraction = None
+    pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+
+    def collect():
+        nonlocal done
+        rows, normalized, at = pending.popleft()
+        if pool:
+            normalized = normalized.result()
+        for row, (lines, _) in zip(rows, normalized):
+            row["Ingredients"] = lines
+        recipe_batches.append(pd.DataFrame(rows))
+        store_batches.append(pd.DataFrame(_store_rows(normalized, done), columns=STORE_COLUMNS))
+        done += len(rows)
+        if progress:
+            progress(done, at)
+
+    def flush():
+        cells = [row.get("Ingredients") for row in batch]
+        normalized = pool.submit(normalize_chunk, cells) if pool else normalize_chunk(cells)
+        pending.append((list(batch), normalized, fraction))
+        batch.clear()
+        # Keep a bounded number of batches in flight
+        while len(pending) > (2 * workers if pool else 0):
+            collect()
+
+    try:
+        for row, fraction in iter_recipe_rows(stream, name):
+            batch.append(row)
+            if len(batch) >= batch_size:
+                flush()
+        if batch:
+            flush()
+        while pending:
+            collect()
+    finally:
+        if pool:
+            pool.shutdown(cancel_futures=True)
+
+    if not recipe_batches:
+        return pd.DataFrame(), build_ingredient_store(None)
+    recipes = pd.concat(recipe_batches, ignore_index=True)
+    store = pd.concat(store_batches, ignore_index=True)
+    return recipes, store
+
+
+
+# --- Process-wide shared catalogue ---
+# Every browser session reads the same snapshot; edits publish a new one
+# (copy-on-write), so sessions still holding the old snapshot are unaffected.
+_snapshot_versions = itertools.count(1)
+
+
+class CatalogueSnapshot:
+    """
+    One read-only version of the catalogue: the recipes DataFrame, its parsed
+    ingredient store, and structures derived from them (parsed lines, search
+    indexes, the search result cache, the recipe matrix), each built once on
+    first use.
+    """
+
+    def __init__(self, recipes, store, digest=None, revision=None):
+        self.version = next(_snapshot_versions)
+        self.recipes = recipes
+        self.store = store
+        self.digest = digest
+        self.revision = revision    # database revision it was stored at; None if not stored
+        self._derived = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.recipes)
+
+    @property
+    def empty(self):
+        return self.recipes.empty
+
+    def derived(self, name, build):
+        """build(self), computed once per snapshot and shared by every session."""
+        value = self._derived.get(name)
+        if value is None:
+            with self._lock:
+                value = self._derived.get(name)
+                if value is None:
+                    value = self._derived[name] = build(self)
+        return value
+
+    @property
+    def lines(self):
+        """{recipe_id: [(raw, quantity, unit, item), ...]}"""
+        return self.derived("lines", lambda c: lines_by_recipe(c.store))
+
+    @property
+    def index(self):
+        from search import IngredientIndex
+
+        return self.derived("index", lambda c: IngredientIndex(c.recipes))
+
+    @property
+    def text_index(self):
+        from search import TextIndex
+
+        return self.derived("text_index", lambda c: TextIndex(c.recipes))
+
+    @property
+    def search_cache(self):
+        from search import SearchCache
+
+        return self.derived("search_cache", lambda c: SearchCache())
+
+
+def _saved_catalogue():
+    """
+    (recipes, store, revision) of the saved catalogue, else empty.
+
+    The memory-mapped Arrow file is used when it was saved at the database's
+    current revision, which is much faster than decoding every row of the
+    database; otherwise the database is read. A catalogue found only in the
+    Arrow file is imported into the database (and the file re-stamped), so
+    recipes added later are appended to it rather than stored alone.
+    """
+    from storage import catalogue_revision, load_catalogue_db, replace_catalogue
+
+    revision = catalogue_revision()
+    saved = os.path.exists(CATALOGUE_PATH)
+    if saved and revision is not None and saved_revision(CATALOGUE_PATH) == revision:
+        return (*load_catalogue(CATALOGUE_PATH), revision)
+
+    recipes, store, revision = load_catalogue_db()
+    if recipes is None and saved:
+        recipes, store = load_catalogue(CATALOGUE_PATH)
+        revision = replace_catalogue(recipes, store)
+        save_catalogue(recipes, store, revision=revision)
+    if recipes is None:
+        recipes, store = pd.DataFrame(), build_ingredient_store(None)
+    return recipes, store, revision
+
+
+class SharedCatalogue:
+    """
+    Holds the current CatalogueSnapshot for the whole process. The saved
+    catalogue is loaded on first use; replace() and append() persist the
+    change and publish a new snapshot atomically.
+    """
+
+    def __init__(self, loader=_saved_catalogue):
+        self._loader = loader
+        self._current = None
+        self._lock = threading.Lock()
+
+    def current(self):
+        snapshot = self._current
+        if snapshot is None:
+            with self._lock:
+                if self._current is None:
+                    recipes, store, revision = self._loader()
+                    self._current = CatalogueSnapshot(recipes, store, revision=revision)
+                snapshot = self._current
+        return snapshot
+
+    def replace(self, recipes, store, digest=None, persist=True):
+        """Publish an uploaded catalogue in place of the current one."""
+        from storage import replace_catalogue
+
+        with self._lock:
+            revision = replace_catalogue(recipes, store) if persist else None
+            self._current = CatalogueSnapshot(recipes, store, digest, revision)
+            return self._current
+
+    def append(self, new_recipes, persist=True):
+        """Parse new_recipes, append them to a copy of the catalogue and publish it."""
+        from storage import append_recipes, recipe_count, replace_catalogue
+
+        self.current()
+        with self._lock:
+            base = self._current
+            first_id = len(base.recipes)
+            recipes = pd.concat([base.recipes, new_recipes], ignore_index=True)
+            store = append_to_store(base.store, new_recipes, first_id)
+            revision = None
+            if persist:
+                if recipe_count() == first_id:
+                    revision = append_recipes(new_recipes, store[store["recipe_id"] >= first_id], first_id)
+                else:
+                    # The database doesn't hold the catalogue being extended
+                    # (it was published with persist=False): store all of it
+                    revision = replace_catalogue(recipes, store)
+            self._current = CatalogueSnapshot(recipes, store, revision=revision)
+            return self._current
+
+
+SHARED_CATALOGUE = SharedCatalogue()
+
+
+def use_catalogue(state):
+    """
+    The current shared snapshot, recorded in `state` (st.session_state) so
+    per-session helpers know which catalogue version they were built for.
+    """
+    snapshot = SHARED_CATALOGUE.current()
+    state["catalogue"] = snapshot
+    return snapshot
\ No newline at end of file
@@ -0,0 +1,76 @@
+import streamlit as st
+
+from catalogue import use_catalogue
+from pantry import get_recipe_matrix, session_pantry
+from planner import PRIORITY_WEIGHT, SHOPPING_PENALTY, plan_meals
+from profiling import profiled_rerun, timed_loop
+from shopping import session_shopping_list
+from storage import save_shopping_list
+from utils import format_amount
+
+# -----------------------------
+# Page start
+# -----------------------------
+st.title("🗓️ Meal Planner")
+with profiled_rerun("Meal Planner"):
+    catalogue = use_catalogue(st.session_state)
+    if catalogue.empty:
+        st.info("No recipes loaded. Upload recipes on the main page first.")
+        st.stop()
+
+    pantry = session_pantry(st.session_state)
+    if not any(pantry.values()):
+        st.info("Your pantry is empty. Add ingredients on the Smart Pantry page first.")
+        st.stop()
+
+    df = catalogue.recipes
+
+    # -----------------------------
+    # Plan settings
+    # -----------------------------
+    n_recipes = st.slider("Recipes to plan", 1, 14, 5, key="planner_n")
+    stocked = sorted({item for (item, _), qty in pantry.items() if qty > 0})
+    use_first = st.multiselect("Use these first (e.g. expiring soon)", stocked, key="planner_use_first")
+    penalty = st.slider(
+        "Shopping penalty", 0.0, 2.0, SHOPPING_PENALTY, 0.05, key="planner_penalty",
+        help="How much each ingredient the pantry can't cover counts against a recipe.",
+    )
+
+    # -----------------------------
+    # Plan
+    # -----------------------------
+    # Pantry depletion is carried from one pick to the next, so later recipes
+    # don't count on stock an earlier one already used
+    plan = plan_meals(
+        pantry, get_recipe_matrix(st.session_state), catalogue.lines, n_recipes,
+        weights={item: PRIORITY_WEIGHT for item in use_first}, shopping_penalty=penalty,
+    )
+
+    if not plan.picks:
+        st.info("No recipe uses anything in your pantry.")
+        st.stop()
+
+    st.caption(f"Planned {len(plan)} recipes in {plan.elapsed * 1000:.0f} ms ({plan.evaluated:,} recipe scores).")
+    if not plan.complete:
+        st.warning("Planning ran out of time; later picks may not be the best available.")
+
+    for number, (recipe_id, _, missing, short) in enumerate(timed_loop("render: plan card", plan.picks), 1):
+        row = df.iloc[recipe_id]
+        st.subheader(f"{number}. {row.get('Recipe Name', f'Recipe {df.index[recipe_id]}')}")
+
+        if not missing and not short:
+            st.success("Nothing extra to buy.")
+        else:
+            st.write("To buy:")
+            for item, unit, amt in missing + short:
+                if unit:
+                    st.write(f"- {format_amount(amt, unit)} {item}")
+                else:
+                    st.write(f"- {item} (x{amt})")
+
+    st.markdown("---")
+    if st.button("Add everything the plan needs to the shopping list", key="planner_shop"):
+        shopping = session_shopping_list(st.session_state)
+        shopping.add_shortfall(plan.shortfall())
+        save_shopping_list(shopping)
+        st.success("Shopping list updated.")
@@ -2,175 +2,146 @@
 import streamlit as st
 import pandas as pd
 
-# Import shared helpers. Ensure these exist in utils.py and are on PYTHONPATH.
-# Required helpers: normalized_raw_lines, parse_ingredient, singularize
-from utils import normalized_raw_lines, parse_ingredient, singularize
-
-# Ensure session state keys exist
-if "recipes" not in st.session_state:
-    st.session_state.recipes = pd.DataFrame()
-
-if "pantry" not in st.session_state:
-    st.session_state.pantry = {}
-
-st.title("🧾 Use Up Ingredients")
-
-# Helper: canonical pantry key
-def pantry_key(item, unit):
-    return (singularize(item or ""), unit)
-
-# Compare a single recipe's ingredients to the pantry.
-# Accepts ingredients_cell which may be: list[dict], list[str], or str.
-# Returns: (missing_list, short_list, matched_count)
-def compare_recipe_to_pantry(ingredients_cell):
-    missing = []
-    short = []
-    matched = 0
-
-    # normalized_raw_lines returns list[str] (clean raw lines) or list of dicts if you prefer;
-    # we handle both dict and string forms below.
-    raw_lines = normalized_raw_lines(ingredients_cell)
-
-    for raw in raw_lines:
-        # If the recipe stores structured dicts, normalized_raw_lines may return raw strings.
-        # Try to parse; if parse fails, treat as countable item with no quantity.
+from catalogue import use_catalogue
+from paging import compact_mode, load_more_button, page_limit
+from pantry import RANKINGS, get_feasibility_engine, get_recipe_matrix, session_pantry
+from profiling import debug_enabled, profiled_rerun, timed_loop
+from shopping import session_shopping_list
+from storage import save_pantry, save_shopping_list
+
+with profiled_rerun("Use Up Ingredients"):
+    # The catalogue is shared by every session; this one only holds its pantry
+    catalogue = use_catalogue(st.session_state)
+    pantry = session_pantry(st.session_state)
+
+    st.title("🧾 Use Up Ingredients")
+
+    # UI: list recipes and show match summary
+    if catalogue.empty:
+        st.info("No recipes loaded. Upload recipes on the main page first.")
+    else:
+        df = catalogue.recipes
+
+        # Only recipes using pantry items that changed since the last rerun are re-evaluated
+        engine = get_feasibility_engine(st.session_state)
+        parsed_recipes = engine.lines
+
+        # Show a compact summary table (recipe name and ingredient count)
+        # Only the first rows are shown, so only they are read
         try:
-            qty, unit, item = parse_ingredient(raw)
+            preview = []
+            for recipe_id, (_, row) in enumerate(df.head(20).iterrows()):
+                name = row.get("Recipe Name", "Unnamed")
+                # Count non-empty parsed lines
+                lines = parsed_recipes.get(recipe_id, [])
+                preview.append({"Recipe Name": name, "Ingredient Count": len(lines)})
+            st.dataframe(pd.DataFrame(preview))
         except Exception:
-            qty, unit, item = None, None, raw.strip().lower()
+            # Fallback: show recipe names only
+            st.write("Recipes:")
+            for _, r in df.head(20).iterrows():
+                st.write("-", r.get("Recipe Name", "Unnamed"))
+
+        st.markdown("---")
+
+        # Rank the whole catalogue in one sparse pass, but only build widgets for the visible page
+        rank_by = st.selectbox("Rank by", list(RANKINGS), key="use_up_rank")
+        limit = page_limit("use_up")
+        ranked, _, ranked_pct = get_recipe_matrix(st.session_state).rank(pantry.totals(), RANKINGS[rank_by], limit)
+        shown = ranked.tolist()
+        match_pct = dict(zip(shown, ranked_pct.tolist()))
+
+        if compact_mode("use_up"):
+            summary = []
+            for recipe_id in shown:
+                missing, short, matched = engine.result(recipe_id)
+                summary.append({
+                    "Recipe Name": df.iloc[recipe_id].get("Recipe Name", f"Recipe {df.index[recipe_id]}"),
+                    "Available": matched,
+                    "Ingredients": len(parsed_recipes.get(recipe_id, [])),
+                    "Match %": round(match_pct[recipe_id]),
+                    "Missing": len(missing),
+                    "Short": len(short),
+                })
+            st.dataframe(pd.DataFrame(summary), hide_index=True)
+            cards = []
+        else:
+            cards = shown
 
-        # canonicalize item
-        item = singularize(item or "")
+        # Show match details for the visible recipes
+        for recipe_id in timed_loop("render: recipe card", cards):
+            idx, row = df.index[recipe_id], df.iloc[recipe_id]
+            recipe_name = row.get("Recipe Name", f"Recipe {idx}")
+            ingredients_cell = row.get("Ingredients", [])
+            parsed_lines = parsed_recipes.get(recipe_id, [])
 
-        key = pantry_key(item, unit)
-        have = st.session_state.pantry.get(key, 0)
+            missing, short, matched = engine.result(recipe_id)
+            total_ingredients = len(parsed_lines)
 
-        # If no numeric quantity, treat as countable: require at least 1
-        if qty is None:
-            if have >= 1:
-                matched += 1
-            else:
-                missing.append((item, unit, 1))
-        else:
-            if have >= qty:
-                matched += 1
+            # Header with match summary
+            pct = (matched / total_ingredients * 100) if total_ingredients else 0
+            st.subheader(f"{recipe_name} — {matched}/{total_ingredients} ingredients available ({pct:.0f}%)")
+
+            # Show missing and short lists
+            if not missing and not short:
+                st.success("You have everything listed (or recipe has no parseable ingredients).")
             else:
-                short_amount = max(0, qty - have)
-                short.append((item, unit, short_amount))
-
-    return missing, short, matched
-
-# UI: list recipes and show match summary
-if st.session_state.recipes is None or st.session_state.recipes.empty:
-    st.info("No recipes loaded. Upload recipes on the main page first.")
-else:
-    df = st.session_state.recipes
-
-    # Show a compact summary table (recipe name and ingredient count)
-    try:
-        preview = []
-        for _, row in df.iterrows():
-            name = row.get("Recipe Name", "Unnamed")
-            ingredients_cell = row.get("Ingredients", [])
-            # Count non-empty parsed lines
-            lines = normalized_raw_lines(ingredients_cell)
-            preview.append({"Recipe Name": name, "Ingredient Count": len(lines)})
-        st.dataframe(pd.DataFrame(preview).head(20))
-    except Exception:
-        # Fallback: show recipe names only
-        st.write("Recipes:")
-        for _, r in df.iterrows():
-            st.write("-", r.get("Recipe Name", "Unnamed"))
-
-    st.markdown("---")
-
-    # Iterate recipes and show match details
-    for idx, row in df.iterrows():
-        recipe_name = row.get("Recipe Name", f"Recipe {idx}")
-        ingredients_cell = row.get("Ingredients", [])
-
-        missing, short, matched = compare_recipe_to_pantry(ingredients_cell)
-        total_ingredients = len(normalized_raw_lines(ingredients_cell))
-
-        # Header with match summary
-        pct = (matched / total_ingredients * 100) if total_ingredients else 0
-        st.subheader(f"{recipe_name} — {matched}/{total_ingredients} ingredients available ({pct:.0f}%)")
-
-        # Show missing and short lists
-        if not missing and not short:
-            st.success("You have everything listed (or recipe has no parseable ingredients).")
-        else:
-            if missing:
-                st.warning("Missing items (not in pantry):")
-                for item, unit, amt in missing:
-                    if unit:
-                        st.write(f"- {amt} {unit} {item}")
-                    else:
-                        st.write(f"- {item} (x{amt})")
-            if short:
-                st.info("Short on quantity (need more):")
-                for item, unit, amt in short:
-                    if unit:
-                        st.write(f"- {amt} {unit} {item}")
-                    else:
-                        st.write(f"- {item} (x{amt})")
-
-        # Buttons: add missing to shopping list, or mark as cookable
-        col1, col2 = st.columns(2)
-        with col1:
-            key_add = f"add_shop_{idx}"
-            if st.button("Add missing to shopping list", key=key_add):
-                # Build structured missing items and append to shopping_list
-                if "shopping_list" not in st.session_state:
-                    st.session_state.shopping_list = []
-                for item, unit, amt in missing + short:
-                    # store as simple string or structured dict depending on your app
-                    st.session_state.shopping_list.append({
-                        "raw": f"{amt} {unit or ''} {item}".strip(),
-                        "quantity": amt,
-                        "unit": unit,
-                        "ingredient": item
-                    })
-                st.success("Missing items added to shopping list.")
-        with col2:
-            key_cook = f"cook_recipe_{idx}"
-            if st.button("Mark as cookable (deduct pantry)", key=key_cook):
-                # Deduct required quantities from pantry where possible
-                for raw in normalized_raw_lines(ingredients_cell):
-                    try:
-                        qty, unit, item = parse_ingredient(raw)
-                    except Exception:
-                        qty, unit, item = None, None, raw.strip().lower()
-                    item = singularize(item or "")
-                    k = pantry_key(item, unit)
-                    if qty is None:
-                        # consume one if available
-                        if st.session_state.pantry.get(k, 0) >= 1:
-                            st.session_state.pantry[k] = st.session_state.pantry.get(k, 0) - 1
+                if missing:
+                    st.warning("Missing items (not in pantry):")
+                    for item, unit, amt in missing:
+                        if unit:
+                            st.write(f"- {amt} {unit} {item}")
+                        else:
+                            st.write(f"- {item} (x{amt})")
+                if short:
+                    st.info("Short on quantity (need more):")
+                    for item, unit, amt in short:
+                        if unit:
+                            st.write(f"- {amt} {unit} {item}")
+                        else:
+                            st.write(f"- {item} (x{amt})")
+
+            # Buttons: add missing to shopping list, or mark as cookable
+            col1, col2 = st.columns(2)
+            with col1:
+                key_add = f"add_shop_{idx}"
+                if st.button("Add missing to shopping list", key=key_add):
+                    # Structured entries; the list keeps its per-item totals up to date
+                    shopping = session_shopping_list(st.session_state)
+                    shopping.add_shortfall(missing + short)
+                    save_shopping_list(shopping)
+                    st.success("Missing items added to shopping list.")
+            with col2:
+                key_cook = f"cook_recipe_{idx}"
+                if st.button("Mark as cookable (deduct pantry)", key=key_cook):
+                    # All or nothing: deducts only if the pantry covers every line
+                    cooked, _, _ = pantry.cook(parsed_lines)
+                    if cooked:
+                        save_pantry(pantry)
+                        st.success("Pantry updated for this recipe.")
                     else:
-                        if k in st.session_state.pantry:
-                            st.session_state.pantry[k] = max(0, st.session_state.pantry.get(k, 0) - qty)
-                st.success("Pantry updated for this recipe.")
+                        st.error("The pantry doesn't cover this recipe; nothing was deducted.")
 
-        # Expand to show full ingredient list (cleaned)
+            # Expand to show full ingredient list (cleaned)
 
-        if isinstance(ingredients_cell, list):
-            for i, el in enumerate(ingredients_cell):
-                st.write(f"DEBUG list item {i} repr:", repr(el), "type:", type(el))
+            if debug_enabled() and isinstance(ingredients_cell, list):
+                for i, el in enumerate(ingredients_cell):
+                    st.write(f"DEBUG list item {i} repr:", repr(el), "type:", type(el))
 
-        # --- produce a cleaned list for widgets and display (remove empty/None entries) ---
-        cleaned_list = normalized_raw_lines(ingredients_cell)
-        cleaned_list = [o for o in cleaned_list if isinstance(o, str) and o.strip()]
+            # --- produce a cleaned list for widgets and display (remove empty/None entries) ---
+            cleaned_list = [raw for raw, _, _, _ in parsed_lines]
+            cleaned_list = [o for o in cleaned_list if isinstance(o, str) and o.strip()]
 
-        # fallback so widgets never receive an empty string
-        if not cleaned_list:
-            cleaned_list = []
-        with st.expander("Show ingredients"):
-            cleaned_list = normalized_raw_lines(ingredients_cell)
+            # fallback so widgets never receive an empty string
             if not cleaned_list:
-                st.write("No ingredients listed for this recipe.")
-            else:
-                for ing in cleaned_list:
-                    st.write(f"- {ing}")
+                cleaned_list = []
+            with st.expander("Show ingredients"):
+                if not cleaned_list:
+                    st.write("No ingredients listed for this recipe.")
+                else:
+                    for ing in cleaned_list:
+                        st.write(f"- {ing}")
+
+            st.markdown("---")
 
-        st.markdown("---")
\ No newline at end of file
+        load_more_button("use_up", len(shown), len(df))
\ No newline at end of file
@@ -1,177 +1,147 @@
 import streamlit as st
 import pandas as pd
 
-from utils import (
-    parse_ingredient,
-    singularize,
-    normalized_raw_lines,
-)
-
-# -----------------------------
-# Unified pantry key system
-# -----------------------------
-def pantry_key(item, unit):
-    item = singularize(item.strip().lower()) if item else ""
-    unit = unit.strip().lower() if unit else None
-    return (item, unit)
-
-def get_pantry_amount(item, unit):
-    key = pantry_key(item, unit)
-    return float(st.session_state.pantry.get(key, 0))
+from catalogue import use_catalogue
+from paging import compact_mode, load_more_button, page_limit
+from pantry import RANKINGS, get_feasibility_engine, get_recipe_matrix, session_pantry
+from profiling import debug_enabled, profiled_rerun, timed_loop
+from shopping import session_shopping_list
+from storage import save_pantry, save_shopping_list
 
 # -----------------------------
 # Compare recipe to pantry
 # -----------------------------
-def compare_recipe_to_pantry(ingredients_cell):
-    missing = []
-    short = []
-    matched = 0
-
-    raw_lines = normalized_raw_lines(ingredients_cell)
-
+def compare_recipe_to_pantry(recipe_id):
     # If pantry is empty, just mark everything as missing
     if not st.session_state.pantry:
-        for raw in raw_lines:
-            try:
-                qty, unit, item = parse_ingredient(raw)
-            except Exception:
-                qty, unit, item = None, None, raw.strip().lower()
-            item = singularize(item or "")
-            missing.append((item, unit, qty if qty is not None else 1))
+        missing = []
+        for raw, qty, unit, item in engine.lines.get(recipe_id, []):
+            missing.append((item or "", unit, qty if qty is not None else 1))
         return missing, [], 0
 
-
-    for raw in raw_lines:
-        try:
-            qty, unit, item = parse_ingredient(raw)
-        except Exception:
-            qty, unit, item = None, None, raw.strip().lower()
-
-        item = singularize(item or "")
-        have = get_pantry_amount(item, unit)
-
-        # Countable items (no numeric qty)
-        if qty is None:
-            if have >= 1:
-                matched += 1
-            else:
-                missing.append((item, unit, 1))
-            continue
-
-        # Numeric items
-        if have >= qty:
-            matched += 1
-        else:
-            short.append((item, unit, qty - have))
-
-    return missing, short, matched
+    return engine.result(recipe_id)
 
 # -----------------------------
 # Page start
 # -----------------------------
 st.title("🧾 Use Up Ingredients")
+with profiled_rerun("Use Up Ingredients 2"):
+    catalogue = use_catalogue(st.session_state)
+    if catalogue.empty:
+        st.info("No recipes loaded. Upload recipes on the main page first.")
+        st.stop()
+
+    pantry = session_pantry(st.session_state)
+
+    df = catalogue.recipes
+
+    # Per-recipe results are kept across reruns; a pantry edit only
+    # re-evaluates the recipes that use the changed items.
+    engine = get_feasibility_engine(st.session_state)
+    parsed_recipes = engine.lines
+
+    # -----------------------------
+    # Pantry debug preview
+    # -----------------------------
+    st.write("### Pantry (Unified Key View)")
+    if st.session_state.pantry:
+        preview = [{"item": k[0], "unit": k[1], "qty": v} for k, v in st.session_state.pantry.items()]
+        st.dataframe(pd.DataFrame(preview))
+    else:
+        st.write("Pantry is EMPTY")
 
-if "recipes" not in st.session_state or st.session_state.recipes.empty:
-    st.info("No recipes loaded. Upload recipes on the main page first.")
-    st.stop()
-
-if "pantry" not in st.session_state:
-    st.session_state.pantry = {}
+    st.markdown("---")
 
-df = st.session_state.recipes
+    # -----------------------------
+    # Ranking + pagination
+    # -----------------------------
+    # Coverage of every recipe comes from one pass over the sparse recipe x ingredient matrix
+    rank_by = st.selectbox("Rank by", list(RANKINGS), key="use_up2_rank")
+    limit = page_limit("use_up2")
+    ranked, _, ranked_pct = get_recipe_matrix(st.session_state).rank(pantry.totals(), RANKINGS[rank_by], limit)
+    shown = ranked.tolist()
+    match_pct = dict(zip(shown, ranked_pct.tolist()))
+
+    if compact_mode("use_up2"):
+        summary = []
+        for recipe_id in shown:
+            missing, short, matched = compare_recipe_to_pantry(recipe_id)
+            summary.append({
+                "Recipe Name": df.iloc[recipe_id].get("Recipe Name", f"Recipe {df.index[recipe_id]}"),
+                "Available": matched,
+                "Ingredients": len(parsed_recipes.get(recipe_id, [])),
+                "Match %": round(match_pct[recipe_id]),
+                "Missing": len(missing),
+                "Short": len(short),
+            })
+        st.dataframe(pd.DataFrame(summary), hide_index=True)
+        cards = []
+    else:
+        cards = shown
 
-# -----------------------------
-# Pantry debug preview
-# -----------------------------
-st.write("### Pantry (Unified Key View)")
-if st.session_state.pantry:
-    preview = [{"item": k[0], "unit": k[1], "qty": v} for k, v in st.session_state.pantry.items()]
-    st.dataframe(pd.DataFrame(preview))
-else:
-    st.write("Pantry is EMPTY")
+    # -----------------------------
+    # Recipe loop
+    # -----------------------------
+    for recipe_id in timed_loop("render: recipe card", cards):
+        idx, row = df.index[recipe_id], df.iloc[recipe_id]
+        recipe_name = row.get("Recipe Name", f"Recipe {idx}")
+        parsed_lines = parsed_recipes.get(recipe_id, [])
 
-st.markdown("---")
+        if debug_enabled():
+            st.write("DEBUG PARSED INGREDIENTS:")
+            for raw, qty, unit, item in parsed_lines:
+                st.write(f"RAW: {raw} → qty={qty}, unit={unit}, item={item}")
 
-# -----------------------------
-# Recipe loop
-# -----------------------------
-for idx, row in df.iterrows():
-    recipe_name = row.get("Recipe Name", f"Recipe {idx}")
-    ingredients_cell = row.get("Ingredients", [])
 
-    st.write("DEBUG PARSED INGREDIENTS:")
-    for raw in normalized_raw_lines(ingredients_cell):
-        qty, unit, item = parse_ingredient(raw)
-        st.write(f"RAW: {raw} → qty={qty}, unit={unit}, item={item}")
+        missing, short, matched = compare_recipe_to_pantry(recipe_id)
+        total = len(parsed_lines)
+        pct = (matched / total * 100) if total else 0
 
+        st.subheader(f"{recipe_name} — {matched}/{total} ingredients available ({pct:.0f}%)")
 
-    missing, short, matched = compare_recipe_to_pantry(ingredients_cell)
-    total = len(normalized_raw_lines(ingredients_cell))
-    pct = (matched / total * 100) if total else 0
+        # Missing + short display
+        if not missing and not short:
+            st.success("You have everything for this recipe.")
+        else:
+            if missing:
+                st.warning("Missing items:")
+                for item, unit, amt in missing:
+                    st.write(f"- {amt} {unit or ''} {item}".strip())
+
+            if short:
+                st.info("Short on quantity:")
+                for item, unit, amt in short:
+                    st.write(f"- Need {amt} more {unit or ''} {item}".strip())
+
+
+        # Buttons
+        col1, col2 = st.columns(2)
+
+        with col1:
+            if st.button("Add missing to shopping list", key=f"shop_{idx}"):
+                shopping = session_shopping_list(st.session_state)
+                shopping.add_shortfall(missing + short)
+                save_shopping_list(shopping)
+                st.success("Added to shopping list.")
+
+        with col2:
+            if st.button("Cook this recipe (deduct pantry)", key=f"cook_{idx}"):
+                cooked, _, _ = pantry.cook(parsed_lines)
+                if cooked:
+                    save_pantry(pantry)
+                    st.success("Pantry updated.")
+                else:
+                    st.error("The pantry doesn't cover this recipe; nothing was deducted.")
 
-    st.subheader(f"{recipe_name} — {matched}/{total} ingredients available ({pct:.0f}%)")
+        # Ingredient list
+        with st.expander("Show ingredients"):
+            cleaned_list = [raw for raw, _, _, _ in parsed_lines]
+            if not cleaned_list:
+                st.write("No ingredients found.")
+            else:
+                for ing in cleaned_list:
+                    st.write(f"- {ing}")
 
-    # Missing + short display
-    if not missing and not short:
-        st.success("You have everything for this recipe.")
-    else:
-        if missing:
-            st.warning("Missing items:")
-            for item, unit, amt in missing:
-                st.write(f"- {amt} {unit or ''} {item}".strip())
-
-        if short:
-            st.info("Short on quantity:")
-            for item, unit, amt in short:
-                st.write(f"- Need {amt} more {unit or ''} {item}".strip())
-
-
-    # Buttons
-    col1, col2 = st.columns(2)
-
-    with col1:
-        if st.button("Add missing to shopping list", key=f"shop_{idx}"):
-            if "shopping_list" not in st.session_state:
-                st.session_state.shopping_list = []
-
-            for item, unit, amt in missing + short:
-                st.session_state.shopping_list.append({
-                    "raw": f"{amt} {unit or ''} {item}".strip(),
-                    "quantity": amt,
-                    "unit": unit,
-                    "ingredient": item
-                })
-            st.success("Added to shopping list.")
-
-    with col2:
-        if st.button("Cook this recipe (deduct pantry)", key=f"cook_{idx}"):
-            for raw in normalized_raw_lines(ingredients_cell):
-                try:
-                    qty, unit, item = parse_ingredient(raw)
-                except Exception:
-                    qty, unit, item = None, None, raw.strip().lower()
-
-                item = singularize(item or "")
-                key = pantry_key(item, unit)
-
-                if qty is None:
-                    if st.session_state.pantry.get(key, 0) >= 1:
-                        st.session_state.pantry[key] -= 1
-                else:
-                    if key in st.session_state.pantry:
-                        st.session_state.pantry[key] = max(
-                            0, st.session_state.pantry[key] - qty
-                        )
-
-            st.success("Pantry updated.")
-
-    # Ingredient list
-    with st.expander("Show ingredients"):
-        cleaned_list = normalized_raw_lines(ingredients_cell)
-        if not cleaned_list:
-            st.write("No ingredients found.")
-        else:
-            for ing in cleaned_list:
-                st.write(f"- {ing}")
+        st.markdown("---")
 
-    st.markdown("---")
+    load_more_button("use_up2", len(shown), len(df))
\ No newline at end of file
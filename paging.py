@@ -0,0 +1,32 @@
+# paging.py
+import streamlit as st
+
+# Number of results rendered per "page"
+PAGE_SIZE = 20
+
+
+def page_limit(name):
+    """How many results of list `name` are currently visible."""
+    limit_key = f"{name}_limit"
+    if limit_key not in st.session_state:
+        st.session_state[limit_key] = PAGE_SIZE
+    return st.session_state[limit_key]
+
+
+def reset_page(name):
+    st.session_state[f"{name}_limit"] = PAGE_SIZE
+
+
+def load_more_button(name, shown, total):
+    """Render a "Load more" button when results are hidden; reruns with a bigger page."""
+    if shown >= total:
+        return
+    st.caption(f"Showing {shown} of {total}")
+    if st.button(f"Load {min(PAGE_SIZE, total - shown)} more", key=f"{name}_more"):
+        st.session_state[f"{name}_limit"] = page_limit(name) + PAGE_SIZE
+        st.rerun()
+
+
+def compact_mode(name):
+    """Toggle between full result cards and a single st.dataframe."""
+    return st.toggle("Compact table view", key=f"{name}_compact")
@@ -0,0 +1,636 @@
+# pantry.py
+import threading
+from collections import defaultdict
+from collections.abc import MutableMapping
+
+import numpy as np
+
+from profiling import instrumented
+from utils import density_of, singularize, unit_dimension
+
+
+# --- Unified pantry key system ---
+def pantry_key(item, unit):
+    """Key of a raw ingredient name and unit; the name is singularized as parse_ingredient() does."""
+    return parsed_key(singularize(item), unit)
+
+
+def parsed_key(item, unit):
+    """
+    Key of an item name parse_ingredient() already singularized. singularize()
+    is not idempotent ("cheeses" -> "chees" -> "che"), so parsed names must
+    not go through it again.
+    """
+    item = item.strip().lower() if item else ""
+    unit = unit.strip().lower() if unit else None
+    return (item, unit)
+
+
+# --- Dimension-aware quantities ---
+# Pantry stock is compared per (item, dimension) in the dimension's base unit
+# (g, ml or count), so "1 cup sugar" covers "4 tbsp sugar". Items with a known
+# density also count their mass stock as volume and vice versa.
+ANY = "any"
+
+# Relative slack so 16 tbsp == 1 cup survives float rounding
+_TOLERANCE = 1e-9
+
+
+def _rate(unit, dimension, density):
+    """Base units of `dimension` in one `unit`, or None when they don't convert."""
+    dim, factor = unit_dimension(unit)
+    if dim == dimension:
+        return factor
+    if density:
+        if dim == "volume" and dimension == "mass":
+            return factor * density
+        if dim == "mass" and dimension == "volume":
+            return factor / density
+    return None
+
+
+def pantry_totals(pantry):
+    """
+    {(item, dimension): total} for a pantry dict {(item, unit): qty}.
+    (item, ANY) holds the counted stock, plus one if any measured stock is left,
+    which is what unquantified recipe lines ("salt") need.
+    """
+    if isinstance(pantry, Pantry):
+        vector = pantry.totals().tolist()
+        return {key: vector[col] for key, col in pantry.columns.items()}
+    totals = defaultdict(float)
+    measured = set()
+    for (item, unit), qty in pantry.items():
+        dim, factor = unit_dimension(unit)
+        totals[(item, dim)] += qty * factor
+        density = density_of(item)
+        if density and dim in ("mass", "volume"):
+            other = "volume" if dim == "mass" else "mass"
+            totals[(item, other)] += qty * _rate(unit, other, density)
+        if dim == "count":
+            totals[(item, ANY)] += qty
+        elif qty > 0:
+            measured.add(item)
+    for item in measured:
+        totals[(item, ANY)] += 1
+    return totals
+
+
+def _threshold(qty, factor):
+    """Smallest (item, dimension) total that covers a recipe line."""
+    if qty is None:
+        return 1.0
+    return qty * factor * (1 - _TOLERANCE)
+
+
+def _requirements(parsed_lines):
+    """[(raw, qty, unit, item)] -> [(item, unit, qty, (item, dimension), factor)]"""
+    reqs = []
+    for raw, qty, unit, item in parsed_lines:
+        item, unit_key = parsed_key(item, unit)
+        if qty is None:
+            reqs.append((item, unit, qty, (item, ANY), 1.0))
+        else:
+            dim, factor = unit_dimension(unit_key)
+            reqs.append((item, unit, qty, (item, dim), factor))
+    return reqs
+
+
+def _compare(requirements, totals):
+    missing = []
+    short = []
+    matched = 0
+
+    for item, unit, qty, key, factor in requirements:
+        have = totals.get(key, 0)
+        if have >= _threshold(qty, factor):
+            matched += 1
+        # Countable items (no numeric qty): require at least 1
+        elif qty is None:
+            missing.append((item, unit, 1))
+        # Numeric items, compared in base units and reported in the recipe's unit
+        else:
+            short.append((item, unit, max(0, qty * factor - have) / factor))
+
+    return missing, short, matched
+
+
+@instrumented()
+def compare_recipe_to_pantry(parsed_lines, pantry):
+    """
+    Compare one recipe's parsed lines [(raw, qty, unit, item)] to the pantry.
+    Returns: (missing_list, short_list, matched_count)
+    """
+    if isinstance(pantry, Pantry):
+        return pantry.shortfall(parsed_lines)
+    return _compare(_requirements(parsed_lines), pantry_totals(pantry))
+
+
+# --- Array-backed pantry ---
+class Pantry(MutableMapping):
+    """
+    Pantry stock {(item, unit): qty} kept in a NumPy vector.
+
+    Every (item, unit) entry owns a slot in the quantity vector, and every
+    (item, dimension) pair an interned column id. totals() folds the slots
+    into per-column totals with one bincount, so checking a recipe is an
+    array gather against those totals. It still behaves like the plain dict
+    it replaces, so pages can read and update it by key.
+
+    A Pantry can be shared between threads: writes and new slots/columns
+    happen under one short lock, every write bumps a per-item version, and
+    cook() runs as an optimistic all-or-nothing transaction on top of those.
+    """
+
+    def __init__(self, entries=None):
+        self._slots = {}                    # (item, unit) -> slot
+        self._keys = []                     # slot -> (item, unit)
+        self._qty = np.zeros(16)
+        self._by_item = defaultdict(list)   # item -> slots, in insertion order
+        self.columns = {}                   # (item, dimension) -> column id
+        # Each slot adds qty * rate to one or more columns
+        self._edges = ([], [], [])          # slot, column, rate
+        self._any = []                      # slot -> (item, ANY) column
+        self._measured = []                 # slot -> stocked by weight/volume
+        self._arrays = None
+        self._lock = threading.RLock()      # guards writes and structure changes
+        self._versions = defaultdict(int)  # item -> bumped whenever its stock changes
+        self.conflicts = 0                  # cook() transactions retried
+        if entries:
+            self.update(entries)
+
+    # --- Mapping interface ---
+    def __getitem__(self, key):
+        return float(self._qty[self._slots[key]])
+
+    def __setitem__(self, key, qty):
+        with self._lock:
+            slot = self._slots.get(key)
+            if slot is None:
+                slot = self._add_slot(key)
+            self._qty[slot] = qty
+            self._versions[key[0]] += 1
+
+    def __delitem__(self, key):
+        # The slot stays allocated (with no stock) so compiled arrays remain valid
+        with self._lock:
+            slot = self._slots.pop(key)
+            self._qty[slot] = 0
+            self._versions[key[0]] += 1
+
+    def __iter__(self):
+        return iter(self._slots)
+
+    def __len__(self):
+        return len(self._slots)
+
+    def __repr__(self):
+        return f"Pantry({self.copy()!r})"
+
+    def copy(self):
+        """The stock as a plain dict, read under the lock."""
+        with self._lock:
+            return {key: float(self._qty[slot]) for key, slot in self._slots.items()}
+
+    def add(self, key, qty):
+        """Add qty to the stock of key (atomic read-modify-write)."""
+        with self._lock:
+            self[key] = self.get(key, 0) + qty
+
+    def column(self, item, dimension):
+        """Interned column id of (item, dimension)."""
+        key = (item, dimension)
+        col = self.columns.get(key)
+        if col is None:
+            with self._lock:
+                col = self.columns.get(key)
+                if col is None:
+                    col = self.columns[key] = len(self.columns)
+        return col
+
+    def _add_slot(self, key):
+        item, unit = key
+        slot = len(self._keys)
+        if slot == len(self._qty):
+            self._qty = np.concatenate([self._qty, np.zeros(len(self._qty))])
+        self._slots[key] = slot
+        self._keys.append(key)
+        self._by_item[item].append(slot)
+
+        dim, factor = unit_dimension(unit)
+        edges = [(dim, factor)]
+        density = density_of(item)
+        if density and dim in ("mass", "volume"):
+            other = "volume" if dim == "mass" else "mass"
+            edges.append((other, _rate(unit, other, density)))
+        if dim == "count":
+            edges.append((ANY, 1.0))
+        for dimension, rate in edges:
+            self._edges[0].append(slot)
+            self._edges[1].append(self.column(item, dimension))
+            self._edges[2].append(rate)
+        self._any.append(self.column(item, ANY))
+        self._measured.append(dim != "count")
+        self._arrays = None
+        return slot
+
+    def totals(self):
+        """Vector of stock per column in base units; see pantry_totals()."""
+        with self._lock:
+            if self._arrays is None:
+                slots, cols, rates = self._edges
+                self._arrays = (
+                    np.asarray(slots, dtype=np.intp), np.asarray(cols, dtype=np.intp),
+                    np.asarray(rates, dtype=float), np.asarray(self._any, dtype=np.intp),
+                    np.asarray(self._measured, dtype=bool),
+                )
+            slots, cols, rates, any_cols, measured = self._arrays
+            n = len(self.columns)
+            qty = self._qty[:len(self._keys)]
+        # bincount returns ints when there are no slots yet
+        totals = np.bincount(cols, weights=qty[slots] * rates, minlength=n).astype(float, copy=False)
+        stocked = any_cols[measured & (qty > 0)]
+        totals += np.minimum(np.bincount(stocked, minlength=n), 1)
+        return totals
+
+    # --- Recipe operations ---
+    def needs(self, parsed_lines):
+        """Compile a recipe's parsed lines into (requirements, columns, thresholds)."""
+        reqs = _requirements(parsed_lines)
+        cols = np.fromiter((self.column(*key) for *_, key, _ in reqs), dtype=np.intp, count=len(reqs))
+        thresholds = np.array([_threshold(qty, factor) for _, _, qty, _, factor in reqs])
+        return reqs, cols, thresholds
+
+    def can_make(self, parsed_lines):
+        _, cols, thresholds = self.needs(parsed_lines)
+        return bool(np.all(self.totals()[cols] >= thresholds))
+
+    @instrumented()
+    def shortfall(self, parsed_lines):
+        """(missing_list, short_list, matched_count), as compare_recipe_to_pantry."""
+        reqs, cols, thresholds = self.needs(parsed_lines)
+        have = self.totals()[cols]
+        ok = have >= thresholds
+        missing = []
+        short = []
+        for (item, unit, qty, _, factor), got, covered in zip(reqs, have.tolist(), ok.tolist()):
+            if covered:
+                continue
+            if qty is None:
+                missing.append((item, unit, 1))
+            else:
+                short.append((item, unit, max(0, qty * factor - got) / factor))
+        return missing, short, int(ok.sum())
+
+    @instrumented()
+    def deduct(self, parsed_lines):
+        """
+        Cook a recipe: take every line's quantity out of the pantry, drawing on
+        all entries of the item that convert (the exact unit first). Unquantified
+        lines use up one counted item when there is one. Stock never goes below 0.
+        Returns [(item, unit, amount)] that could not be covered.
+        """
+        uncovered = []
+        with self._lock:
+            for item, unit, qty, (_, dim), factor in _requirements(parsed_lines):
+                self._versions[item] += 1
+                if qty is None:
+                    slot = self._slots.get((item, None))
+                    if slot is not None and self._qty[slot] >= 1:
+                        self._qty[slot] -= 1
+                    continue
+                left = self._draw(item, parsed_key(item, unit)[1], dim, qty * factor)
+                if left > qty * factor * _TOLERANCE:
+                    uncovered.append((item, unit, left / factor))
+        return uncovered
+
+    def _draw(self, item, unit, dim, need):
+        """Greedy draw of `need` base units of item; returns what was left uncovered."""
+        density = density_of(item)
+        pairs = []
+        for slot in self._by_item.get(item, ()):
+            rate = _rate(self._keys[slot][1], dim, density)
+            if rate:
+                pairs.append((self._keys[slot][1] != unit, slot, rate))
+        if not pairs:
+            return need
+        pairs.sort(key=lambda p: p[0])
+        idx = np.array([slot for _, slot, _ in pairs])
+        rate = np.array([r for _, _, r in pairs])
+        avail = self._qty[idx] * rate
+        take = np.clip(need - (np.cumsum(avail) - avail), 0, avail)
+        self._qty[idx] = np.maximum(0, self._qty[idx] - take / rate)
+        return max(0.0, need - float(avail.sum()))
+
+    # --- Transactions ---
+    @instrumented()
+    def cook(self, parsed_lines):
+        """
+        Cook a recipe all-or-nothing: when the pantry covers every line, deduct
+        them all (as deduct() would); otherwise leave the pantry untouched.
+        Returns (cooked, missing_list, short_list).
+
+        Optimistic: the recipe's items are copied into a scratch Pantry and
+        checked and deducted there without holding the lock. The result is
+        written back only if none of those items changed in the meantime,
+        otherwise the transaction is retried. Cooks of recipes that share no
+        ingredient never conflict and only meet on the brief write-back.
+        """
+        items = {item for item, *_ in _requirements(parsed_lines)}
+        while True:
+            versions, scratch = self._read(items)
+            missing, short, _ = scratch.shortfall(parsed_lines)
+            if not missing and not short:
+                scratch.deduct(parsed_lines)
+            with self._lock:
+                if any(self._versions.get(item, 0) != version for item, version in versions.items()):
+                    self.conflicts += 1
+                    continue
+                if missing or short:
+                    return False, missing, short
+                for key, qty in scratch.copy().items():
+                    slot = self._slots[key]
+                    if self._qty[slot] != qty:
+                        self._qty[slot] = qty
+                        self._versions[key[0]] += 1
+                return True, [], []
+
+    def _read(self, items):
+        """({item: version}, scratch Pantry with the stock of items), read without the lock."""
+        versions = {item: self._versions.get(item, 0) for item in items}
+        entries = {}
+        for item in items:
+            for slot in self._by_item.get(item, ()):
+                qty = float(self._qty[slot])
+                if qty:
+                    entries[self._keys[slot]] = qty
+        return versions, Pantry(entries)
+
+    # --- Whole-catalogue evaluation ---
+    def needs_matrix(self, recipes):
+        """Compile {recipe_id: parsed_lines} into a RecipeMatrix over this pantry's columns."""
+        recipe_ids = np.fromiter(recipes, dtype=np.intp, count=len(recipes))
+        indptr = [0]
+        cols = []
+        thresholds = []
+        for lines in recipes.values():
+            for _, _, qty, key, factor in _requirements(lines):
+                cols.append(self.column(*key))
+                thresholds.append(_threshold(qty, factor))
+            indptr.append(len(cols))
+        return RecipeMatrix(recipe_ids, indptr, cols, thresholds)
+
+    def can_make_many(self, matrix):
+        """
+        Evaluate a RecipeMatrix against the pantry in one pass.
+        Returns (can_make, matched_count) arrays aligned with its recipe_ids.
+        """
+        matched, _ = matrix.evaluate(self.totals())
+        return matched == matrix.lengths, matched
+
+
+# --- Sparse recipe x ingredient matrix ---
+# Orderings offered by RecipeMatrix.rank()
+RANKINGS = {
+    "Match %": "match",
+    "Fewest missing": "missing",
+    "Smallest shortfall": "shortfall",
+}
+
+
+class RecipeMatrix:
+    """
+    The catalogue's requirements as a CSR sparse matrix: one row per recipe,
+    one column per interned (item, dimension) of a Pantry, and the amount
+    each line needs (in base units) as the value. Coverage, shortfall and
+    match % for every recipe are row sums over a gather of the pantry's
+    totals vector, i.e. sparse mat-vec products.
+    """
+
+    def __init__(self, recipe_ids, indptr, indices, data):
+        self.recipe_ids = np.asarray(recipe_ids, dtype=np.intp)
+        self.indptr = np.asarray(indptr, dtype=np.intp)
+        self.indices = np.asarray(indices, dtype=np.intp)
+        self.data = np.asarray(data, dtype=float)
+        self.lengths = np.diff(self.indptr)
+        self._rows = np.repeat(np.arange(len(self.recipe_ids)), self.lengths)
+
+    def __len__(self):
+        return len(self.recipe_ids)
+
+    def _row_sums(self, values):
+        return np.bincount(self._rows, weights=values, minlength=len(self.recipe_ids))
+
+    def evaluate(self, totals):
+        """
+        (matched, shortfall) per row: the number of lines the pantry covers,
+        and the summed fraction of each line's amount still missing (0..1 per line).
+        """
+        have = totals[self.indices]
+        covered = have >= self.data
+        ratio = np.divide(have, self.data, out=np.ones_like(have), where=self.data > 0)
+        gap = np.where(covered, 0.0, 1 - np.minimum(ratio, 1))
+        return self._row_sums(covered).astype(np.intp), self._row_sums(gap)
+
+    @instrumented()
+    def rank(self, totals, by="match", limit=None):
+        """
+        Order recipes by match % (highest first), fewest missing lines or
+        smallest total shortfall; ties keep catalogue order and recipes
+        without parsed lines go last. With `limit` only the top `limit` are
+        returned, selected with argpartition instead of sorting every recipe.
+        Returns (recipe_ids, matched, match_pct), all in ranked order.
+        """
+        matched, shortfall = self.evaluate(totals)
+        pct = np.divide(matched * 100.0, self.lengths, out=np.zeros(len(self)), where=self.lengths > 0)
+        empty = self.lengths == 0
+        if by == "missing":
+            keys = (shortfall, self.lengths - matched)
+        elif by == "shortfall":
+            keys = (self.lengths - matched, shortfall)
+        else:
+            keys = (-pct,)
+
+        rows = np.arange(len(self))
+        if limit is not None and limit < len(self):
+            # Every recipe whose leading key is within the limit-th best,
+            # ties included, so the sort below gives the exact top `limit`
+            lead = np.where(empty, np.inf, keys[-1])
+            if limit == 0:
+                rows = rows[:0]
+            else:
+                cutoff = np.partition(lead, limit - 1)[limit - 1]
+                rows = np.flatnonzero(lead <= cutoff)
+        order = rows[np.lexsort([key[rows] for key in keys] + [empty[rows]])][:limit]
+        return self.recipe_ids[order], matched[order], pct[order]
+
+
+@instrumented()
+def matrix_from_store(pantry, store, n_recipes):
+    """
+    RecipeMatrix for recipes 0..n_recipes-1 straight from the long-format
+    ingredient store; each distinct (item, unit) is resolved to a column once.
+    """
+    if store is None or store.empty:
+        return RecipeMatrix(np.arange(n_recipes), np.zeros(n_recipes + 1), [], [])
+
+    order = np.argsort(store["recipe_id"].to_numpy(), kind="stable")
+    recipe_id = store["recipe_id"].to_numpy()[order]
+    qty = store["quantity"].to_numpy(dtype=float, na_value=np.nan)[order]
+    items, item_names = _factorize(store["item"])
+    units, unit_names = _factorize(store["unit"])
+    pairs, pair_codes = np.unique(items[order] * len(unit_names) + units[order], return_inverse=True)
+
+    measured_col = np.empty(len(pairs), dtype=np.intp)
+    any_col = np.empty(len(pairs), dtype=np.intp)
+    factors = np.empty(len(pairs))
+    for i, code in enumerate(pairs.tolist()):
+        item, unit = parsed_key(item_names[code // len(unit_names)], unit_names[code % len(unit_names)])
+        dim, factors[i] = unit_dimension(unit)
+        measured_col[i] = pantry.column(item, dim)
+        any_col[i] = pantry.column(item, ANY)
+
+    unquantified = np.isnan(qty)
+    cols = np.where(unquantified, any_col[pair_codes], measured_col[pair_codes])
+    thresholds = np.where(unquantified, 1.0, qty * factors[pair_codes] * (1 - _TOLERANCE))
+    indptr = np.searchsorted(recipe_id, np.arange(n_recipes + 1))
+    return RecipeMatrix(np.arange(n_recipes), indptr, cols, thresholds)
+
+
+def _factorize(column):
+    """Integer codes and the distinct values of a store column (None for missing)."""
+    import pandas as pd
+
+    codes, names = pd.factorize(column, use_na_sentinel=False)
+    return codes, [None if pd.isna(name) else name for name in names]
+
+
+def _state_catalogue(state):
+    catalogue = state.get("catalogue")
+    if catalogue is None:
+        from catalogue import use_catalogue
+
+        catalogue = use_catalogue(state)
+    return catalogue
+
+
+def get_recipe_matrix(state):
+    """
+    RecipeMatrix for the session's catalogue snapshot, compiled against the
+    shared pantry once per snapshot and shared by every session.
+    """
+    pantry = session_pantry(state)
+    catalogue = _state_catalogue(state)
+    compiled_for, matrix = catalogue.derived(
+        "recipe_matrix", lambda c: (pantry, matrix_from_store(pantry, c.store, len(c)))
+    )
+    if compiled_for is not pantry:
+        # Column ids belong to one Pantry; only happens if SHARED_PANTRY is replaced
+        matrix = matrix_from_store(pantry, catalogue.store, len(catalogue))
+    return matrix
+
+
+def _saved_pantry():
+    from storage import load_pantry
+
+    return load_pantry()
+
+
+class SharedPantry:
+    """
+    Holds the one Pantry of the whole process, loaded from the database on
+    first use. Every session and the API change this same object, so stock
+    added or cooked anywhere is seen everywhere and save_pantry() always
+    writes all of it.
+    """
+
+    def __init__(self, loader=_saved_pantry):
+        self._loader = loader
+        self._current = None
+        self._lock = threading.Lock()
+
+    def current(self):
+        pantry = self._current
+        if pantry is None:
+            with self._lock:
+                if self._current is None:
+                    self._current = Pantry(self._loader())
+                pantry = self._current
+        return pantry
+
+
+SHARED_PANTRY = SharedPantry()
+
+
+def session_pantry(state):
+    """
+    The shared Pantry, recorded in state["pantry"] (st.session_state) so
+    pages can read it by key like the dict it replaced.
+    """
+    pantry = SHARED_PANTRY.current()
+    state["pantry"] = pantry
+    return pantry
+
+
+# --- Incremental feasibility engine ---
+class FeasibilityEngine:
+    """
+    Keeps compare_recipe_to_pantry results for every recipe in the store.
+
+    Built on the session's RecipeMatrix: sync() compares the pantry's totals
+    vector with the previous sync and drops the cached results of just the
+    recipes whose matrix row reads a column that changed. Results are
+    computed with Pantry.shortfall() when a page first asks for them.
+    """
+
+    def __init__(self, catalogue, matrix):
+        self.catalogue = catalogue
+        self.lines = catalogue.lines
+        self.matrix = matrix
+        self._row_recipe = np.repeat(matrix.recipe_ids, matrix.lengths)
+        self._results = {}
+        self._pantry = None
+        self._totals = None
+        self.last_recomputed = 0
+
+    @instrumented()
+    def sync(self, pantry):
+        """Bring results up to date with pantry; returns the number of recipes invalidated."""
+        totals = pantry.totals()
+        if self._totals is None or pantry is not self._pantry:
+            self._results.clear()
+            self.last_recomputed = len(self.matrix)
+        else:
+            # Columns are only ever appended, so the old vector is a prefix
+            changed = totals[:len(self._totals)] != self._totals
+            dirty = np.unique(self._row_recipe[changed[self.matrix.indices]]).tolist()
+            for rid in dirty:
+                self._results.pop(rid, None)
+            self.last_recomputed = len(dirty)
+        self._pantry = pantry
+        self._totals = totals
+        return self.last_recomputed
+
+    def result(self, recipe_id):
+        """(missing_list, short_list, matched_count) as of the last sync."""
+        result = self._results.get(recipe_id)
+        if result is None:
+            lines = self.lines.get(recipe_id, [])
+            result = self._pantry.shortfall(lines) if lines else ([], [], 0)
+            self._results[recipe_id] = result
+        return result
+
+
+def get_feasibility_engine(state):
+    """
+    Return the engine kept in `state` (st.session_state), rebuilding it
+    whenever get_recipe_matrix() returns a new matrix (a new catalogue
+    snapshot).
+    """
+    matrix = get_recipe_matrix(state)
+    engine = state.get("feasibility_engine")
+    if engine is None or engine.matrix is not matrix:
+        engine = FeasibilityEngine(_state_catalogue(state), matrix)
+        state["feasibility_engine"] = engine
+    engine.sync(session_pantry(state))
+    return engine
\ No newline at end of file
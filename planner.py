@@ -0,0 +1,137 @@
+# planner.py
+# Batch meal planning: pick the N recipes that use up the most of the pantry
+# while needing the least extra shopping.
+import time
+
+import numpy as np
+
+from pantry import ANY, Pantry
+from profiling import instrumented
+
+# Weight of an ingredient the user wants used first (others weigh 1)
+PRIORITY_WEIGHT = 3.0
+
+# Score lost per recipe line the pantry can't cover, relative to using up
+# the whole starting stock of one ingredient
+SHOPPING_PENALTY = 0.25
+
+
+class MealPlan:
+    """The recipes plan_meals() picked, in the order they were chosen."""
+
+    def __init__(self):
+        self.picks = []         # (recipe_id, score, missing_list, short_list)
+        self.evaluated = 0      # recipe scores computed, the first full pass included
+        self.complete = True    # False when the time budget cut re-evaluation short
+        self.elapsed = 0.0
+
+    def __len__(self):
+        return len(self.picks)
+
+    def __iter__(self):
+        return iter(self.picks)
+
+    def recipe_ids(self):
+        return [recipe_id for recipe_id, _, _, _ in self.picks]
+
+    def shortfall(self):
+        """Everything the plan still needs bought, for ShoppingList.add_shortfall()."""
+        return [entry for _, _, missing, short in self.picks for entry in missing + short]
+
+
+class _Scorer:
+    """
+    Scores recipe lines against the remaining stock, per column of a Pantry.
+
+    A quantified line is worth the share of the column's starting stock it
+    would use (times the item's weight); unquantified lines ("salt") use
+    nothing up. Each line the stock doesn't cover costs the penalty times
+    the fraction still missing, as RecipeMatrix.evaluate() measures it.
+    """
+
+    def __init__(self, keys, start, weights, penalty):
+        weights = weights or {}
+        self.scale = np.divide(1.0, start, out=np.zeros_like(start), where=start > 0)
+        self.scale *= np.array([weights.get(item, 1.0) for item, _ in keys])
+        self.scale[[dim == ANY for _, dim in keys]] = 0
+        self.penalty = penalty
+
+    def lines(self, totals, cols, data):
+        """(use-up value, score) of each line."""
+        have = totals[cols]
+        used = np.minimum(data, have) * self.scale[cols]
+        ratio = np.divide(have, data, out=np.ones_like(have), where=data > 0)
+        gap = np.where(have >= data, 0.0, 1 - np.minimum(ratio, 1))
+        return used, used - self.penalty * gap
+
+
+@instrumented()
+def plan_meals(pantry, matrix, lines, n=5, weights=None, shopping_penalty=SHOPPING_PENALTY, time_budget=1.0):
+    """
+    Pick up to n recipes that use up the most pantry stock and need the
+    least shopping. matrix is the catalogue's RecipeMatrix compiled against
+    pantry (get_recipe_matrix()), lines {recipe_id: parsed lines} and
+    weights {item: weight} for ingredients to use first (PRIORITY_WEIGHT).
+
+    Greedy with lazy evaluation: every recipe is scored once in one pass
+    over the matrix. Each pick is deducted from a scratch copy of the pantry
+    (as deduct() would), which only marks the recipes sharing an ingredient
+    with it stale. A score can only fall as stock runs down, so a stale
+    score is an upper bound, and before the next pick only the stale
+    recipes whose bound still reaches the best up-to-date score are
+    re-scored, in one vectorized pass. Only recipes that use some stock are
+    considered.
+
+    Past time_budget seconds, the remaining picks go by the stale bounds.
+    The plan never changes the pantry itself.
+    """
+    started = time.perf_counter()
+    deadline = started + time_budget
+    plan = MealPlan()
+
+    columns = dict(pantry.columns)
+    keys = [None] * len(columns)
+    for key, col in columns.items():
+        keys[col] = key
+    scratch = Pantry(pantry.copy())
+    # Scratch totals are read in the order of pantry's (and so matrix's) columns
+    remap = np.array([scratch.column(*key) for key in keys], dtype=np.intp)
+    totals = scratch.totals()[remap]
+    scorer = _Scorer(keys, totals, weights, shopping_penalty)
+
+    rows = np.repeat(np.arange(len(matrix)), matrix.lengths)
+    used, score = scorer.lines(totals, matrix.indices, matrix.data)
+    scores = np.bincount(rows, weights=score, minlength=len(matrix))
+    available = np.bincount(rows, weights=used, minlength=len(matrix)) > 0
+    stale = np.zeros(len(matrix), dtype=bool)
+    plan.evaluated = len(matrix)
+
+    while len(plan.picks) < n and available.any():
+        if stale.any():
+            if time.perf_counter() < deadline:
+                fresh = available & ~stale
+                best = scores[fresh].max() if fresh.any() else -np.inf
+                todo = stale & available & (scores >= best)
+                lines_todo = todo[rows]
+                _, score = scorer.lines(totals, matrix.indices[lines_todo], matrix.data[lines_todo])
+                scores[todo] = np.bincount(rows[lines_todo], weights=score, minlength=len(matrix))[todo]
+                stale[todo] = False
+                plan.evaluated += int(todo.sum())
+            else:
+                plan.complete = False
+
+        row = int(np.argmax(np.where(available, scores, -np.inf)))
+        recipe_id = int(matrix.recipe_ids[row])
+        recipe_lines = lines.get(recipe_id, [])
+        missing, short, _ = scratch.shortfall(recipe_lines)
+        plan.picks.append((recipe_id, float(scores[row]), missing, short))
+        available[row] = False
+
+        scratch.deduct(recipe_lines)
+        depleted = scratch.totals()[remap]
+        changed = depleted != totals
+        stale[rows[changed[matrix.indices]]] = True
+        totals = depleted
+
+    plan.elapsed = time.perf_counter() - started
+    return plan
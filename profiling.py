@@ -0,0 +1,247 @@
+# profiling.py
+# Opt-in per-rerun instrumentation. Core functions are wrapped with
+# @instrumented / `with timed(...)`; while a rerun is profiled every call is
+# recorded, otherwise the wrappers only check a context variable. Streamlit
+# is imported lazily, so core modules can use this without depending on it.
+import contextvars
+import cProfile
+import functools
+import io
+import json
+import math
+import pstats
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+# The profile of the rerun running in this thread, or None when disabled
+_current = contextvars.ContextVar("rerun_profile", default=None)
+
+# name -> callable returning (hits, misses) counters
+_cache_sources = {}
+
+# Functions listed from a cProfile capture
+CPROFILE_LINES = 40
+
+
+def _p95(samples):
+    ordered = sorted(samples)
+    return ordered[max(0, math.ceil(0.95 * len(ordered)) - 1)]
+
+
+def register_cache(name, stats):
+    """Report the hit rate of a cache; stats() returns cumulative (hits, misses)."""
+    _cache_sources[name] = stats
+
+
+def _cache_counters():
+    counters = {}
+    for name, stats in _cache_sources.items():
+        try:
+            counters[name] = tuple(stats())
+        except Exception:
+            continue
+    return counters
+
+
+class RerunProfile:
+    """Timings and cache counters collected during one rerun of one page."""
+
+    def __init__(self, page, cprofile=False):
+        self.page = page
+        self.samples = defaultdict(list)
+        self.total = None
+        self.caches = {}
+        self.cprofile_text = None
+        self._cache_start = _cache_counters()
+        self._profiler = cProfile.Profile() if cprofile else None
+        self._start = time.perf_counter()
+        if self._profiler:
+            self._profiler.enable()
+
+    def record(self, name, seconds):
+        self.samples[name].append(seconds)
+
+    def stop(self):
+        """Stop the clock and any cProfile capture; compute cache deltas."""
+        if self.total is not None:
+            return
+        self.total = time.perf_counter() - self._start
+        if self._profiler:
+            self._profiler.disable()
+            out = io.StringIO()
+            pstats.Stats(self._profiler, stream=out).sort_stats("cumulative").print_stats(CPROFILE_LINES)
+            self.cprofile_text = out.getvalue()
+            self._profiler = None
+        for name, (hits, misses) in _cache_counters().items():
+            start_hits, start_misses = self._cache_start.get(name, (0, 0))
+            self.caches[name] = (hits - start_hits, misses - start_misses)
+
+    def timings(self):
+        """[{name, calls, total_ms, mean_ms, p95_ms, max_ms, share}] by cumulative time."""
+        rows = []
+        for name, samples in self.samples.items():
+            total = sum(samples)
+            rows.append({
+                "name": name,
+                "calls": len(samples),
+                "total_ms": total * 1000,
+                "mean_ms": total / len(samples) * 1000,
+                "p95_ms": _p95(samples) * 1000,
+                "max_ms": max(samples) * 1000,
+                "share": total / self.total if self.total else None,
+            })
+        rows.sort(key=lambda row: row["total_ms"], reverse=True)
+        return rows
+
+    def cache_rates(self):
+        """[{name, hits, misses, hit_rate}] for this rerun."""
+        return [
+            {"name": name, "hits": hits, "misses": misses,
+             "hit_rate": hits / (hits + misses) if hits + misses else None}
+            for name, (hits, misses) in self.caches.items()
+        ]
+
+    def to_dict(self):
+        return {
+            "page": self.page,
+            "rerun_ms": self.total * 1000 if self.total is not None else None,
+            "timings": self.timings(),
+            "caches": self.cache_rates(),
+            "cprofile": self.cprofile_text,
+        }
+
+    def to_json(self):
+        return json.dumps(self.to_dict(), indent=2)
+
+
+# --- Recording ---
+@contextmanager
+def timed(name):
+    """Time the block under `name` when the current rerun is profiled."""
+    profile = _current.get()
+    if profile is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        profile.record(name, time.perf_counter() - start)
+
+
+def instrumented(name=None):
+    """Decorator form of timed(); defaults to the function's qualified name."""
+    def decorate(fn):
+        label = name or fn.__qualname__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            profile = _current.get()
+            if profile is None:
+                return fn(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                profile.record(label, time.perf_counter() - start)
+        return wrapper
+    return decorate
+
+
+def timed_loop(name, items):
+    """Iterate over items, timing each pass of the loop body under `name`."""
+    profile = _current.get()
+    if profile is None:
+        yield from items
+        return
+    for item in items:
+        start = time.perf_counter()
+        yield item
+        profile.record(name, time.perf_counter() - start)
+
+
+# --- Sidebar panel ---
+def start_rerun(page):
+    """
+    Render the panel's controls and start profiling this rerun if enabled.
+    Call at the top of a page, before any instrumented work.
+    """
+    import streamlit as st
+
+    # A rerun cut short by st.stop()/st.rerun() never reached finish_rerun()
+    leftover = _current.get()
+    if leftover is not None:
+        leftover.stop()
+
+    with st.sidebar:
+        enabled = st.toggle("⏱ Timing panel", key="profiling_enabled")
+        capture = enabled and st.button("Profile this rerun (cProfile)", key="profiling_cprofile")
+    profile = RerunProfile(page, cprofile=capture) if enabled else None
+    _current.set(profile)
+    return profile
+
+
+def finish_rerun():
+    """Stop profiling and render the timing panel. Call at the end of a page."""
+    import streamlit as st
+
+    profile = _current.get()
+    _current.set(None)
+    if profile is None:
+        return
+    profile.stop()
+
+    with st.sidebar:
+        st.caption(f"{profile.page}: rerun took {profile.total * 1000:.1f} ms")
+        timings = profile.timings()
+        if timings:
+            st.dataframe(
+                [{
+                    "Step": row["name"],
+                    "Calls": row["calls"],
+                    "Total ms": round(row["total_ms"], 2),
+                    "p95 ms": round(row["p95_ms"], 2),
+                    "% of rerun": round(row["share"] * 100, 1),
+                } for row in timings],
+                hide_index=True,
+            )
+        caches = [row for row in profile.cache_rates() if row["hits"] or row["misses"]]
+        for row in caches:
+            st.caption(f"{row['name']}: {row['hits']} hits, {row['misses']} misses ({row['hit_rate']:.0%})")
+        st.download_button(
+            "Export timings (JSON)", profile.to_json(), "rerun_profile.json", "application/json",
+            key="profiling_export",
+        )
+        if profile.cprofile_text:
+            with st.expander("cProfile (cumulative)"):
+                st.code(profile.cprofile_text)
+        st.toggle("Show debug output", key="profiling_debug")
+
+
+@contextmanager
+def profiled_rerun(page):
+    """
+    Run the block as one profiled rerun: start_rerun() before it and
+    finish_rerun() after it, even when st.stop() or st.rerun() ends the
+    page early.
+    """
+    start_rerun(page)
+    try:
+        yield
+    except BaseException:
+        # Cut short: stop the profile, but any further st call would only
+        # raise again, so the panel is skipped
+        profile = _current.get()
+        _current.set(None)
+        if profile is not None:
+            profile.stop()
+        raise
+    finish_rerun()
+
+
+def debug_enabled():
+    """Whether the page should show its raw debug output."""
+    import streamlit as st
+
+    return bool(st.session_state.get("profiling_enabled") and st.session_state.get("profiling_debug"))
@@ -1,465 +1,281 @@
+import hashlib
+import io
+
 import pandas as pd
-from rapidfuzz import fuzz
 import streamlit as st
 
-
-# ✅ Ensure shopping list exists
-if "shopping_list" not in st.session_state:
-    st.session_state.shopping_list = []
-
-if "pantry" not in st.session_state:
-    st.session_state.pantry = {}
-
-def normalize_ingredient_line(line):
-    """Normalize a single ingredient line for consistency."""
-
-    # Lowercase
-    line = line.lower().strip()
-
-    # Replace unicode fractions
-    unicode_map = {
-        "½": "1/2",
-        "⅓": "1/3",
-        "⅔": "2/3",
-        "¼": "1/4",
-        "¾": "3/4",
-        "⅛": "1/8",
-    }
-    for uni, ascii_val in unicode_map.items():
-        line = line.replace(uni, ascii_val)
-
-    # Normalize units
-    unit_map = {
-        "tsp": "teaspoon",
-        "tsps": "teaspoon",
-        "tbsp": "tablespoon",
-        "tbsps": "tablespoon",
-        "g": "gram",
-        "kg": "kilogram",
-        "ml": "milliliter",
-        "l": "liter",
-        "cup": "cup",
-        "cups": "cup",
-    }
-    for short, full in unit_map.items():
-        line = line.replace(f" {short} ", f" {full} ")
-
-    # Normalize plurals (simple version)
-    plural_map = {
-        "eggs": "egg",
-        "bananas": "banana",
-        "tomatoes": "tomato",
-        "potatoes": "potato",
-        "berries": "berry",
-        "cloves": "clove",
-    }
-    for plural, singular in plural_map.items():
-        if line.endswith(plural):
-            line = line.replace(plural, singular)
-
-    # Remove trailing punctuation
-    line = line.rstrip(",. ")
-
-    return line
-
-def clean_ingredient_text(text):
-    if not isinstance(text, str):
-        return ""
-    return (
-        text.replace("\r", "\n")        # normalize Windows line breaks
-            .replace("\u2028", "\n")   # remove unicode line separators
-            .replace("\xa0", " ")      # replace non-breaking spaces
-            .replace(",", "\n")        # split comma-separated ingredients into lines
-            .strip()
-    )
-
-UNIT_MAP = {
-    "g": ("g", 1), "gram": ("g", 1), "grams": ("g", 1),
-    "kg": ("g", 1000), "kilogram": ("g", 1000), "kilograms": ("g", 1000),
-
-    "ml": ("ml", 1), "millilitre": ("ml", 1), "milliliter": ("ml", 1),
-    "l": ("ml", 1000), "litre": ("ml", 1000), "liter": ("ml", 1000),
-
-    "tbsp": ("tbsp", 1), "tablespoon": ("tbsp", 1), "tablespoons": ("tbsp", 1),
-    "tsp": ("tsp", 1), "teaspoon": ("tsp", 1), "teaspoons": ("tsp", 1),
-    "cup": ("cup", 1), "cups": ("cup", 1)
-}
-
-
-from fractions import Fraction
-import re
-
-def fraction_to_float(text):
-    # Clean weird spaces
-    text = (
-        text.replace("\u00A0", " ")
-            .replace("\u2009", " ")
-            .replace("\u202F", " ")
-            .replace("\u200A", " ")
-            .replace("\u200B", "")
-            .replace("\uFEFF", "")
-    )
-
-    unicode_fracs = {
-        "¼": 1/4, "½": 1/2, "¾": 3/4,
-        "⅐": 1/7, "⅑": 1/9, "⅒": 1/10,
-        "⅓": 1/3, "⅔": 2/3,
-        "⅕": 1/5, "⅖": 2/5, "⅗": 3/5, "⅘": 4/5,
-        "⅙": 1/6, "⅚": 5/6,
-        "⅛": 1/8, "⅜": 3/8, "⅝": 5/8, "⅞": 7/8,
-    }
-
-    # Replace unicode fractions with numeric equivalents (as decimals)
-    for sym, val in unicode_fracs.items():
-        text = text.replace(sym, f" {val} ")
-
-    text = text.strip()
-    # Collapse multiple spaces
-    text = " ".join(text.split())
-
-    # Try mixed number patterns first
-    parts = text.split()
-
-    # Case 1: "2 1/2" (whole + normal fraction)
-    if len(parts) == 2 and "/" in parts[1]:
-        try:
-            return float(parts[0]) + float(Fraction(parts[1]))
-        except:
-            pass
-
-    # Case 2: "2 0.5" (whole + decimal from unicode fraction)
-    if len(parts) == 2 and "/" not in parts[1]:
-        try:
-            return float(parts[0]) + float(parts[1])
-        except:
-            pass
-
-    # Case 3: simple fraction like "1/2"
-    if "/" in text:
-        try:
-            return float(Fraction(text))
-        except:
-            return None
-
-    # Case 4: plain decimal or integer ("0.5", "2", "0.3333")
-    try:
-        return float(text)
-    except:
-        return None
-
-def singularize(item):
-    item = item.strip().lower()
-
-    irregular = {
-        "tomatoes": "tomato", "potatoes": "potato",
-        "leaves": "leaf", "knives": "knife",
-        "loaves": "loaf", "berries": "berry",
-        "cloves": "clove",
-    }
-
-    if item in irregular:
-        return irregular[item]
-
-    if item.endswith("ies"):
-        return item[:-3] + "y"
-
-    if item.endswith("es") and not item.endswith(("ches", "shes", "xes", "sses")):
-        return item[:-2]
-
-    if item.endswith("s"):
-        return item[:-1]
-
-    return item
-
-
-
-def parse_ingredient(ingredient):
-    ingredient = ingredient.strip().lower()
-
-    # ✅ Normalise all weird spaces
-    ingredient = (
-        ingredient.replace("\u00A0", " ")  # non-breaking space
-                  .replace("\u2009", " ")  # thin space
-                  .replace("\u202F", " ")  # narrow no-break space
-                  .replace("\u200A", " ")  # hair space
-                  .replace("\u200B", "")   # zero-width space
-                  .replace("\uFEFF", "")   # zero-width no-break space
-    )
-
-    # ✅ Extract the amount chunk (VERY permissive)
-    amount_match = re.match(
-        r"^([0-9\s\/\.\¼\½\¾\⅐\⅑\⅒\⅓\⅔\⅕\⅖\⅗\⅘\⅙\⅚\⅛\⅜\⅝\⅞]+)",
-        ingredient
+from catalogue import (
+    CATALOGUE_PATH,
+    IMPORT_TYPES,
+    SHARED_CATALOGUE,
+    load_catalogue,
+    save_catalogue,
+    stream_import,
+    use_catalogue,
+)
+from paging import compact_mode, load_more_button, page_limit, reset_page
+from pantry import session_pantry
+from profiling import debug_enabled, profiled_rerun, register_cache, timed_loop
+from search import full_text_search, get_live_search
+from shopping import session_shopping_list
+from storage import save_pantry, save_shopping_list
+from utils import clean_ingredient_text, format_amount
+
+
+@st.cache_data(max_entries=8, show_spinner=False)
+def load_recipe_file(digest, name, _data, _progress=None):
+    """
+    Stream-import a workbook/CSV/JSONL file. Cached on `digest` (hash of the
+    file bytes), so each distinct file is read and parsed exactly once.
+    Returns (recipes, ingredient_store).
+    """
+    return stream_import(io.BytesIO(_data), name, progress=_progress)
+
+
+def search_cache_counters():
+    cache = SHARED_CATALOGUE.current().search_cache
+    return cache.hits, cache.misses
+
+
+# Shared by every session, so other users' searches count too
+register_cache("search results (all sessions)", search_cache_counters)
+
+
+def main():
+    # ✅ Ensure shopping list exists
+    shopping = session_shopping_list(st.session_state)
+
+    pantry = session_pantry(st.session_state)
+
+    # One catalogue per process, loaded from the database or the saved
+    # catalogue file on first use; the session only keeps a reference to
+    # the snapshot it is showing
+    catalogue = use_catalogue(st.session_state)
+    uploaded_file = st.file_uploader("Upload your recipe spreadsheet", type=IMPORT_TYPES + ["arrow"])
+
+    if uploaded_file is not None:
+        data = uploaded_file.getvalue()
+        digest = hashlib.sha256(data).hexdigest()
+
+        # Reruns with the same file keep the current catalogue (including
+        # added recipes), and so does a file another session already loaded
+        if digest not in (st.session_state.get("recipes_digest"), catalogue.digest):
+            if uploaded_file.name.endswith(".arrow"):
+                # Exported catalogue: already normalized and parsed
+                df, store = load_catalogue(data)
+            else:
+                # ⭐ Rows are cleaned, normalized and parsed once while streaming
+                progress_bar = st.progress(0.0, text="Importing recipes...")
+
+                def report_progress(done, fraction):
+                    progress_bar.progress(min(fraction or 0.0, 1.0), text=f"Imported {done:,} recipes...")
+
+                df, store = load_recipe_file(digest, uploaded_file.name, data, report_progress)
+                progress_bar.empty()
+            st.session_state.recipes_digest = digest
+            if df.empty:
+                # Keep the current catalogue rather than replacing it with nothing
+                st.error(f"No recipes found in {uploaded_file.name}.")
+            else:
+                catalogue = SHARED_CATALOGUE.replace(df, store, digest)
+                st.session_state.catalogue = catalogue
+                st.success("Recipes loaded and normalized!")
+                if "Ingredients" in df.columns:
+                    st.write(df["Ingredients"].head())
+
+    # --- Manual recipe entry form ---
+    with st.form("add_recipe"):
+        recipe_name = st.text_input("Recipe Name")
+        ingredients = st.text_area("Ingredients (comma-separated)")
+        servings = st.number_input("Number of servings", min_value=1, step=1)
+        submitted = st.form_submit_button("Add Recipe")
+
+    if submitted and recipe_name.strip() and ingredients.strip():
+        new_recipe = pd.DataFrame([{
+            "Recipe Name": recipe_name.strip(),
+            "Ingredients": [i.strip().lower() for i in ingredients.split(",")],
+            "Servings": servings
+        }])
+        # Copy-on-write: sessions still showing the previous snapshot keep it
+        catalogue = SHARED_CATALOGUE.append(new_recipe)
+        st.session_state.catalogue = catalogue
+
+        st.success(f"Added recipe: {recipe_name} ({servings} servings)")
+
+    # --- Save the catalogue for fast loading next session ---
+    if not catalogue.empty and st.button("Save catalogue"):
+        save_catalogue(catalogue.recipes, catalogue.store, revision=catalogue.revision)
+        st.success(f"Saved {len(catalogue)} recipes to {CATALOGUE_PATH}")
+
+    # --- UI ---
+    st.title("📖 Recipe Finder")
+    if debug_enabled():
+        st.write("DF HEAD:", catalogue.recipes.head())
+        st.write("DF TYPES:", catalogue.recipes.dtypes)
+    mode = st.radio(
+        "Search mode", ["Ingredients", "Live (as you type)", "Full text (names & ingredients)"], horizontal=True
     )
-
-    if not amount_match:
-        return None, None, singularize(ingredient)
-
-    amount_text = amount_match.group(1).strip()
-    rest = ingredient[len(amount_text):].strip()
-
-    # ✅ Extract unit
-    unit_match = re.match(r"^([a-zA-Z]+)", rest)
-    if not unit_match:
-        return None, None, singularize(rest)
-
-    unit = unit_match.group(1).lower()
-    item = rest[len(unit):].strip()
-
-    # ✅ Convert amount using the robust fraction parser
-    amount = fraction_to_float(amount_text)
-    if amount is None:
-        return None, None, singularize(item)
-
-    # ✅ Normalise unit
-    if unit in UNIT_MAP:
-        norm_unit, multiplier = UNIT_MAP[unit]
-        return amount * multiplier, norm_unit, singularize(item)
-
-    return amount, unit, singularize(item)
-def combine_ingredients(ingredients):
-    combined = {}
-
-    for ing in ingredients:
-        amount, unit, item = parse_ingredient(ing)
-        key = (item, unit)
-
-        if key not in combined:
-            combined[key] = 0
-
-        if amount is not None:
-            combined[key] += amount
+    full_text = mode.startswith("Full text")
+    live = mode.startswith("Live")
+    if full_text:
+        search_input = st.text_input("Search recipe names and ingredients:")
+    else:
+        search_input = st.text_input(
+            "Enter ingredients (comma separated):",
+            key="live_input" if live else None,
+            help="Results re-rank each time you add or remove a term." if live else None,
+        )
+        threshold = st.slider("Threshold (strictness)", 50, 100, 85)
+        min_percentage = st.slider("Minimum overlap (% of search terms)", 0, 100, 50) / 100.0
+
+    # --- Step 1: Search trigger ---
+    total_matches = None
+    if live:
+        # Re-ranked on every edit: only new terms are scored, and only for
+        # recipes that can still reach the visible page
+        live_search = get_live_search(st.session_state, catalogue.index, threshold)
+        terms = [term.strip() for term in search_input.split(",") if term.strip()]
+        st.session_state.matches, total_matches = live_search.search(
+            terms, min_percentage, k=page_limit("matches")
+        )
+    elif st.button("Search"):
+        if search_input.strip() and full_text:
+            # Prefix and typo tolerant, BM25-ranked; the index is built on first use
+            st.session_state.matches = full_text_search(catalogue.text_index, search_input, limit=200)
+            reset_page("matches")
+        elif search_input.strip():
+            st.session_state.search_terms = [term.strip() for term in search_input.split(",")]
         else:
-            combined[key] += 1
-
-    return combined
-
-def format_amount(amount, unit):
-    if unit == "g" and amount >= 1000:
-        return f"{amount/1000:.1f}kg"
-    if unit == "ml" and amount >= 1000:
-        return f"{amount/1000:.1f}l"
-    return f"{amount}{unit}" if unit else str(amount)
-
-# Ensure recipes exist in session state
-uploaded_file = st.file_uploader("Upload your recipe spreadsheet", type=["xlsx"])
-
-if "recipes" not in st.session_state:
-    st.session_state.recipes = pd.DataFrame()
-
-if uploaded_file is not None:
-    df = pd.read_excel(uploaded_file)
-    df["Ingredients"] = df["Ingredients"].apply(
-        lambda x: [
-            i.strip() for i in clean_ingredient_text(str(x)).split("\n")
-        ]
-    )
-
-    st.session_state.recipes = df
-    st.success("Recipes loaded!")
-    st.write(df["Ingredients"].head())
-    
-# --- Manual recipe entry form ---
-with st.form("add_recipe"):
-    recipe_name = st.text_input("Recipe Name")
-    ingredients = st.text_area("Ingredients (comma-separated)")
-    servings = st.number_input("Number of servings", min_value=1, step=1)
-    submitted = st.form_submit_button("Add Recipe")
-
-if submitted and recipe_name.strip() and ingredients.strip():
-    new_recipe = pd.DataFrame([{
-        "Recipe Name": recipe_name.strip(),
-        "Ingredients": [i.strip().lower() for i in ingredients.split(",")],
-        "Servings": servings
-    }])
-    st.session_state.recipes = pd.concat([st.session_state.recipes, new_recipe], ignore_index=True)
-
-    # Normalize safeguard
-    st.session_state.recipes["Ingredients"] = st.session_state.recipes["Ingredients"].apply(
-        lambda x: x if isinstance(x, list) else [i.strip().lower() for i in str(x).split(",")]
-    )
-
-    st.success(f"Added recipe: {recipe_name} ({servings} servings)")
-
-def search_recipes(recipes, search_terms, threshold=0.5, min_percentage=0):
-    search_ingredients = [s.strip().lower() for s in search_terms]
-    results = []
-
-    for _, row in recipes.iterrows():
-        recipe_name = row["Recipe Name"]
-        recipe_ingredients = row["Ingredients"]
-
-        # ⭐ Convert string → list if needed (THIS FIXES THE CHARACTER ISSUE)
-        if isinstance(recipe_ingredients, str):
-            recipe_ingredients = [
-                i.strip() for i in clean_ingredient_text(recipe_ingredients).split("\n")
-            ]
-
-        overlap = []
-        for s in search_ingredients:
-            for r in recipe_ingredients:
-                score = fuzz.partial_ratio(s, r)
-                if score >= threshold:
-                    overlap.append((r, score))
-                    break
-
-        match_fraction = len(overlap) / len(search_ingredients) if search_ingredients else 0
-
-        if match_fraction >= min_percentage:
-            results.append({
-                "Recipe": recipe_name,
-                "Matched Ingredients": overlap,
-                "Match Count": len(overlap),
-                "Match %": round(match_fraction * 100, 1)
-            })
-
-    results = sorted(results, key=lambda x: x["Match Count"], reverse=True)
-    return results
-
-if uploaded_file is not None:
-    df = pd.read_excel(uploaded_file)
-
-    # Convert string → list
-    df["Ingredients"] = df["Ingredients"].apply(
-        lambda x: [
-            i.strip() for i in clean_ingredient_text(str(x)).split("\n")
-        ]
-    )
-
-    # ⭐ Normalize each ingredient line
-    df["Ingredients"] = df["Ingredients"].apply(
-        lambda lst: [normalize_ingredient_line(i) for i in lst]
-    )
-
-    st.session_state.recipes = df
-    st.success("Recipes loaded and normalized!")
-
-# --- UI ---
-st.title("📖 Recipe Finder")
-st.write("DF HEAD:", st.session_state.recipes.head())
-st.write("DF TYPES:", st.session_state.recipes.dtypes)
-search_input = st.text_input("Enter ingredients (comma separated):")
-threshold = st.slider("Threshold (strictness)", 50, 100, 85)
-min_percentage = st.slider("Minimum overlap (% of search terms)", 0, 100, 50) / 100.0
-
-# --- Step 1: Search trigger ---
-if st.button("Search"):
-    if search_input.strip():
-        search_terms = [term.strip() for term in search_input.split(",")]
-        st.session_state.matches = search_recipes(
-            st.session_state.recipes,
-            search_terms,
+            st.error("Please enter at least one ingredient.")
+
+    # The active ingredient search follows the sliders; repeated queries and
+    # slider positions are served from the session's result cache
+    if mode == "Ingredients" and st.session_state.get("search_terms"):
+        matches = catalogue.search_cache.search(
+            catalogue.index,
+            st.session_state.search_terms,
             threshold=threshold,
-            min_percentage=min_percentage
+            min_percentage=min_percentage,
         )
-    else:
-        st.error("Please enter at least one ingredient.")
-
-# --- Step 2: Results display ---
-if "matches" in st.session_state and st.session_state.matches:
-    for match in st.session_state.matches:
-
-        recipe_row = st.session_state.recipes[
-            st.session_state.recipes["Recipe Name"] == match["Recipe"]
-        ].iloc[0]
-        servings = recipe_row.get("Servings", "N/A")
-
-        # Always convert ingredients to a clean list
-        ingredients_list = recipe_row["Ingredients"]
-        if isinstance(ingredients_list, str):
-            ingredients_list = [
-                i.strip() for i in clean_ingredient_text(ingredients_list).split("\n")
-            ]
-
-        st.subheader(f"{match['Recipe']} → {match['Match %']}% overlap")
-        st.write(f"Servings: {servings}")
-        st.write(f"Matched {match['Match Count']} terms")
-
-        for ing, score in match["Matched Ingredients"]:
-            st.write(f"- {ing} (similarity score: {score})")
+        if matches is not st.session_state.get("matches"):
+            st.session_state.matches = matches
+            reset_page("matches")
+
+    # --- Step 2: Results display ---
+    if "matches" in st.session_state and st.session_state.matches:
+        parsed_recipes = catalogue.lines
+
+        # Matches are already ranked; only build widgets for the visible page
+        visible = st.session_state.matches[:page_limit("matches")]
+
+        if compact_mode("matches"):
+            st.dataframe(pd.DataFrame([{
+                "Recipe": match["Recipe"],
+                "Match %": match["Match %"],
+                "Match Count": match["Match Count"],
+                "Matched Ingredients": ", ".join(ing for ing, _ in match["Matched Ingredients"]),
+            } for match in visible]), hide_index=True)
+            cards = []
+        else:
+            cards = visible
 
-        # --- Add to shopping list ---
-        if st.button(f"Add {match['Recipe']} to shopping list", key=f"add_{match['Recipe']}"):
-            st.session_state.shopping_list.extend(ingredients_list)
-            st.success(f"Added all ingredients from {match['Recipe']} to shopping list!")
+        for match in timed_loop("render: result card", cards):
 
-        with st.expander("Show all ingredients"):
+            recipe_id = match["Recipe ID"]
+            if recipe_id >= len(catalogue) or str(catalogue.recipes["Recipe Name"].iat[recipe_id]) != str(match["Recipe"]):
+                # Found in a catalogue that has since been replaced
+                continue
+            recipe_row = catalogue.recipes.iloc[recipe_id]
+            parsed_lines = parsed_recipes.get(recipe_id, [])
+            servings = recipe_row.get("Servings", "N/A")
 
-            # Force conversion INSIDE the expander
-            raw_ingredients = recipe_row["Ingredients"]
+            st.subheader(f"{match['Recipe']} → {match['Match %']}% overlap")
+            st.write(f"Servings: {servings}")
+            st.write(f"Matched {match['Match Count']} terms")
 
-            st.write("RAW:", raw_ingredients)
-            st.write("TYPE:", type(raw_ingredients))
+            for ing, score in match["Matched Ingredients"]:
+                st.write(f"- {ing} (similarity score: {score})")
 
-            # Convert string → list
-            if isinstance(raw_ingredients, str):
-                cleaned_list = [
-                    i.strip() for i in clean_ingredient_text(raw_ingredients).split("\n")
-                ]
-            else:
-                cleaned_list = raw_ingredients
+            # --- Add to shopping list ---
+            if st.button(f"Add {match['Recipe']} to shopping list", key=f"add_{match['Recipe']}"):
+                shopping.add_lines(parsed_lines)
+                save_shopping_list(shopping)
+                st.success(f"Added all ingredients from {match['Recipe']} to shopping list!")
 
-            st.write("CLEANED LIST:", cleaned_list)
+            with st.expander("Show all ingredients"):
 
-            # Loop over the ACTUAL list
-            for ing in cleaned_list:
-                st.write(f"- {ing}")
+                # Force conversion INSIDE the expander
+                raw_ingredients = recipe_row["Ingredients"]
 
+                if debug_enabled():
+                    st.write("RAW:", raw_ingredients)
+                    st.write("TYPE:", type(raw_ingredients))
 
-        # --- SMART PANTRY COMPARISON ---
-        missing = []
-        can_make = True
+                # Convert string → list
+                if isinstance(raw_ingredients, str):
+                    cleaned_list = [
+                        i.strip() for i in clean_ingredient_text(raw_ingredients).split("\n")
+                    ]
+                else:
+                    cleaned_list = raw_ingredients
 
-        for ing in ingredients_list:
-            req_amount, req_unit, req_item = parse_ingredient(ing)
-            key = (req_item, req_unit)
+                if debug_enabled():
+                    st.write("CLEANED LIST:", cleaned_list)
 
-            pantry_amount = st.session_state.pantry.get(key, 0)
+                # Loop over the ACTUAL list
+                for ing in cleaned_list:
+                    st.write(f"- {ing}")
 
-            if req_amount is None:
-                continue
 
-            if pantry_amount < req_amount:
-                can_make = False
-                missing.append((req_item, req_unit, req_amount - pantry_amount))
+            # --- SMART PANTRY COMPARISON ---
+            # Quantities are compared across units (cup vs tbsp, g vs kg, ...)
+            missing, short, _ = pantry.shortfall(parsed_lines)
+            can_make = not missing and not short
 
-        if can_make:
-            st.success("✅ You can make this recipe with what you have!")
-        else:
-            st.warning("⚠️ You're missing some ingredients:")
-            for item, unit, amt in missing:
-                if unit:
-                    st.write(f"- {format_amount(amt, unit)} {item}")
+            if can_make:
+                st.success("✅ You can make this recipe with what you have!")
+            else:
+                st.warning("⚠️ You're missing some ingredients:")
+                for item, unit, amt in missing + short:
+                    if unit:
+                        st.write(f"- {format_amount(amt, unit)} {item}")
+                    else:
+                        st.write(f"- {item} (x{amt})")
+
+            # --- Cook button ---
+            if st.button(f"Cook {match['Recipe']}", key=f"cook_{match['Recipe']}"):
+                cooked, _, _ = pantry.cook(parsed_lines)
+                if cooked:
+                    save_pantry(pantry)
+                    st.success(f"Updated pantry after cooking {match['Recipe']}.")
                 else:
-                    st.write(f"- {item} (x{amt})")
+                    st.error(f"The pantry doesn't cover {match['Recipe']}; nothing was deducted.")
 
-        # --- Cook button ---
-        if st.button(f"Cook {match['Recipe']}", key=f"cook_{match['Recipe']}"):
-            for ing in ingredients_list:
-                amt, unit, item = parse_ingredient(ing)
-                key = (item, unit)
+        load_more_button(
+            "matches", len(visible), len(st.session_state.matches) if total_matches is None else total_matches
+        )
 
-                if amt is not None and key in st.session_state.pantry:
-                    st.session_state.pantry[key] = max(0, st.session_state.pantry[key] - amt)
+    # --- Shopping list display ---
+    st.header("🛒 Shopping List")
 
-            st.success(f"Updated pantry after cooking {match['Recipe']}.")
+    # Clear/reset button
+    if st.button("Clear shopping list"):
+        shopping.clear()
+        save_shopping_list(shopping)
+        st.success("Shopping list cleared!")
 
-# --- Shopping list display ---
-st.header("🛒 Shopping List")
+    if shopping:
+        # Totals are kept up to date as entries are added
+        for line in shopping.lines():
+            st.write(line)
 
-# Clear/reset button
-if st.button("Clear shopping list"):
-    st.session_state.shopping_list = []
-    st.success("Shopping list cleared!")
+        col_text, col_csv = st.columns(2)
+        col_text.download_button("Export as text", shopping.to_text(), "shopping_list.txt", "text/plain")
+        col_csv.download_button("Export as CSV", shopping.to_csv(), "shopping_list.csv", "text/csv")
+    else:
+        st.write("Your shopping list is empty.")
 
-if st.session_state.shopping_list:
-    combined = combine_ingredients(st.session_state.shopping_list)
 
-    for (item, unit), amount in combined.items():
-        if unit:
-            formatted = format_amount(amount, unit)
-            st.write(f"- {formatted} {item}")
-        else:
-            st.write(f"- {item} (x{amount})")
-else:
-    st.write("Your shopping list is empty.")
\ No newline at end of file
+if __name__ == "__main__":
+    with profiled_rerun("Recipe Finder"):
+        main()
\ No newline at end of file
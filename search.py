@@ -0,0 +1,568 @@
+# search.py
+import itertools
+import math
+import re
+import threading
+from bisect import bisect_left
+from collections import OrderedDict, defaultdict
+
+import numpy as np
+
+from profiling import instrumented
+from utils import clean_ingredient_text
+
+# Character n-gram size used for candidate pruning
+NGRAM = 2
+
+# Every IngredientIndex gets a new catalogue version
+_catalogue_versions = itertools.count(1)
+
+
+def ingredient_lines(ingredients_cell):
+    """Return the ingredient lines of a recipe cell as a list of strings."""
+    if isinstance(ingredients_cell, str):
+        return [i.strip() for i in clean_ingredient_text(ingredients_cell).split("\n")]
+    if isinstance(ingredients_cell, list):
+        return ingredients_cell
+    return []
+
+
+def _ngrams(text, n=NGRAM):
+    return [text[i:i + n] for i in range(len(text) - n + 1)]
+
+
+# --- Lower bound on shared n-grams for a partial_ratio match ---
+def min_shared_ngrams(length, threshold, n=NGRAM):
+    """
+    Smallest number of term n-grams a line must contain to score >= threshold.
+
+    partial_ratio aligns the shorter string (`length` chars) against windows
+    of the longer one no longer than itself, so a score of T needs a common
+    subsequence of at least T*length/(200-T) chars. Every gap in that
+    alignment can break at most n-1 n-grams, which gives the bound below.
+    A result <= 0 means the line cannot be pruned.
+    """
+    if length == 0 or threshold <= 0:
+        return 0
+    if threshold >= 200:
+        return length
+    lcs = min(length, math.ceil(threshold * length / (200 - threshold) - 1e-9))
+    return lcs - (n - 1) * (1 + 2 * (length - lcs))
+
+
+# --- Persistent inverted index over the recipe catalogue ---
+class IngredientIndex:
+    """
+    Inverted index built once per catalogue.
+
+    by_gram maps character n-grams to the ids of the ingredient lines that
+    contain them, in ascending order. `version` identifies the catalogue the
+    index was built from; results cached for an older version are stale.
+    """
+
+    @instrumented("IngredientIndex build")
+    def __init__(self, recipes):
+        self.version = next(_catalogue_versions)
+        self.names = []
+        self.offsets = [0]
+        self.lines = []
+        self.line_recipe = np.empty(0, dtype=np.intp)
+        self.by_gram = defaultdict(list)
+        self.by_length = defaultdict(list)
+
+        if recipes is None or recipes.empty:
+            return
+
+        line_recipe = []
+        for pos, (name, cell) in enumerate(zip(recipes["Recipe Name"], recipes["Ingredients"])):
+            self.names.append(name)
+            for line in ingredient_lines(cell):
+                line_id = len(self.lines)
+                self.lines.append(line)
+                line_recipe.append(pos)
+                self.by_length[len(line)].append(line_id)
+                for gram in set(_ngrams(line.lower())):
+                    self.by_gram[gram].append(line_id)
+            self.offsets.append(len(self.lines))
+
+        self.line_recipe = np.asarray(line_recipe, dtype=np.intp)
+
+    def __len__(self):
+        return len(self.names)
+
+    def candidate_lines(self, term, threshold):
+        """
+        Sorted ids of the lines that could score >= threshold against term,
+        or None when the term is too short to prune anything.
+        """
+        grams = _ngrams(term.lower())
+        term_len = len(term)
+        if min_shared_ngrams(term_len, threshold) <= 0:
+            return None
+
+        shared = defaultdict(int)
+        for gram in grams:
+            for line_id in self.by_gram.get(gram, ()):
+                shared[line_id] += 1
+
+        candidates = [
+            line_id for line_id, count in shared.items()
+            if count >= min_shared_ngrams(min(term_len, len(self.lines[line_id])), threshold)
+        ]
+        # Lines short enough that they share no n-gram and could still match
+        for length, ids in self.by_length.items():
+            if length < term_len and min_shared_ngrams(length, threshold) <= 0:
+                candidates.extend(i for i in ids if i not in shared)
+        candidates.sort()
+        return candidates
+
+
+def _first_hits(index, search_ingredients, threshold):
+    """
+    Score every term against the candidate lines in one cdist call.
+    Returns one dict per term mapping recipe position -> (line, score)
+    for the first line of that recipe scoring >= threshold.
+    """
+    columns = set()
+    for s in search_ingredients:
+        candidates = index.candidate_lines(s, threshold)
+        if candidates is None:
+            columns = None
+            break
+        columns.update(candidates)
+
+    if columns is None:
+        columns = np.arange(len(index.lines))
+    else:
+        columns = np.fromiter(sorted(columns), dtype=np.intp, count=len(columns))
+
+    if not search_ingredients or len(columns) == 0:
+        return [{} for _ in search_ingredients]
+
+    from rapidfuzz import fuzz, process
+
+    scores = process.cdist(
+        search_ingredients,
+        [index.lines[i] for i in columns],
+        scorer=fuzz.partial_ratio,
+        score_cutoff=threshold,
+        dtype=np.float64,
+        workers=-1,
+    )
+
+    first_hits = []
+    for row in scores:
+        hit_cols = np.flatnonzero(row >= threshold)
+        # Columns are in line order, so the first occurrence per recipe is its first hit
+        positions, first = np.unique(index.line_recipe[columns[hit_cols]], return_index=True)
+        hit_cols = hit_cols[first]
+        first_hits.append({
+            int(pos): (index.lines[columns[col]], float(row[col]))
+            for pos, col in zip(positions, hit_cols)
+        })
+    return first_hits
+
+
+@instrumented()
+def search_recipes(recipes, search_terms, threshold=0.5, min_percentage=0, index=None):
+    if index is None:
+        index = IngredientIndex(recipes)
+    search_ingredients = [s.strip().lower() for s in search_terms]
+    first_hits = _first_hits(index, search_ingredients, threshold)
+
+    counts = np.zeros(len(index), dtype=np.intp)
+    for hits in first_hits:
+        if hits:
+            counts[np.fromiter(hits, dtype=np.intp, count=len(hits))] += 1
+    fractions = counts / len(search_ingredients) if search_ingredients else counts.astype(float)
+
+    # Stable descending sort by match count, same order as sorting the full list
+    keep = np.flatnonzero(fractions >= min_percentage)
+    keep = keep[np.argsort(-counts[keep], kind="stable")]
+
+    results = []
+    for pos in keep.tolist():
+        overlap = [hits[pos] for hits in first_hits if pos in hits]
+        results.append({
+            "Recipe": index.names[pos],
+            "Recipe ID": pos,
+            "Matched Ingredients": overlap,
+            "Match Count": len(overlap),
+            "Match %": round(float(fractions[pos]) * 100, 1)
+        })
+    return results
+
+
+
+# --- Search result cache ---
+SEARCH_CACHE_SIZE = 64
+
+
+class SearchCache:
+    """
+    Bounded LRU of search_recipes() results keyed on (catalogue version,
+    sorted normalized terms, threshold, min_percentage).
+
+    Terms are searched in sorted order, so "egg, flour" and "flour, egg"
+    share one entry. A search against a new catalogue version drops
+    everything cached for the old one. Lookups are thread-safe; searches
+    themselves run outside the lock.
+    """
+
+    def __init__(self, maxsize=SEARCH_CACHE_SIZE):
+        self.maxsize = maxsize
+        self.version = None
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _key(self, index, search_terms, threshold, min_percentage):
+        terms = tuple(sorted(s.strip().lower() for s in search_terms))
+        return (index.version, terms, threshold, min_percentage)
+
+    def cached(self, index, search_terms, threshold=0.5, min_percentage=0):
+        """The cached results for this search, or None without searching."""
+        key = self._key(index, search_terms, threshold, min_percentage)
+        with self._lock:
+            results = self._entries.get(key) if index.version == self.version else None
+            if results is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+            return results
+
+    def search(self, index, search_terms, threshold=0.5, min_percentage=0):
+        key = self._key(index, search_terms, threshold, min_percentage)
+        terms = key[1]
+        with self._lock:
+            if index.version != self.version:
+                self._entries.clear()
+                self.version = index.version
+            results = self._entries.get(key)
+            if results is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return results
+            self.misses += 1
+
+        results = search_recipes(None, list(terms), threshold, min_percentage, index=index)
+        with self._lock:
+            if index.version == self.version:
+                self._entries[key] = results
+                if len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+        return results
+
+
+# --- Live (as-you-type) incremental search ---
+# Per-term score vectors kept by a LiveSearch; the least recently used
+# terms beyond this are dropped
+LIVE_TERM_CACHE = 32
+
+
+class LiveSearch:
+    """
+    Incremental top-k search_recipes() for a query edited one term at a time.
+
+    Each term keeps, per recipe, whether it has been scored yet and its
+    first matching line and score. Adding a term scores only that term and
+    removing one scores nothing. Terms are scored lazily: a recipe is only
+    scored for the terms it is missing while its upper bound (hits so far
+    plus unscored terms) can still reach the k-th best lower bound, so
+    scoring stops as soon as the top k is settled. The top k is exactly
+    the first k rows search_recipes() would return.
+    """
+
+    def __init__(self, index, threshold, maxsize=LIVE_TERM_CACHE):
+        self.index = index
+        self.version = index.version
+        self.threshold = threshold
+        self.maxsize = maxsize
+        self.scored_lines = 0
+        self._terms = OrderedDict()
+
+    def _vectors(self, term):
+        entry = self._terms.get(term)
+        if entry is not None:
+            self._terms.move_to_end(term)
+            return entry
+        n = len(self.index)
+        candidates = self.index.candidate_lines(term, self.threshold)
+        if candidates is None:
+            candidates = np.arange(len(self.index.lines), dtype=np.intp)
+        else:
+            candidates = np.asarray(candidates, dtype=np.intp)
+        entry = self._terms[term] = (
+            np.zeros(n, dtype=bool),  # scored
+            np.full(n, -1, dtype=np.intp),  # first matching line id
+            np.zeros(n),  # its score
+            candidates,
+        )
+        return entry
+
+    def _score(self, term, entry, recipes):
+        """Score `term` against the candidate lines of `recipes` not scored yet."""
+        scored, hit_line, hit_score, candidates = entry
+        todo = recipes & ~scored
+        scored |= todo
+        columns = candidates[todo[self.index.line_recipe[candidates]]]
+        if len(columns) == 0:
+            return
+
+        from rapidfuzz import fuzz, process
+
+        row = process.cdist(
+            [term],
+            [self.index.lines[i] for i in columns],
+            scorer=fuzz.partial_ratio,
+            score_cutoff=self.threshold,
+            dtype=np.float64,
+            workers=-1,
+        )[0]
+        self.scored_lines += len(columns)
+        hit_cols = np.flatnonzero(row >= self.threshold)
+        positions, first = np.unique(self.index.line_recipe[columns[hit_cols]], return_index=True)
+        hit_line[positions] = columns[hit_cols[first]]
+        hit_score[positions] = row[hit_cols[first]]
+
+    @instrumented()
+    def search(self, search_terms, min_percentage=0, k=20):
+        """
+        Top-k results in search_recipes() form, plus an upper bound on how
+        many recipes could pass min_percentage in total.
+        """
+        terms = [s.strip().lower() for s in search_terms]
+        if not terms or not len(self.index):
+            return [], 0
+        entries = [self._vectors(term) for term in terms]
+        while len(self._terms) > max(self.maxsize, len(set(terms))):
+            oldest = next(iter(self._terms))
+            if oldest in terms:
+                self._terms.move_to_end(oldest)
+            else:
+                del self._terms[oldest]
+
+        n = len(self.index)
+        # Smallest match count whose fraction passes, compared the way search_recipes does
+        min_count = next((c for c in range(len(terms) + 1) if c / len(terms) >= min_percentage), len(terms) + 1)
+        while True:
+            lower = np.zeros(n, dtype=np.intp)
+            upper = np.zeros(n, dtype=np.intp)
+            for scored, hit_line, _, _ in entries:
+                lower += hit_line >= 0
+                upper += (hit_line >= 0) | ~scored
+            kth = np.partition(lower, n - k)[n - k] if 0 < k < n else 0
+            contenders = upper >= max(kth, min_count)
+            pending = next(
+                ((term, entry) for term, entry in zip(terms, entries) if (contenders & ~entry[0]).any()),
+                None,
+            )
+            if pending is None:
+                break
+            # One term per round, so the bounds tighten before the next term is scored
+            self._score(*pending, contenders)
+
+        keep = np.flatnonzero(contenders & (lower >= min_count))
+        keep = keep[np.argsort(-lower[keep], kind="stable")][:k]
+
+        results = []
+        for pos in keep.tolist():
+            overlap = [
+                (self.index.lines[hit_line[pos]], float(hit_score[pos]))
+                for _, hit_line, hit_score, _ in entries if hit_line[pos] >= 0
+            ]
+            results.append({
+                "Recipe": self.index.names[pos],
+                "Recipe ID": pos,
+                "Matched Ingredients": overlap,
+                "Match Count": len(overlap),
+                "Match %": round(len(overlap) / len(terms) * 100, 1)
+            })
+        return results, int(np.count_nonzero(upper >= min_count))
+
+
+def get_live_search(state, index, threshold):
+    """The session's LiveSearch for this catalogue version and threshold."""
+    live = state.get("live_search")
+    if live is None or live.version != index.version or live.threshold != threshold:
+        live = state["live_search"] = LiveSearch(index, threshold)
+    return live
+
+
+# --- Full-text search over recipe names and ingredient text ---
+_WORD_RE = re.compile(r"[^\W_]+")
+
+# BM25F parameters; a word in the recipe name weighs as much as NAME_WEIGHT
+# occurrences in the ingredient text
+BM25_K1 = 1.2
+BM25_B = 0.75
+NAME_WEIGHT = 10.0
+INGREDIENTS_WEIGHT = 1.0
+
+# Query words shorter than this match whole words only (no prefix/typo lookup)
+MIN_EXPAND_LENGTH = 3
+
+
+def _words(text):
+    return _WORD_RE.findall(text.lower())
+
+
+def _max_typos(word):
+    return 1 if len(word) <= 5 else 2
+
+
+class TextIndex:
+    """
+    In-process BM25F index over "Recipe Name" and ingredient lines.
+
+    Postings are stored CSR-style per vocabulary word, with each posting's
+    BM25 term-frequency component precomputed, so a query is a few NumPy
+    gathers. Query words match vocabulary words by prefix; a word with no
+    prefix match is looked up through a character-trigram index over the
+    vocabulary and replaced by spellings within one or two edits.
+    """
+
+    @instrumented("TextIndex build")
+    def __init__(self, recipes):
+        self.names = []
+        self.offsets = [0]
+        self.lines = []
+        vocab = {}
+        term_ids, doc_ids, weighted = [], [], []
+        name_lengths, text_lengths = [], []
+
+        if recipes is not None and not recipes.empty:
+            docs = []
+            for name, cell in zip(recipes["Recipe Name"], recipes["Ingredients"]):
+                name = str(name)
+                lines = [line for line in ingredient_lines(cell) if line]
+                self.names.append(name)
+                self.lines.extend(lines)
+                self.offsets.append(len(self.lines))
+                name_words = _words(name)
+                text_words = [w for line in lines for w in _words(line)]
+                name_lengths.append(len(name_words))
+                text_lengths.append(len(text_words))
+                docs.append((name_words, text_words))
+
+            avg_name = max(np.mean(name_lengths), 1.0)
+            avg_text = max(np.mean(text_lengths), 1.0)
+            for doc, (name_words, text_words) in enumerate(docs):
+                name_norm = NAME_WEIGHT / (1 - BM25_B + BM25_B * name_lengths[doc] / avg_name)
+                text_norm = INGREDIENTS_WEIGHT / (1 - BM25_B + BM25_B * text_lengths[doc] / avg_text)
+                tf = defaultdict(float)
+                for w in name_words:
+                    tf[w] += name_norm
+                for w in text_words:
+                    tf[w] += text_norm
+                for w, value in tf.items():
+                    term_ids.append(vocab.setdefault(w, len(vocab)))
+                    doc_ids.append(doc)
+                    weighted.append(value)
+
+        self.words = list(vocab)
+        terms = np.asarray(term_ids, dtype=np.intp)
+        order = np.argsort(terms, kind="stable")
+        self.postings = np.asarray(doc_ids, dtype=np.intp)[order]
+        tfn = np.asarray(weighted, dtype=np.float64)[order]
+        self.impacts = tfn / (BM25_K1 + tfn)
+        self.starts = np.searchsorted(terms[order], np.arange(len(vocab) + 1))
+        df = np.diff(self.starts)
+        n_docs = len(self.names)
+        self.idf = np.log1p((n_docs - df + 0.5) / (df + 0.5))
+
+        # Sorted vocabulary for prefix ranges, trigram index for typo lookup
+        self._sorted = sorted(range(len(self.words)), key=self.words.__getitem__)
+        self._sorted_words = [self.words[i] for i in self._sorted]
+        self.by_gram = defaultdict(list)
+        for term, word in enumerate(self.words):
+            for gram in set(_ngrams(word, 3)):
+                self.by_gram[gram].append(term)
+
+    def __len__(self):
+        return len(self.names)
+
+    def expand(self, word):
+        """Vocabulary term ids a query word stands for (prefix matches, else close spellings)."""
+        if len(word) < MIN_EXPAND_LENGTH:
+            exact = bisect_left(self._sorted_words, word)
+            if exact < len(self._sorted_words) and self._sorted_words[exact] == word:
+                return [self._sorted[exact]]
+            return []
+
+        lo = bisect_left(self._sorted_words, word)
+        hi = bisect_left(self._sorted_words, word + "\uffff")
+        if lo < hi:
+            return self._sorted[lo:hi]
+
+        from rapidfuzz.distance import Levenshtein
+
+        limit = _max_typos(word)
+        candidates = {term for gram in _ngrams(word, 3) for term in self.by_gram.get(gram, ())}
+        return [
+            term for term in candidates
+            if min(Levenshtein.distance(word, self.words[term], score_cutoff=limit + 1),
+                   Levenshtein.distance(word, self.words[term][:len(word)], score_cutoff=limit + 1)) <= limit
+        ]
+
+    def search(self, query, limit=20):
+        """
+        Recipes containing every word of `query` (by prefix or close
+        spelling), best BM25F score first; ties keep catalogue order.
+        Returns ([(recipe position, score)], matched vocabulary words).
+        """
+        words = list(dict.fromkeys(_words(query)))
+        if not words or not len(self):
+            return [], set()
+
+        total = np.zeros(len(self))
+        required = np.ones(len(self), dtype=bool)
+        matched_words = set()
+        for word in words:
+            terms = self.expand(word)
+            if not terms:
+                return [], set()
+            best = np.zeros(len(self))
+            for term in terms:
+                docs = self.postings[self.starts[term]:self.starts[term + 1]]
+                np.maximum.at(best, docs, self.idf[term] * self.impacts[self.starts[term]:self.starts[term + 1]])
+                matched_words.add(self.words[term])
+            total += best
+            required &= best > 0
+
+        hits = np.flatnonzero(required)
+        if len(hits) > limit:
+            hits = hits[np.argpartition(-total[hits], limit - 1)[:limit]]
+        hits = hits[np.lexsort((hits, -total[hits]))]
+        return [(int(pos), float(total[pos])) for pos in hits], matched_words
+
+    def recipe_lines(self, pos):
+        return self.lines[self.offsets[pos]:self.offsets[pos + 1]]
+
+
+@instrumented()
+def full_text_search(index, query, limit=20):
+    """
+    Full-text mode: recipes whose name or ingredients contain every word of
+    `query`, as result dicts shaped like search_recipes() output. Matched
+    Ingredients lists the lines containing a matched word.
+    """
+    ranked, matched_words = index.search(query, limit)
+    results = []
+    for pos, score in ranked:
+        lines = [
+            (line, 100.0) for line in index.recipe_lines(pos)
+            if matched_words.intersection(_words(line))
+        ]
+        results.append({
+            "Recipe": index.names[pos],
+            "Recipe ID": pos,
+            "Matched Ingredients": lines,
+            "Match Count": len(lines),
+            "Match %": 100.0,
+            "Score": round(score, 3),
+        })
+    return results
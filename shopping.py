@@ -0,0 +1,149 @@
+# shopping.py
+import csv
+import io
+import threading
+
+from pantry import parsed_key
+from utils import format_amount, parse_ingredient, unit_dimension
+
+
+# --- Shopping list with a running aggregate ---
+class ShoppingList:
+    """
+    Pre-parsed shopping-list entries plus a running total per
+    (item, dimension), kept in the dimension's base unit (g, ml, count).
+
+    Adding lines only touches their own totals, so showing the consolidated
+    list never re-parses or re-sums the whole list. Amounts of one item are
+    shown in the unit it was first added in ("1 cup" + "4 tbsp" -> 1.25 cup);
+    lines without an amount count as 1.
+
+    Like Pantry, a ShoppingList can be shared between threads: changes and
+    reads of the entries happen under one short lock.
+    """
+
+    def __init__(self, entries=None):
+        self.entries = []
+        self._totals = {}   # (item, dimension) -> [total in base units, display unit]
+        self._lock = threading.RLock()
+        for entry in entries or ():
+            if isinstance(entry, dict):
+                self.add(entry.get("raw"), entry.get("quantity"), entry.get("unit"), entry.get("ingredient"))
+            else:
+                self.add_text(entry)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __iter__(self):
+        return iter(self.copy())
+
+    def copy(self):
+        """The entries as a new list, read under the lock."""
+        with self._lock:
+            return list(self.entries)
+
+    def add(self, raw, quantity, unit, ingredient):
+        """Add one parsed line; O(1)."""
+        item, unit_key = parsed_key(ingredient, unit)
+        if quantity is None:
+            dim, factor, amount = "count", 1.0, 1.0
+        else:
+            dim, factor = unit_dimension(unit_key)
+            amount = quantity * factor
+        with self._lock:
+            self.entries.append({"raw": raw, "quantity": quantity, "unit": unit, "ingredient": item})
+            total = self._totals.get((item, dim))
+            if total is None:
+                self._totals[(item, dim)] = [amount, unit_key if quantity is not None else None]
+            else:
+                total[0] += amount
+
+    def add_text(self, raw):
+        """Parse and add a free-text line such as "2 cups milk"."""
+        qty, unit, item = parse_ingredient(raw)
+        self.add(raw, qty, unit, item)
+
+    def add_lines(self, parsed_lines):
+        """Add a recipe's parsed lines [(raw, qty, unit, item)]."""
+        with self._lock:
+            for raw, qty, unit, item in parsed_lines:
+                self.add(raw, qty, unit, item)
+
+    def add_shortfall(self, shortfall):
+        """Add [(item, unit, amount)] as returned by Pantry.shortfall()."""
+        with self._lock:
+            for item, unit, amount in shortfall:
+                raw = " ".join(str(part) for part in (amount, unit, item) if part)
+                self.add(raw, amount, unit, item)
+
+    def clear(self):
+        with self._lock:
+            self.entries.clear()
+            self._totals.clear()
+
+    def consolidated(self):
+        """[(item, unit, amount)], one per item and dimension, in the order first added."""
+        with self._lock:
+            totals = [(item, total, unit) for (item, _), (total, unit) in self._totals.items()]
+        return [(item, unit, total / unit_dimension(unit)[1]) for item, total, unit in totals]
+
+    def lines(self):
+        """Consolidated list as display strings."""
+        out = []
+        for item, unit, amount in self.consolidated():
+            if unit:
+                out.append(f"- {format_amount(round(amount, 2), unit)} {item}")
+            else:
+                out.append(f"- {item} (x{round(amount, 2)})")
+        return out
+
+    def to_text(self):
+        return "\n".join(self.lines())
+
+    def to_csv(self):
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(["item", "quantity", "unit"])
+        for item, unit, amount in self.consolidated():
+            writer.writerow([item, round(amount, 3), unit or ""])
+        return buffer.getvalue()
+
+
+def _saved_shopping_list():
+    from storage import load_shopping_list
+
+    return load_shopping_list()
+
+
+class SharedShoppingList:
+    """
+    Holds the one ShoppingList of the whole process, loaded from the database
+    on first use, as pantry.SHARED_PANTRY does for the pantry: every session
+    and the API add to the same list, so save_shopping_list() always writes
+    all of it.
+    """
+
+    def __init__(self, loader=_saved_shopping_list):
+        self._loader = loader
+        self._current = None
+        self._lock = threading.Lock()
+
+    def current(self):
+        shopping = self._current
+        if shopping is None:
+            with self._lock:
+                if self._current is None:
+                    self._current = ShoppingList(self._loader())
+                shopping = self._current
+        return shopping
+
+
+SHARED_SHOPPING_LIST = SharedShoppingList()
+
+
+def session_shopping_list(state):
+    """The shared ShoppingList, recorded in state["shopping_list"] (st.session_state)."""
+    shopping = SHARED_SHOPPING_LIST.current()
+    state["shopping_list"] = shopping
+    return shopping
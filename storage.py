@@ -0,0 +1,274 @@
+# storage.py
+import json
+import os
+import sqlite3
+import threading
+import uuid
+
+import pandas as pd
+
+from catalogue import STORE_COLUMNS, lines_by_recipe
+from profiling import instrumented
+
+# --- Embedded SQLite database ---
+# Recipes, their parsed ingredient lines, the pantry and the shopping list
+# persist here between sessions.
+DB_PATH = os.environ.get("RECIPE_DB", "recipes.db")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS recipes (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    data TEXT NOT NULL              -- JSON of the recipe row, Ingredients as a list
+);
+CREATE INDEX IF NOT EXISTS idx_recipes_name ON recipes(name);
+
+CREATE TABLE IF NOT EXISTS ingredient_lines (
+    recipe_id INTEGER NOT NULL REFERENCES recipes(id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    raw TEXT NOT NULL,
+    quantity REAL,
+    unit TEXT,
+    item TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_lines_recipe ON ingredient_lines(recipe_id, position);
+
+-- Changes on every catalogue write; a saved Arrow catalogue records the
+-- revision it was saved at, so startup can tell whether it is current
+CREATE TABLE IF NOT EXISTS catalogue_meta (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    revision TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS pantry (
+    item TEXT NOT NULL,
+    unit TEXT NOT NULL DEFAULT '',  -- '' for counted items
+    quantity REAL NOT NULL,
+    PRIMARY KEY (item, unit)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS shopping_list (
+    id INTEGER PRIMARY KEY,
+    raw TEXT,
+    quantity REAL,
+    unit TEXT,
+    ingredient TEXT NOT NULL
+);
+"""
+
+# path -> the process-wide connection
+_connections = {}
+_connections_lock = threading.Lock()
+
+
+class Connection(sqlite3.Connection):
+    """
+    sqlite3 connection shared between threads. Hold `lock` for each
+    transaction or query so statements from different threads don't
+    interleave within one transaction.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.lock = threading.RLock()
+
+
+def _migrate(conn):
+    """
+    Bring a database from an older version up to SCHEMA: drop what it kept
+    for the SQL feasibility and FTS queries and give it a catalogue revision.
+    """
+    conn.execute("DROP INDEX IF EXISTS idx_lines_item")
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(ingredient_lines)")}
+    for column in ("item_key", "dimension", "need"):
+        if column in columns:
+            conn.execute(f"ALTER TABLE ingredient_lines DROP COLUMN {column}")
+    for table in ("ingredient_fts", "units", "densities"):
+        conn.execute(f"DROP TABLE IF EXISTS {table}")
+    # Databases from before catalogue revisions get one
+    conn.execute("INSERT OR IGNORE INTO catalogue_meta (id, revision) VALUES (0, ?)", (uuid.uuid4().hex,))
+
+
+def connect(path=DB_PATH):
+    """Open a database, creating the schema on first use."""
+    conn = sqlite3.connect(path, check_same_thread=False, factory=Connection)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA foreign_keys=ON")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    with conn:
+        conn.executescript(SCHEMA)
+        _migrate(conn)
+    return conn
+
+
+def get_connection(path=DB_PATH):
+    """
+    The process-wide connection to `path`, opened (and the schema set up)
+    once. Streamlit runs every rerun on a new thread, so a per-thread
+    connection would reconnect on each rerun.
+    """
+    conn = _connections.get(path)
+    if conn is None:
+        with _connections_lock:
+            conn = _connections.get(path)
+            if conn is None:
+                conn = _connections[path] = connect(path)
+    return conn
+
+
+# --- Recipes and parsed lines ---
+def _json_value(value):
+    if isinstance(value, list):
+        return value
+    if value is None or (not isinstance(value, str) and pd.isna(value)):
+        return None
+    if hasattr(value, "item"):
+        return value.item()     # NumPy scalar
+    return value
+
+
+def _insert_recipes(conn, recipes, store, first_id):
+    records = recipes.to_dict("records")
+    conn.executemany(
+        "INSERT INTO recipes (id, name, data) VALUES (?, ?, ?)",
+        (
+            (recipe_id, str(row.get("Recipe Name", "")),
+             json.dumps({k: _json_value(v) for k, v in row.items()}, default=str))
+            for recipe_id, row in enumerate(records, start=first_id)
+        ),
+    )
+
+    conn.executemany(
+        "INSERT INTO ingredient_lines (recipe_id, position, raw, quantity, unit, item) VALUES (?, ?, ?, ?, ?, ?)",
+        (
+            (recipe_id, position, raw, qty, unit, item)
+            for recipe_id, parsed in lines_by_recipe(store).items()
+            for position, (raw, qty, unit, item) in enumerate(parsed)
+        ),
+    )
+
+
+def _new_revision(conn):
+    revision = uuid.uuid4().hex
+    conn.execute(
+        "INSERT INTO catalogue_meta (id, revision) VALUES (0, ?)"
+        " ON CONFLICT(id) DO UPDATE SET revision = excluded.revision",
+        (revision,),
+    )
+    return revision
+
+
+def catalogue_revision(conn=None):
+    """Revision of the stored catalogue; changes on every catalogue write."""
+    conn = conn or get_connection()
+    with conn.lock:
+        row = conn.execute("SELECT revision FROM catalogue_meta").fetchone()
+    return row[0] if row else None
+
+
+@instrumented()
+def replace_catalogue(recipes, store, conn=None):
+    """
+    Replace every stored recipe with `recipes` and their parsed `store` lines.
+    Returns the new catalogue revision.
+    """
+    conn = conn or get_connection()
+    with conn.lock, conn:
+        conn.execute("DELETE FROM ingredient_lines")
+        conn.execute("DELETE FROM recipes")
+        _insert_recipes(conn, recipes, store, 0)
+        return _new_revision(conn)
+
+
+@instrumented()
+def append_recipes(recipes, store, first_id, conn=None):
+    """
+    Store newly added recipes; `store` holds their lines with ids from first_id.
+    Raises ValueError unless the database holds exactly recipes 0..first_id-1,
+    so an append never lands on a table that is missing the rest of the catalogue.
+    Returns the new catalogue revision.
+    """
+    conn = conn or get_connection()
+    with conn.lock, conn:
+        stored = conn.execute("SELECT COUNT(*) FROM recipes").fetchone()[0]
+        if stored != first_id:
+            raise ValueError(f"Cannot append recipes from id {first_id}: the database holds {stored} recipes")
+        _insert_recipes(conn, recipes, store, first_id)
+        return _new_revision(conn)
+
+
+def recipe_count(conn=None):
+    conn = conn or get_connection()
+    with conn.lock:
+        return conn.execute("SELECT COUNT(*) FROM recipes").fetchone()[0]
+
+
+@instrumented()
+def load_catalogue_db(conn=None):
+    """
+    (recipes, ingredient_store, revision) as saved, or (None, None, revision)
+    when the database has no recipes.
+    """
+    conn = conn or get_connection()
+    with conn.lock:
+        revision = catalogue_revision(conn)
+        rows = conn.execute("SELECT data FROM recipes ORDER BY id").fetchall()
+        lines = conn.execute(
+            "SELECT recipe_id, raw, quantity, unit, item FROM ingredient_lines ORDER BY recipe_id, position"
+        ).fetchall()
+    if not rows:
+        return None, None, revision
+    recipes = pd.DataFrame([json.loads(data) for (data,) in rows])
+    store = pd.DataFrame(lines, columns=STORE_COLUMNS)
+    store["quantity"] = store["quantity"].astype(float)
+    return recipes, store, revision
+
+
+# --- Pantry and shopping list ---
+def load_pantry(conn=None):
+    conn = conn or get_connection()
+    with conn.lock:
+        rows = conn.execute("SELECT item, unit, quantity FROM pantry").fetchall()
+    return {(item, unit or None): qty for item, unit, qty in rows}
+
+
+@instrumented()
+def save_pantry(pantry, conn=None):
+    """
+    Replace the stored pantry with `pantry` ({(item, unit): qty}). The copy
+    is taken under the connection's lock, so as every session shares one
+    Pantry (pantry.SHARED_PANTRY) the last save always writes the latest
+    stock.
+    """
+    conn = conn or get_connection()
+    with conn.lock, conn:
+        conn.execute("DELETE FROM pantry")
+        conn.executemany(
+            "INSERT INTO pantry (item, unit, quantity) VALUES (?, ?, ?)",
+            ((item, unit or "", float(qty)) for (item, unit), qty in pantry.copy().items()),
+        )
+
+
+def load_shopping_list(conn=None):
+    conn = conn or get_connection()
+    with conn.lock:
+        rows = conn.execute("SELECT raw, quantity, unit, ingredient FROM shopping_list ORDER BY id").fetchall()
+    return [{"raw": raw, "quantity": qty, "unit": unit, "ingredient": ingredient} for raw, qty, unit, ingredient in rows]
+
+
+def save_shopping_list(entries, conn=None):
+    """
+    Replace the stored shopping list with `entries` (a ShoppingList or a list
+    of entry dicts). As with save_pantry(), the copy is taken under the
+    connection's lock and every session shares one list
+    (shopping.SHARED_SHOPPING_LIST), so the last save writes the latest list.
+    """
+    conn = conn or get_connection()
+    with conn.lock, conn:
+        conn.execute("DELETE FROM shopping_list")
+        conn.executemany(
+            "INSERT INTO shopping_list (raw, quantity, unit, ingredient) VALUES (?, ?, ?, ?)",
+            ((e["raw"], e["quantity"], e["unit"], e["ingredient"]) for e in entries.copy()),
+        )
+
@@ -0,0 +1,12 @@
+# tests/conftest.py
+import os
+import sys
+import tempfile
+
+# Keep the suite away from the working database and catalogue file; both
+# paths are read when storage/catalogue are first imported
+_scratch = tempfile.mkdtemp(prefix="recipe-tests-")
+os.environ["RECIPE_DB"] = os.path.join(_scratch, "recipes.db")
+os.environ["RECIPE_CATALOGUE"] = os.path.join(_scratch, "recipes.arrow")
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
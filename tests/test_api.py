@@ -0,0 +1,51 @@
+# tests/test_api.py
+import pytest
+from starlette.exceptions import HTTPException
+
+from api import DEFAULT_LIMIT, _quantity, _search_options, _stock_entry
+from utils import parse_ingredient
+
+
+def test_search_options_defaults():
+    assert _search_options({}) == (85, 0.5, DEFAULT_LIMIT)
+
+
+@pytest.mark.parametrize("body", [
+    {"limit": -1}, {"limit": "5"}, {"limit": 2.5}, {"limit": True},
+    {"threshold": 150}, {"threshold": "85"}, {"threshold": float("nan")},
+    {"min_percentage": 50}, {"min_percentage": None},
+])
+def test_search_options_rejected(body):
+    with pytest.raises(HTTPException) as err:
+        _search_options(body)
+    assert err.value.status_code == 400
+
+
+@pytest.mark.parametrize("qty", [float("nan"), float("inf"), -1, "2", True])
+def test_quantity_rejected(qty):
+    with pytest.raises(HTTPException) as err:
+        _quantity(qty)
+    assert err.value.status_code == 400
+
+
+
+@pytest.mark.parametrize("body, text", [
+    ({"item": "sugar", "unit": "cups", "quantity": 2}, "2 cups sugar"),
+    ({"item": "Flour", "unit": "kg", "quantity": 1.5}, "1.5 kg flour"),
+    ({"item": "Eggs", "unit": "", "quantity": 6}, "6 eggs"),
+    ({"item": "eggs", "unit": None, "quantity": 6}, "6 eggs"),
+    ({"item": "garlic", "unit": "Cloves", "quantity": 3}, "3 cloves garlic"),
+])
+def test_stock_entry_matches_text(body, text):
+    assert _stock_entry(body) == parse_ingredient(text)
+
+
+@pytest.mark.parametrize("body", [
+    {"item": ["x"], "unit": "g", "quantity": 1},
+    {"item": "sugar", "unit": 5, "quantity": 1},
+    {"unit": "g", "quantity": 1},
+])
+def test_stock_entry_rejected(body):
+    with pytest.raises(HTTPException) as err:
+        _stock_entry(body)
+    assert err.value.status_code == 400
\ No newline at end of file
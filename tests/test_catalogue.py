@@ -0,0 +1,108 @@
+# tests/test_catalogue.py
+import io
+import json
+import os
+
+import pandas as pd
+import pytest
+
+import catalogue
+import storage
+from catalogue import SharedCatalogue, build_ingredient_store, lines_by_recipe, save_catalogue, stream_import
+
+
+def _recipes(n, first=0):
+    return pd.DataFrame({
+        "Recipe Name": [f"Recipe {i}" for i in range(first, first + n)],
+        "Ingredients": [[f"{i % 3 + 1} eggs", "1 cup flour"] for i in range(first, first + n)],
+    })
+
+
+@pytest.fixture
+def empty_storage():
+    """An empty recipes table and no saved Arrow catalogue."""
+    storage.replace_catalogue(_recipes(0), build_ingredient_store(None))
+    if os.path.exists(catalogue.CATALOGUE_PATH):
+        os.remove(catalogue.CATALOGUE_PATH)
+    yield
+    if os.path.exists(catalogue.CATALOGUE_PATH):
+        os.remove(catalogue.CATALOGUE_PATH)
+
+
+def test_add_to_arrow_catalogue_survives_restart(empty_storage):
+    recipes = _recipes(15)
+    save_catalogue(recipes, build_ingredient_store(recipes))
+
+    shared = SharedCatalogue()
+    assert len(shared.current()) == 15
+    shared.append(_recipes(1, first=15))
+    assert len(shared.current()) == 16
+
+    restarted = SharedCatalogue()
+    snapshot = restarted.current()
+    assert len(snapshot) == 16
+    assert snapshot.recipes["Recipe Name"].tolist() == [f"Recipe {i}" for i in range(16)]
+    assert sorted(snapshot.lines) == list(range(16))
+
+
+def test_add_after_unsaved_replace_survives_restart(empty_storage):
+    shared = SharedCatalogue()
+    recipes = _recipes(4)
+    shared.replace(recipes, build_ingredient_store(recipes), persist=False)
+    shared.append(_recipes(1, first=4))
+
+    assert len(SharedCatalogue().current()) == 5
+
+
+def test_append_recipes_refuses_a_gap(empty_storage):
+    added = _recipes(1, first=15)
+    with pytest.raises(ValueError):
+        storage.append_recipes(added, build_ingredient_store(added, first_id=15), 15)
+    assert storage.recipe_count() == 0
+
+
+def _saved_snapshot(n):
+    shared = SharedCatalogue()
+    recipes = _recipes(n)
+    snapshot = shared.replace(recipes, build_ingredient_store(recipes))
+    save_catalogue(snapshot.recipes, snapshot.store, revision=snapshot.revision)
+    return shared, snapshot
+
+
+def test_startup_reads_a_current_arrow_file(empty_storage, monkeypatch):
+    _, snapshot = _saved_snapshot(6)
+
+    def not_read():
+        raise AssertionError("the database catalogue should not be decoded")
+
+    monkeypatch.setattr(storage, "load_catalogue_db", not_read)
+    restarted = SharedCatalogue().current()
+    assert len(restarted) == 6
+    assert restarted.revision == snapshot.revision
+
+
+def test_startup_ignores_a_stale_arrow_file(empty_storage):
+    shared, _ = _saved_snapshot(6)
+    shared.append(_recipes(1, first=6))
+    assert len(SharedCatalogue().current()) == 7
+
+
+
+# --- Streaming import ---
+def _import(data, name):
+    return stream_import(io.BytesIO(data.encode()), name)
+
+
+def test_import_csv():
+    recipes, _ = _import('Recipe Name,Ingredients\nPancakes,"2 eggs, 1 cup flour"\n', "a.csv")
+    assert recipes["Ingredients"].tolist() == [["2 egg", "1 cup flour"]]
+
+
+def test_import_jsonl_string_and_list_cells():
+    rows = [
+        {"Recipe Name": "Pancakes", "Ingredients": "2 eggs, 1 cup flour"},
+        {"Recipe Name": "Soup", "Ingredients": ["2 carrots", "salt"]},
+    ]
+    recipes, store = _import("".join(json.dumps(row) + "\n" for row in rows), "a.jsonl")
+    assert recipes["Ingredients"].tolist() == [["2 egg", "1 cup flour"], ["2 carrots", "salt"]]
+    assert lines_by_recipe(store)[1] == [("2 carrots", 2.0, None, "carrot"), ("salt", None, None, "salt")]
\ No newline at end of file
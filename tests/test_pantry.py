@@ -0,0 +1,148 @@
+# tests/test_pantry.py
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import pantry as pantry_module
+import storage
+from catalogue import CatalogueSnapshot, build_ingredient_store
+from pantry import Pantry, SharedPantry, get_recipe_matrix, matrix_from_store, session_pantry
+from shopping import ShoppingList
+from utils import parse_ingredient
+
+
+def _store(*ingredient_lists):
+    recipes = pd.DataFrame({
+        "Recipe Name": [f"Recipe {i}" for i in range(len(ingredient_lists))],
+        "Ingredients": list(ingredient_lists),
+    })
+    return build_ingredient_store(recipes), len(recipes)
+
+
+def _lines(*ingredients):
+    return [(raw, *parse_ingredient(raw)) for raw in ingredients]
+
+
+# --- Empty pantry ---
+def test_empty_pantry_totals_are_float():
+    pantry = Pantry()
+    pantry.column("egg", "count")
+    totals = pantry.totals()
+    assert totals.dtype == float
+    assert totals.tolist() == [0.0]
+
+
+def test_rank_against_empty_pantry():
+    store, n = _store(["2 eggs", "1 cup flour"], ["salt"], [])
+    pantry = Pantry()
+    matrix = matrix_from_store(pantry, store, n)
+    ranked, matched, pct = matrix.rank(pantry.totals())
+    assert sorted(ranked.tolist()) == [0, 1, 2]
+    assert matched.tolist() == [0, 0, 0]
+    assert np.all(pct == 0)
+
+
+
+# --- Ranking ---
+@pytest.mark.parametrize("by", ["match", "missing", "shortfall"])
+def test_rank_limit_is_the_top_of_the_full_order(by):
+    rng = np.random.default_rng(0)
+    items = ["egg", "flour", "sugar", "milk", "butter"]
+    cells = [
+        [f"{rng.integers(1, 4)} cup {item}" for item in rng.choice(items, rng.integers(0, 4), replace=False)]
+        for _ in range(300)
+    ]
+    store, n = _store(*cells)
+    pantry = Pantry({("flour", "cup"): 2.0, ("sugar", "cup"): 1.0, ("milk", "cup"): 3.0})
+    matrix = matrix_from_store(pantry, store, n)
+    full = matrix.rank(pantry.totals(), by)
+    for limit in (0, 1, 7, 20, 299, 300, 500):
+        top = matrix.rank(pantry.totals(), by, limit)
+        for got, want in zip(top, full):
+            assert got.tolist() == want[:limit].tolist()
+
+
+# --- Item keys ---
+@pytest.mark.parametrize("name", ["cheeses", "glass"])
+def test_parsed_items_are_not_singularized_twice(name):
+    qty, unit, item = parse_ingredient(f"200 g {name}")
+    pantry = Pantry({(item, unit): qty})
+    lines = _lines(f"100 g {name}")
+    assert pantry.shortfall(lines) == ([], [], 1)
+    store, n = _store([f"100 g {name}"])
+    assert matrix_from_store(pantry, store, n).rank(pantry.totals())[1].tolist() == [1]
+    shopping = ShoppingList()
+    shopping.add_lines(lines)
+    assert ShoppingList(list(shopping)).consolidated() == [(item, "g", 100.0)]
+    assert pantry.cook(lines)[0]
+    assert pantry[(item, unit)] == 100.0
+
+
+# --- cook() transactions ---
+def test_cook_without_enough_stock_changes_nothing():
+    pantry = Pantry({("egg", None): 1.0, ("flour", "g"): 500.0})
+    cooked, missing, short = pantry.cook(_lines("2 eggs", "200 g flour", "salt"))
+    assert not cooked
+    assert missing == [("salt", None, 1)]
+    assert short == [("egg", None, 1.0)]
+    assert pantry.copy() == {("egg", None): 1.0, ("flour", "g"): 500.0}
+
+
+def test_cook_deducts_like_deduct():
+    stock = {("egg", None): 6.0, ("flour", "g"): 1000.0, ("milk", "cup"): 2.0}
+    lines = _lines("2 eggs", "200 g flour", "4 tbsp milk")
+    cooked_pantry, deducted = Pantry(stock), Pantry(stock)
+    assert cooked_pantry.cook(lines) == (True, [], [])
+    deducted.deduct(lines)
+    assert cooked_pantry.copy() == deducted.copy()
+
+
+def test_cook_retries_after_a_concurrent_change(monkeypatch):
+    pantry = Pantry({("flour", "g"): 500.0})
+    read = pantry._read
+    reads = []
+
+    def racing_read(items):
+        snapshot = read(items)
+        if not reads:
+            # Another thread restocks between the read and the write-back
+            pantry.add(("flour", "g"), 100.0)
+        reads.append(items)
+        return snapshot
+
+    monkeypatch.setattr(pantry, "_read", racing_read)
+    assert pantry.cook(_lines("200 g flour"))[0]
+    assert len(reads) == 2
+    assert pantry.conflicts == 1
+    assert pantry[("flour", "g")] == 400.0
+
+
+def test_concurrent_cooks_never_overdraw():
+    pantry = Pantry({("flour", "g"): 1000.0, ("egg", None): 12.0})
+    lines = _lines("300 g flour", "2 eggs")
+    with ThreadPoolExecutor(8) as pool:
+        outcomes = list(pool.map(lambda _: pantry.cook(lines)[0], range(40)))
+    assert outcomes.count(True) == 3
+    assert pantry.copy() == {("flour", "g"): 100.0, ("egg", None): 6.0}
+
+
+# --- Shared pantry ---
+def test_sessions_share_one_pantry(monkeypatch):
+    storage.save_pantry({("egg", None): 6.0})
+    monkeypatch.setattr(pantry_module, "SHARED_PANTRY", SharedPantry())
+    first, second = {}, {}
+    session_pantry(first).add(("flour", "g"), 500.0)
+    session_pantry(second).add(("egg", None), -2.0)
+    assert first["pantry"] is second["pantry"]
+    storage.save_pantry(second["pantry"])
+    assert storage.load_pantry() == {("egg", None): 4.0, ("flour", "g"): 500.0}
+
+
+def test_sessions_share_one_recipe_matrix(monkeypatch):
+    monkeypatch.setattr(pantry_module, "SHARED_PANTRY", SharedPantry(loader=dict))
+    recipes = pd.DataFrame({"Recipe Name": ["Pancakes"], "Ingredients": [["2 eggs", "1 cup flour"]]})
+    snapshot = CatalogueSnapshot(recipes, build_ingredient_store(recipes))
+    first, second = {"catalogue": snapshot}, {"catalogue": snapshot}
+    assert get_recipe_matrix(first) is get_recipe_matrix(second)
\ No newline at end of file
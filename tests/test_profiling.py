@@ -0,0 +1,16 @@
+# tests/test_profiling.py
+import pytest
+from streamlit.runtime.scriptrunner_utils.exceptions import StopException
+
+import profiling
+
+
+def test_profiled_rerun_stops_a_page_cut_short(monkeypatch):
+    profile = profiling.RerunProfile("Test", cprofile=True)
+    monkeypatch.setattr(profiling, "start_rerun", lambda page: profiling._current.set(profile))
+    with pytest.raises(StopException):
+        with profiling.profiled_rerun("Test"):
+            raise StopException()
+    assert profile.total is not None
+    assert profile.cprofile_text is not None
+    assert profiling._current.get() is None
@@ -0,0 +1,116 @@
+# tests/test_search.py
+import random
+
+import pandas as pd
+import pytest
+from rapidfuzz import fuzz
+
+from search import IngredientIndex, LiveSearch, search_recipes
+from utils import clean_ingredient_text
+
+WORDS = ["egg", "eggs", "flour", "plain flour", "sugar", "brown sugar", "butter", "milk",
+         "salt", "pepper", "oil", "olive oil", "garlic", "onion", "red onion", "tomato",
+         "basil", "rice", "lemon", "lime", "ham", "honey", "cheese", "cheddar cheese"]
+AMOUNTS = ["", "1 ", "2 ", "1/2 cup ", "100g ", "2 tbsp ", "a pinch of ", "3 large "]
+
+
+def _reference(recipes, search_terms, threshold, min_percentage):
+    """The original per-row partial_ratio loop."""
+    search_ingredients = [s.strip().lower() for s in search_terms]
+    results = []
+    for pos, (recipe_name, recipe_ingredients) in enumerate(
+            zip(recipes["Recipe Name"], recipes["Ingredients"])):
+        if isinstance(recipe_ingredients, str):
+            recipe_ingredients = [
+                i.strip() for i in clean_ingredient_text(recipe_ingredients).split("\n")
+            ]
+        overlap = []
+        for s in search_ingredients:
+            for r in recipe_ingredients:
+                score = fuzz.partial_ratio(s, r)
+                if score >= threshold:
+                    overlap.append((r, score))
+                    break
+        match_fraction = len(overlap) / len(search_ingredients) if search_ingredients else 0
+        if match_fraction >= min_percentage:
+            results.append({
+                "Recipe": recipe_name,
+                "Recipe ID": pos,
+                "Matched Ingredients": overlap,
+                "Match Count": len(overlap),
+                "Match %": round(match_fraction * 100, 1)
+            })
+    return sorted(results, key=lambda x: x["Match Count"], reverse=True)
+
+
+def _line(rng):
+    word = rng.choice(WORDS)
+    if rng.random() < 0.2:
+        word = word.title()
+    return (rng.choice(AMOUNTS) + word).strip()
+
+
+def _catalogue(rng, n):
+    cells = []
+    for _ in range(n):
+        lines = [_line(rng) for _ in range(rng.randint(0, 6))]
+        cells.append("\n".join(lines) if rng.random() < 0.5 else lines)
+    return pd.DataFrame({
+        "Recipe Name": [f"Recipe {i}" for i in range(n)],
+        "Ingredients": cells,
+    })
+
+
+def _term(rng):
+    word = rng.choice(WORDS)
+    roll = rng.random()
+    if roll < 0.3:
+        start = rng.randrange(len(word))
+        word = word[start:start + rng.randint(1, 4)]
+    elif roll < 0.5:
+        i = rng.randrange(len(word))
+        word = word[:i] + rng.choice("aeiouxz") + word[i + 1:]
+    return f" {word.upper()} " if rng.random() < 0.1 else word
+
+
+# --- Pruned search vs the per-row loop ---
+@pytest.mark.parametrize("seed", range(8))
+@pytest.mark.parametrize("threshold", [50, 60, 85, 100])
+def test_search_matches_reference(seed, threshold):
+    rng = random.Random(seed * 101 + threshold)
+    recipes = _catalogue(rng, 40)
+    index = IngredientIndex(recipes)
+    for _ in range(6):
+        terms = [_term(rng) for _ in range(rng.randint(1, 4))]
+        min_percentage = rng.choice([0, 0.25, 0.5, 1.0])
+        expected = _reference(recipes, terms, threshold, min_percentage)
+        assert search_recipes(recipes, terms, threshold, min_percentage) == expected
+        assert search_recipes(None, terms, threshold, min_percentage, index=index) == expected
+
+
+def test_search_without_terms_matches_reference():
+    recipes = _catalogue(random.Random(0), 10)
+    assert search_recipes(recipes, [], 85, 0) == _reference(recipes, [], 85, 0)
+    assert search_recipes(recipes, [], 85, 0.5) == _reference(recipes, [], 85, 0.5)
+
+
+# --- LiveSearch top-k ---
+@pytest.mark.parametrize("seed", range(4))
+def test_live_search_top_k_matches_full_search(seed):
+    rng = random.Random(seed)
+    recipes = _catalogue(rng, 200)
+    index = IngredientIndex(recipes)
+    threshold = rng.choice([60, 85])
+    live = LiveSearch(index, threshold)
+
+    typed = [_term(rng) for _ in range(5)]
+    steps = [typed[:i] for i in range(1, len(typed) + 1)]
+    steps += [typed[:i] for i in range(len(typed) - 1, 0, -1)]
+    steps += [typed[:2] + typed[3:], typed[::-1]]
+    for terms in steps:
+        for min_percentage in (0, 0.5, 1.0):
+            full = search_recipes(None, terms, threshold, min_percentage, index=index)
+            for k in (1, 5, 20):
+                top, total = live.search(terms, min_percentage, k=k)
+                assert top == full[:k]
+                assert total >= len(full)
\ No newline at end of file
@@ -0,0 +1,23 @@
+# tests/test_shopping.py
+import shopping as shopping_module
+import storage
+from shopping import SharedShoppingList, ShoppingList, session_shopping_list
+
+
+def test_add_shortfall_raw_lines():
+    shopping = ShoppingList()
+    shopping.add_shortfall([("egg", None, 2), ("sugar", "g", 200.0)])
+    assert [entry["raw"] for entry in shopping] == ["2 egg", "200.0 g sugar"]
+    assert shopping.consolidated() == [("egg", None, 2.0), ("sugar", "g", 200.0)]
+
+
+
+def test_sessions_share_one_shopping_list(monkeypatch):
+    storage.save_shopping_list([{"raw": "1 cup milk", "quantity": 1.0, "unit": "cup", "ingredient": "milk"}])
+    monkeypatch.setattr(shopping_module, "SHARED_SHOPPING_LIST", SharedShoppingList())
+    first, second = {}, {}
+    session_shopping_list(first).add_text("2 eggs")
+    session_shopping_list(second).add_text("200 g sugar")
+    assert first["shopping_list"] is second["shopping_list"]
+    storage.save_shopping_list(first["shopping_list"])
+    assert [entry["raw"] for entry in storage.load_shopping_list()] == ["1 cup milk", "2 eggs", "200 g sugar"]
\ No newline at end of file
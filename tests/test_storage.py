@@ -0,0 +1,48 @@
+# tests/test_storage.py
+import sqlite3
+import threading
+
+import pandas as pd
+
+import storage
+from catalogue import build_ingredient_store
+
+
+def test_connection_is_shared_across_threads():
+    # Streamlit reruns each run on a new thread; they must not reconnect
+    main = storage.get_connection()
+    seen = []
+    thread = threading.Thread(target=lambda: seen.append(storage.get_connection()))
+    thread.start()
+    thread.join()
+    assert seen == [main]
+
+
+def test_pantry_round_trip():
+    storage.save_pantry({("egg", None): 3.0, ("flour", "g"): 500.0})
+    assert storage.load_pantry() == {("egg", None): 3.0, ("flour", "g"): 500.0}
+
+
+
+def test_connect_drops_unused_line_columns(tmp_path):
+    path = str(tmp_path / "old.db")
+    old = sqlite3.connect(path)
+    old.executescript("""
+        CREATE TABLE ingredient_lines (
+            recipe_id INTEGER NOT NULL, position INTEGER NOT NULL, raw TEXT NOT NULL,
+            quantity REAL, unit TEXT, item TEXT,
+            item_key TEXT NOT NULL, dimension TEXT NOT NULL, need REAL NOT NULL
+        );
+        CREATE INDEX idx_lines_item ON ingredient_lines(item_key, dimension);
+        CREATE TABLE units (unit TEXT PRIMARY KEY, dimension TEXT NOT NULL, factor REAL NOT NULL);
+    """)
+    old.close()
+
+    conn = storage.connect(path)
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(ingredient_lines)")]
+    assert columns == ["recipe_id", "position", "raw", "quantity", "unit", "item"]
+    recipes = pd.DataFrame({"Recipe Name": ["Pancakes"], "Ingredients": [["2 eggs", "1 cup flour"]]})
+    storage.replace_catalogue(recipes, build_ingredient_store(recipes), conn)
+    _, store, _ = storage.load_catalogue_db(conn)
+    assert store["raw"].tolist() == ["2 eggs", "1 cup flour"]
+    conn.close()
\ No newline at end of file
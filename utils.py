@@ -1,6 +1,9 @@
 # utils.py
 import re
 from fractions import Fraction
+from functools import lru_cache
+
+from profiling import register_cache
 
 # Canonical unit map: maps common unit tokens to (canonical_unit, multiplier_to_base)
 UNIT_MAP = {
@@ -13,8 +16,52 @@ UNIT_MAP = {
     "tbsp": ("tbsp", 1), "tablespoon": ("tbsp", 1), "tablespoons": ("tbsp", 1),
     "tsp": ("tsp", 1), "teaspoon": ("tsp", 1), "teaspoons": ("tsp", 1),
     "cup": ("cup", 1), "cups": ("cup", 1),
+
+    # "2 x eggs": a count, no unit
+    "x": (None, 1),
 }
 
+# --- Unit dimensions ---
+# Canonical unit -> (dimension, factor to the dimension's base unit).
+# Mass is in g, volume in ml (US spoons/cups), count in items. Unknown unit
+# tokens ("jar", "clove") are treated as a dimension of their own.
+UNIT_DIMENSIONS = {
+    "g": ("mass", 1.0),
+    "ml": ("volume", 1.0),
+    "tsp": ("volume", 4.92892159375),
+    "tbsp": ("volume", 14.78676478125),   # 3 tsp
+    "cup": ("volume", 236.5882365),       # 16 tbsp
+    None: ("count", 1.0),
+}
+
+# Approximate densities in g/ml, keyed by singularized ingredient name,
+# used to compare volume and mass quantities of the same ingredient.
+DENSITIES = {
+    "water": 1.0, "milk": 1.03, "cream": 1.01, "yogurt": 1.03, "greek yogurt": 1.05,
+    "sugar": 0.85, "brown sugar": 0.93, "powdered sugar": 0.56, "flour": 0.53,
+    "butter": 0.91, "oil": 0.92, "olive oil": 0.92, "vegetable oil": 0.92,
+    "honey": 1.42, "maple syrup": 1.32, "soy sauce": 1.15, "peanut butter": 1.09,
+    "rice": 0.85, "oat": 0.41, "salt": 1.2, "cocoa powder": 0.42,
+}
+
+def canonical_unit(token):
+    """
+    (canonical unit, multiplier) of a unit token via UNIT_MAP, also for a
+    plural spelling ("kgs" -> ("g", 1000)); None when it isn't a known unit.
+    """
+    token = token.strip().lower()
+    if token in UNIT_MAP:
+        return UNIT_MAP[token]
+    return UNIT_MAP.get(token.rstrip("s"))
+
+def unit_dimension(unit):
+    """Return (dimension, factor_to_base) for a canonical unit."""
+    return UNIT_DIMENSIONS.get(unit, (unit, 1.0))
+
+def density_of(item):
+    """Density in g/ml for a singularized ingredient name, or None if unknown."""
+    return DENSITIES.get(item)
+
 # --- Cleaning and splitting raw ingredient text ---
 def clean_ingredient_text(text):
     """Normalize raw cell text and return a newline-joined string with no empty lines."""
@@ -73,34 +120,41 @@ def normalize_ingredient_line(line):
     s = s.rstrip(",. ")
     return s
 
+# --- Precompiled patterns and translate tables for the parsing hot path ---
+# Odd spaces -> plain space, zero-width characters dropped
+_SPACE_TABLE = str.maketrans({
+    "\u00A0": " ", "\u2009": " ", "\u202F": " ", "\u200A": " ",
+    "\u200B": None, "\uFEFF": None,
+})
+
+UNICODE_FRACTIONS = {
+    "¼": 1/4, "½": 1/2, "¾": 3/4,
+    "⅐": 1/7, "⅑": 1/9, "⅒": 1/10,
+    "⅓": 1/3, "⅔": 2/3,
+    "⅕": 1/5, "⅖": 2/5, "⅗": 3/5, "⅘": 4/5,
+    "⅙": 1/6, "⅚": 5/6,
+    "⅛": 1/8, "⅜": 3/8, "⅝": 5/8, "⅞": 7/8,
+}
+
+# Same as _SPACE_TABLE, plus unicode fractions -> " <decimal> "
+_FRACTION_TABLE = {
+    **_SPACE_TABLE,
+    **str.maketrans({sym: f" {val} " for sym, val in UNICODE_FRACTIONS.items()}),
+}
+
+_AMOUNT_RE = re.compile(r"^([0-9\s\/\.\-½¼¾⅐⅑⅒⅓⅔⅕⅖⅗⅘⅙⅚⅛⅜⅝⅞]+)")
+_UNIT_RE = re.compile(r"^([a-zA-Z]+)")
+
+# Bound on distinct lines kept by the parse_ingredient cache
+PARSE_CACHE_SIZE = 65536
+
 # --- Robust fraction and number parser ---
 def fraction_to_float(text):
     """Parse mixed numbers, unicode fractions, simple fractions and decimals to float or None."""
     if not isinstance(text, str):
         return None
 
-    t = (
-        text.replace("\u00A0", " ")
-            .replace("\u2009", " ")
-            .replace("\u202F", " ")
-            .replace("\u200A", " ")
-            .replace("\u200B", "")
-            .replace("\uFEFF", "")
-            .strip()
-    )
-
-    unicode_fracs = {
-        "¼": 1/4, "½": 1/2, "¾": 3/4,
-        "⅐": 1/7, "⅑": 1/9, "⅒": 1/10,
-        "⅓": 1/3, "⅔": 2/3,
-        "⅕": 1/5, "⅖": 2/5, "⅗": 3/5, "⅘": 4/5,
-        "⅙": 1/6, "⅚": 5/6,
-        "⅛": 1/8, "⅜": 3/8, "⅝": 5/8, "⅞": 7/8,
-    }
-    for sym, val in unicode_fracs.items():
-        t = t.replace(sym, f" {val} ")
-
-    t = " ".join(t.split())
+    t = " ".join(text.translate(_FRACTION_TABLE).split())
     parts = t.split()
 
     # Mixed number like "2 1/2"
@@ -131,17 +185,18 @@ def fraction_to_float(text):
         return None
 
 # --- Basic singularization for ingredient names ---
+IRREGULAR_PLURALS = {
+    "tomatoes": "tomato", "potatoes": "potato",
+    "leaves": "leaf", "knives": "knife",
+    "loaves": "loaf", "berries": "berry", "cloves": "clove",
+}
+
 def singularize(item):
     if not isinstance(item, str):
         return ""
     s = item.strip().lower()
-    irregular = {
-        "tomatoes": "tomato", "potatoes": "potato",
-        "leaves": "leaf", "knives": "knife",
-        "loaves": "loaf", "berries": "berry", "cloves": "clove",
-    }
-    if s in irregular:
-        return irregular[s]
+    if s in IRREGULAR_PLURALS:
+        return IRREGULAR_PLURALS[s]
     if s.endswith("ies"):
         return s[:-3] + "y"
     if s.endswith("es") and not s.endswith(("ches", "shes", "xes", "sses")):
@@ -155,24 +210,23 @@ def parse_ingredient(ingredient):
     """
     Returns (quantity, unit, ingredient_name).
     quantity is numeric (converted by UNIT_MAP multiplier) or None.
-    unit is the canonical unit string from UNIT_MAP or the raw unit token if unknown.
+    unit is the canonical unit string from UNIT_MAP; None for counted items
+    ("2 eggs" and "2 x eggs" both give (2.0, None, "egg")); otherwise the
+    raw unit token when an unknown word is followed by an ingredient name
+    ("3 cloves garlic" gives (3.0, "cloves", "garlic")).
     ingredient_name is singularized lower-case string.
+    Results are cached per line (see parse_cache_stats); the tuple is immutable.
     """
     if not isinstance(ingredient, str):
         return None, None, None
+    return _parse_ingredient_cached(ingredient)
 
-    s = ingredient.strip().lower()
-    s = (
-        s.replace("\u00A0", " ")
-         .replace("\u2009", " ")
-         .replace("\u202F", " ")
-         .replace("\u200A", " ")
-         .replace("\u200B", "")
-         .replace("\uFEFF", "")
-    )
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def _parse_ingredient_cached(ingredient):
+    s = ingredient.strip().lower().translate(_SPACE_TABLE)
 
     # Extract leading amount (permissive)
-    amount_match = re.match(r"^([0-9\s\/\.\-½¼¾⅐⅑⅒⅓⅔⅕⅖⅗⅘⅙⅚⅛⅜⅝⅞]+)", s)
+    amount_match = _AMOUNT_RE.match(s)
     if not amount_match:
         # No numeric amount at start -> treat whole string as ingredient name
         return None, None, singularize(s)
@@ -181,7 +235,7 @@ def parse_ingredient(ingredient):
     rest = s[len(amount_text):].strip()
 
     # Extract unit token (first alphabetic token in rest)
-    unit_match = re.match(r"^([a-zA-Z]+)", rest)
+    unit_match = _UNIT_RE.match(rest)
     if unit_match:
         unit_raw = unit_match.group(1).lower()
         item = rest[len(unit_raw):].strip()
@@ -197,19 +251,38 @@ def parse_ingredient(ingredient):
     norm_unit = None
     multiplier = 1
     if unit_raw:
-        if unit_raw in UNIT_MAP:
-            norm_unit, multiplier = UNIT_MAP[unit_raw]
+        known = canonical_unit(unit_raw)
+        if known:
+            norm_unit, multiplier = known
+        elif not item:
+            # "2 eggs": the only word is the ingredient, counted
+            item = unit_raw
         else:
-            u = unit_raw.rstrip("s")
-            if u in UNIT_MAP:
-                norm_unit, multiplier = UNIT_MAP[u]
-            else:
-                # fallback: keep raw token as unit
-                norm_unit = unit_raw
+            # fallback: keep raw token as unit
+            norm_unit = unit_raw
 
     qty_in_base = amount * multiplier if norm_unit and multiplier else amount
     return qty_in_base, norm_unit, singularize(item or "")
 
+def parse_cache_stats():
+    """Hit/miss counters and current size of the parse_ingredient cache."""
+    info = _parse_ingredient_cached.cache_info()
+    return {"hits": info.hits, "misses": info.misses, "size": info.currsize, "maxsize": info.maxsize}
+
+# Shown per rerun in the timing panel
+register_cache("parse_ingredient", lambda: _parse_ingredient_cached.cache_info()[:2])
+
+def clear_parse_cache():
+    _parse_ingredient_cached.cache_clear()
+
+# --- Display and aggregation helpers shared by the pages ---
+def format_amount(amount, unit):
+    if unit == "g" and amount >= 1000:
+        return f"{amount/1000:.1f}kg"
+    if unit == "ml" and amount >= 1000:
+        return f"{amount/1000:.1f}l"
+    return f"{amount}{unit}" if unit else str(amount)
+
 # --- Helper to produce a clean list of raw strings for display on pages ---
 def normalized_raw_lines(ingredients_cell):
     """